@@ -1,20 +1,16 @@
 from models import OrderAction
-from strategies import Strategy
+from strategies import BufferedStrategy
 
-class LongOnlyOnce(Strategy):
+class LongOnlyOnce(BufferedStrategy):
     def __init__(self):
         self.__hasBought = {}
 
-    def generate_signals(self, tick):
-        signals = []
+    def write_signals(self, tick, buffer):
         quantity = 1
         if tick.symbol not in self.__hasBought:
             self.__hasBought[tick.symbol] = 1
             if quantity < 0.1*tick.volume:
-                signals.append((tick.timestamp, OrderAction.BUY.value, tick.symbol, quantity, tick.close))
-        else:
-            signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, quantity, tick.close))
+                buffer.append(tick.timestamp, OrderAction.BUY.value, tick.symbol, quantity, tick.close)
         #last_day = False unwind on last day?
         #if tick.symbol not in self.__hasSold and last_day:
-        #    signals.append((tick.timestamp, OrderAction.SELL.value, tick.symbol, quantity, tick.open))
-        return signals
\ No newline at end of file
+        #    buffer.append(tick.timestamp, OrderAction.SELL.value, tick.symbol, quantity, tick.open)
\ No newline at end of file
@@ -1,14 +1,15 @@
 from collections import defaultdict
-import yfinance as yf
 import pandas as pd
 import os
 from models import MarketDataPoint
+from validation import validate_universe
 from constants import *
 
 class PriceLoader:
-    def __init__(self):
+    def __init__(self, tickers: list = None):
         print('Initializing PriceLoader...')
-        self.tickers = self.scrape_tickers()
+        # pass tickers to skip the network scrape when the data is already local
+        self.tickers = tickers if tickers is not None else self.scrape_tickers()
 
     def scrape_tickers(self):
         url = "https://datahub.io/core/s-and-p-500-companies/r/0.csv"
@@ -16,6 +17,7 @@ class PriceLoader:
         return tickers
 
     def download_price(self, ticker:str, start_date, end_date, batch_size = 150):
+        import yfinance as yf  # heavy (network stack), only needed when a file is missing
         print("\n" + "="*80)
         print(f"""STARTING DOWNLOAD for {ticker} from {start_date} to {end_date}""")
         print("="*80 + "\n")   
@@ -48,11 +50,16 @@ class PriceLoader:
                                                                                                 'Volume': 'volume'})
             else:
                 # fall back to Close (less ideal but robust)
+                print(f"WARNING: no 'Adj Close' for {ticker}, using unadjusted Close as adj_close")
                 df = df[['Close', 'High', 'Low', 'Open', 'Volume']].rename(columns={'Close': 'close', 
                                                                                     'High': 'high', 'Low': 'low', 'Open': 'open',
                                                                                     'Volume': 'volume'})
+                df['adj_close'] = df['close']
 
-            df = df[~df.index.duplicated(keep='first')]
+            duplicated = df.index.duplicated(keep='first')
+            if duplicated.any():
+                print(f"WARNING: dropping {duplicated.sum()} duplicate timestamps for {ticker}")
+            df = df[~duplicated]
             df.drop('Ticker', axis=1, inplace=True, errors='ignore')
             df['symbol'] = ticker
 
@@ -67,13 +74,23 @@ class PriceLoader:
 
     def load_data(self, start_date = "2005-01-01",  end_date="2025-01-01") -> list[MarketDataPoint]:
         market_data_dict = defaultdict(list)
+        data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+        data_paths = {}
         for ticker in self.tickers:
-            fn = f"price_{ticker.lower()}.parquet"
-            data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
-            data_path = os.path.join(data_dir, fn)
+            data_path = os.path.join(data_dir, f"price_{ticker.lower()}.parquet")
             if not os.path.exists(data_path):
                 self.download_price(ticker, start_date=start_date, end_date=end_date).to_parquet(data_path, index=False)
-            
+            data_paths[ticker] = data_path
+
+        # validation pass: only files changed since the last manifest are re-read
+        manifest = validate_universe(list(data_paths.values()), data_dir)
+
+        for ticker, data_path in data_paths.items():
+            fn = os.path.basename(data_path)
+            if manifest.get(fn, {}).get('status') == 'error':
+                print(f"Skipping {ticker}: {manifest[fn]['issues']}")
+                continue
+
             df = pd.read_parquet(data_path)
             # update market data dict based on timestamp
             for _, row in df.iterrows():
@@ -90,7 +107,8 @@ if __name__ == "__main__":
     start_date = "2005-01-01"
     end_date = "2025-01-01"
 
-    for ticker in loader.tickers:
+    # index ETFs / futures used as benchmarks (see benchmark.py)
+    for ticker in loader.tickers + [SPY, IVV, VOO, SP500_FUTURES]:
         dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
         parquet_name = f"price_{ticker.lower()}.parquet"
         fp = os.path.join(dir, parquet_name)
@@ -1,8 +1,10 @@
+import numpy as np
 import pandas as pd
 from strategies import MAStrategy, Volatility, macd, RSI
 from BenchmarkStrategy import LongOnlyOnce
 from engine import ExecutionEngine
 from PriceLoader_reporting import PriceLoader
+from panel import PricePanel, to_ns
 
 
 
@@ -28,49 +30,41 @@ def limited_period_total500(start_date, end_date,data_points):
 
 
 def build_portfolio_timeseries(orders, data_points, strategy_name, start_date, initial_capital=1_000_000):
+    # data_points: {timestamp: [MarketDataPoint]} or a PricePanel
+    panel = data_points if isinstance(data_points, PricePanel) else PricePanel.from_market_data(data_points)
+
     # orders_by_strategy filter
     orders = [o for o in orders if o.strategy == strategy_name]
-
-    # sort by timestamp
-    all_dates = sorted(pd.to_datetime(list(data_points.keys())))
-    records = []
+    tickers = sorted(set(o.symbol for o in orders))
+
+    # signed share / cash changes scattered onto the (date x ticker) grid, then accumulated
+    T = len(panel.calendar)
+    ticker_col = {t: k for k, t in enumerate(tickers)}
+    qty_delta = np.zeros((T, len(tickers)))
+    cash_delta = np.zeros(T)
+    for o in orders:
+        sign = 1 if o.action == "BUY" else -1 if o.action == "SELL" else 0
+        if sign == 0 or to_ns(o.timestamp) not in panel.date_index:
+            continue
+        i = panel.row(o.timestamp)
+        qty_delta[i, ticker_col[o.symbol]] += sign * o.quantity
+        cash_delta[i] -= sign * o.quantity * o.price
+
+    positions = np.cumsum(qty_delta, axis=0)
+    cash = initial_capital + np.cumsum(cash_delta)
+    prices = np.nan_to_num(panel["adj_close"][:, panel.cols(tickers)]) if tickers else np.zeros((T, 0))
+    values = positions * prices
+
+    df_ts = pd.DataFrame(values, index=panel.dates, columns=tickers)
+    df_ts["cash"] = cash
+    df_ts["total_value"] = cash + values.sum(axis=1)
 
     # first row: initial capital, no positions
-    first_record = {"date": pd.to_datetime(start_date), "total_value": initial_capital, "cash": initial_capital}
-    # set 0 for rest of the tickers
-    tickers = set(o.symbol for o in orders)
-    for t in tickers:
-        first_record[t] = 0.0
-    records.append(first_record)
-
-    # reset portfolio
-    portfolio = {"cash": initial_capital}
-    for t in tickers:
-        portfolio[t] = 0.0
-
-    for dt in all_dates:
-        dt_records = {"date": dt}
-        # execute orders for that date
-        for o in orders:
-            if o.timestamp == dt:
-                if o.action == "BUY":
-                    portfolio[o.symbol] += o.quantity
-                    portfolio["cash"] -= o.quantity * o.price
-                elif o.action == "SELL":
-                    portfolio[o.symbol] -= o.quantity
-                    portfolio["cash"] += o.quantity * o.price
-        # compute total value
-        total_value = portfolio["cash"]
-        mp_list = {mp.symbol: mp.adj_close for mp in data_points[dt]}
-        for sym in tickers:
-            total_value += portfolio[sym] * mp_list.get(sym, 0.0)
-            dt_records[sym] = portfolio[sym] * mp_list.get(sym, 0.0)
-        dt_records["cash"] = portfolio["cash"]
-        dt_records["total_value"] = total_value
-        records.append(dt_records)
-
-    df_ts = pd.DataFrame(records).set_index("date").sort_index()
-    return df_ts
+    first_record = pd.DataFrame([{**{t: 0.0 for t in tickers}, "cash": initial_capital, "total_value": initial_capital}],
+                                index=[pd.to_datetime(start_date)])
+    df_ts = pd.concat([first_record, df_ts])
+    df_ts.index.name = "date"
+    return df_ts.sort_index(kind="stable")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import pandas as pd
+from constants import SPY, IVV, VOO, SP500_FUTURES
+from panel import PricePanel, DATA_DIR
+
+'''
+    Vectorised benchmarks computed straight from a PricePanel (no engine run)
+    - buy & hold: equal dollars in every name listed on the first day, never rebalanced
+    - equal weight: daily rebalanced equal weight over the names valid on each day
+    - cap-weight proxy: weights proportional to trailing average dollar volume (no shares outstanding in data/)
+    - index ETFs: SPY / IVV / VOO / ES=F daily returns from data/price_<symbol>.parquet when downloaded; they
+      are never part of the universe of the three benchmarks above
+    - relative_metrics: alpha, beta, tracking error and information ratio of every strategy in one pass
+'''
+
+INDEX_SYMBOLS = (SPY, IVV, VOO, SP500_FUTURES)
+
+
+def stock_universe(panel: PricePanel) -> PricePanel:
+    # the panel without the index ETFs / futures that PriceLoader downloads next to the stocks
+    symbols = [s for s in panel.symbols if s.upper() not in INDEX_SYMBOLS]
+    return panel if len(symbols) == len(panel.symbols) else panel.slice(symbols=symbols)
+
+
+def buy_and_hold_returns(panel: PricePanel, field: str = 'adj_close') -> np.ndarray:
+    prices = panel.to_frame(field).ffill().to_numpy()
+    held = panel.valid[0]
+    if not held.any():
+        raise ValueError("No symbol has a price on the first panel date")
+    value = np.nanmean(prices[:, held] / prices[0, held], axis=1)
+    out = np.zeros(len(value))
+    out[1:] = value[1:] / value[:-1] - 1.0
+    return out
+
+
+def equal_weight_returns(panel: PricePanel, field: str = 'adj_close') -> np.ndarray:
+    returns = panel.returns(field)
+    counts = np.count_nonzero(~np.isnan(returns), axis=1)
+    total = np.nansum(returns, axis=1)
+    return np.divide(total, counts, out=np.zeros(len(total)), where=counts > 0)
+
+
+def cap_weight_proxy_returns(panel: PricePanel, window: int = 20, field: str = 'adj_close') -> np.ndarray:
+    returns = panel.returns(field)
+    dollar_volume = panel.to_frame('close') * panel.to_frame('volume')
+    adv = dollar_volume.rolling(window, min_periods=1).mean().to_numpy()
+    # weights known at the previous close, only for names that have a return today
+    weights = np.zeros_like(adv)
+    weights[1:] = np.nan_to_num(adv[:-1])
+    weights[np.isnan(returns)] = 0.0
+    total = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+    return (weights * np.nan_to_num(returns)).sum(axis=1)
+
+
+def index_returns(panel: PricePanel = None, symbols=INDEX_SYMBOLS, data_dir: str = DATA_DIR) -> pd.DataFrame:
+    # daily adj_close returns of the index ETFs, aligned to the panel calendar if one is given
+    columns = {}
+    for symbol in symbols:
+        path = os.path.join(data_dir, f"price_{symbol.lower()}.parquet")
+        if not os.path.exists(path):
+            print(f"Skipping benchmark {symbol}: {path} not found (download it with PriceLoader)")
+            continue
+        df = pd.read_parquet(path, columns=['timestamp', 'adj_close'])
+        columns[symbol] = df.set_index('timestamp')['adj_close'].pct_change()
+    out = pd.DataFrame(columns)
+    if panel is not None:
+        out = out.reindex(panel.dates)
+    return out
+
+
+def benchmark_returns(panel: PricePanel, include_index: bool = True, data_dir: str = DATA_DIR) -> pd.DataFrame:
+    stocks = stock_universe(panel)
+    out = pd.DataFrame({
+        'Buy & Hold': buy_and_hold_returns(stocks),
+        'Equal Weight': equal_weight_returns(stocks),
+        'Cap Weight Proxy': cap_weight_proxy_returns(stocks),
+    }, index=panel.dates)
+    if include_index:
+        out = out.join(index_returns(panel, data_dir=data_dir))
+    return out
+
+
+def relative_metrics(strategy_returns: pd.DataFrame, benchmark: pd.Series, periods_per_year: int = 252) -> pd.DataFrame:
+    # one row per strategy column; alpha, tracking error and IR are annualised
+    benchmark = benchmark.dropna()
+    R = strategy_returns.reindex(benchmark.index).fillna(0.0).to_numpy()
+    b = benchmark.to_numpy()
+
+    R_mean = R.mean(axis=0)
+    b_mean = b.mean()
+    b_var = b.var()
+    beta = ((R - R_mean) * (b - b_mean)[:, None]).mean(axis=0) / b_var if b_var > 0 else np.full(R.shape[1], np.nan)
+    alpha = (R_mean - beta * b_mean) * periods_per_year
+    active = R - b[:, None]
+    tracking_error = active.std(axis=0) * np.sqrt(periods_per_year)
+    active_return = active.mean(axis=0) * periods_per_year
+    info_ratio = np.divide(active_return, tracking_error, out=np.full(len(active_return), np.nan), where=tracking_error > 0)
+
+    return pd.DataFrame({
+        'Alpha': alpha,
+        'Beta': beta,
+        'Tracking Error': tracking_error,
+        'Active Return': active_return,
+        'Information Ratio': info_ratio,
+    }, index=strategy_returns.columns)
+
+
+if __name__ == "__main__":
+    panel = PricePanel.from_parquet(start_date="2020-01-01", end_date="2024-12-31")
+    benchmarks = benchmark_returns(panel)
+    print(((1 + benchmarks).prod() - 1).rename("Total Return"))
+    print(relative_metrics(benchmarks.drop(columns='Equal Weight'), benchmarks['Equal Weight']))
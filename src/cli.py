@@ -0,0 +1,239 @@
+import argparse
+import importlib
+import json
+import os
+import time
+
+'''
+    Config-driven backtest entry point
+        python src/cli.py configs/example.toml [--run NAME] [--dry-run]
+    - run config in TOML (stdlib) or YAML (needs pyyaml): strategies + params, date range,
+      universe, engine mode and output paths; several [[runs]] are executed in one process
+    - only cheap modules are imported at the top; pandas/engine/strategies are imported when a run
+      starts, matplotlib only when plotting is requested and yfinance never for offline data
+'''
+
+ENGINE_MODES = ('batch', 'replay')
+STRATEGY_MODULES = ('strategies', 'BenchmarkStrategy')
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_config(path: str) -> dict:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.yml', '.yaml'):
+        import yaml
+        with open(path) as f:
+            return yaml.safe_load(f)
+    if ext == '.toml':
+        try:
+            import tomllib
+        except ModuleNotFoundError:  # python < 3.11
+            import tomli as tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    raise ValueError(f"Unsupported config format: {path} (use .toml, .yml or .yaml)")
+
+
+PATH_KEYS = ('data_dir', 'output_dir', 'store')
+
+
+def resolve_runs(config: dict, base_dir: str = None) -> list:
+    # every [[runs]] entry inherits the top-level [defaults] table; relative paths are taken
+    # relative to base_dir (the config file's directory), not the current directory
+    defaults = config.get('defaults', {})
+    runs = config.get('runs') or [{}]
+    resolved = []
+    for i, run in enumerate(runs):
+        merged = {**defaults, **run}
+        merged.setdefault('name', f"run_{i}")
+        merged.setdefault('engine_mode', 'batch')
+        merged.setdefault('initial_capital', 1000000.0)
+        merged.setdefault('data_dir', os.path.join(REPO_ROOT, 'data'))
+        merged.setdefault('output_dir', os.path.join(REPO_ROOT, 'output'))
+        if base_dir is not None:
+            for key in PATH_KEYS:
+                if merged.get(key) and not os.path.isabs(merged[key]):
+                    merged[key] = os.path.normpath(os.path.join(base_dir, merged[key]))
+        if merged['engine_mode'] not in ENGINE_MODES:
+            raise ValueError(f"Run {merged['name']}: unknown engine_mode {merged['engine_mode']}, choose from {ENGINE_MODES}")
+        if not merged.get('strategies'):
+            raise ValueError(f"Run {merged['name']}: no strategies configured")
+        if merged.get('store') and not merged.get('log_orders', True):
+            raise ValueError(f"Run {merged['name']}: store needs the order log, drop log_orders = false")
+        resolved.append(merged)
+    return resolved
+
+
+def resolve_strategy(class_name: str):
+    # "RSI" is looked up in the strategy modules, "module:Class" imports anything else
+    if ':' in class_name:
+        module_name, class_name = class_name.split(':', 1)
+        return getattr(importlib.import_module(module_name), class_name)
+    for module_name in STRATEGY_MODULES:
+        module = importlib.import_module(module_name)
+        if hasattr(module, class_name):
+            return getattr(module, class_name)
+    raise ValueError(f"Unknown strategy class {class_name}")
+
+
+def build_strategies(spec: dict) -> dict:
+    # {name: {"class": "RSI", "params": {...}}} or {name: "RSI"}
+    strategies = {}
+    for name, entry in spec.items():
+        if isinstance(entry, str):
+            entry = {'class': entry}
+        strategy_cls = resolve_strategy(entry.get('class', name))
+        strategies[name] = strategy_cls(**entry.get('params', {}))
+    return strategies
+
+
+class BacktestRunner:
+    def __init__(self):
+        self.__panels = {}  # runs that share universe + dates + data_dir share the loaded panel
+
+    def load_panel(self, run: dict, precision: dict = None):
+        from panel import PricePanel
+        from precision import PrecisionPolicy
+        universe = run.get('universe')
+        key = (tuple(universe) if universe else None, run.get('start_date'), run.get('end_date'), run['data_dir'], run.get('top_n'),
+               tuple(sorted((precision or {}).items())))
+        if key not in self.__panels:
+            self.__panels[key] = PricePanel.from_parquet(universe, run.get('start_date'), run.get('end_date'), data_dir=run['data_dir'],
+                                                         validate=run.get('validate', False), top_n=run.get('top_n'),
+                                                         policy=PrecisionPolicy(**precision) if precision else None)
+        return self.__panels[key]
+
+    def run(self, run: dict) -> dict:
+        from reporting import equity_curve
+        from precision import compare_curves, peak_rss_mb
+
+        started = time.perf_counter()
+        # price_dtype / volume_dtype / intern_symbols / memory_budget_mb / spill_dir, plus check_reference
+        precision = dict(run.get('precision') or {})
+        check_reference = precision.pop('check_reference', False)
+        panel = self.load_panel(run, precision)
+        print(f"[{run['name']}] time to first tick: {time.perf_counter() - started:.3f}s "
+              f"({panel.shape[0]} dates x {panel.shape[1]} symbols, {panel.nbytes / 2**20:.1f} MB)")
+        engine = self.execute(run, panel)
+        elapsed = time.perf_counter() - started
+
+        summary = {'name': run['name'], 'elapsed_seconds': elapsed, 'panel_mb': panel.nbytes / 2**20, 'strategies': {}}
+        if run['engine_mode'] == 'replay':
+            summary['live'] = engine.stats()
+        def curve(engine, name):
+            # without an order log the engine's online metrics hold the equity series
+            if run.get('log_orders', True):
+                return equity_curve(engine, name, run['initial_capital'])
+            return engine.metrics[name].equity_series(name)
+
+        curves = {name: curve(engine, name) for name in engine.strategies}
+        for name, portfolio in engine.portfolio.items():
+            summary['strategies'][name] = {
+                'capital': portfolio['capital'],
+                'earnings': portfolio['earnings'],
+                'costs': portfolio.get('costs', 0.0),
+                'unfilled': portfolio.get('unfilled', 0),
+                'final_npv': float(curves[name].iloc[-1]) if len(curves[name]) else run['initial_capital'],
+                'positions': {s: p for s, p in portfolio['positions'].items() if p['quantity']},
+                'metrics': engine.metrics[name].snapshot(),
+            }
+        if check_reference and precision:
+            # same run on a float64 panel, error of every equity curve against it
+            reference = self.execute(run, self.load_panel(run))
+            for name in engine.strategies:
+                summary['strategies'][name]['precision_error'] = compare_curves(
+                    curve(reference, name), curves[name])
+        summary['peak_rss_mb'] = peak_rss_mb()
+        self.write_outputs(run, engine, curves, summary)
+        if run.get('store'):
+            # persistent, queryable copy of the run (results.ResultStore)
+            from results import ResultStore
+            summary['run_id'] = ResultStore(run['store']).write_run(engine, curves, run['name'], run)
+        return summary
+
+    def execute(self, run: dict, panel):
+        from engine import ExecutionEngine
+
+        strategies = build_strategies(run['strategies'])
+        if run.get('top_n') is not None:
+            # the panel holds every name that is ever top-N, each strategy only trades the top-N of the day
+            from liquidity import LiquidityIndex, screen_strategy
+            index = LiquidityIndex.load(run['data_dir'])
+            strategies = {name: screen_strategy(s, index, run['top_n']) for name, s in strategies.items()}
+        if run['engine_mode'] == 'replay':
+            # asyncio live mode against a local replay of the panel (speed: multiple of real time, unset = burst)
+            import asyncio
+            from live import replay
+            engine = asyncio.run(replay(panel, strategies, run.get('speed'), run.get('transport', 'socket'),
+                                         initial_capital=run['initial_capital']))
+        else:
+            cost_model = None
+            if run.get('costs') is not None:
+                from costs import StandardCostModel
+                cost_model = StandardCostModel(**run['costs'])
+            rebalancer = None
+            if run.get('rebalance') is not None:
+                # schedule / drift_threshold / lot_size for target-weight strategies
+                from rebalancer import Rebalancer
+                rebalancer = Rebalancer(**run['rebalance'])
+            engine = ExecutionEngine(panel, strategies, participation_rate=run.get('participation_rate'),
+                                     cost_model=cost_model, fill_at=run.get('fill_at', 'signal'), rebalancer=rebalancer,
+                                     log_orders=run.get('log_orders', True))
+            if run.get('risk') is not None:
+                # pre-trade limits: max_position_weight / max_gross / max_net / max_var / confidence
+                from risk import RiskManager, RiskLimits
+                engine.risk_manager = RiskManager(engine.get_panel(), RiskLimits(**run['risk']))
+            engine.initalize_portfolio(run['initial_capital'])
+            engine.run()
+        return engine
+
+    def write_outputs(self, run: dict, engine, curves: dict, summary: dict):
+        import pandas as pd
+
+        out_dir = os.path.join(run['output_dir'], run['name'])
+        os.makedirs(out_dir, exist_ok=True)
+        orders = [o for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders]
+        pd.DataFrame([{'timestamp': o.timestamp, 'strategy': o.strategy, 'symbol': o.symbol, 'action': o.action,
+                       'quantity': o.quantity, 'price': o.price, 'commission': o.commission, 'status': o.status} for o in orders],
+                     columns=['timestamp', 'strategy', 'symbol', 'action', 'quantity', 'price', 'commission', 'status']
+                     ).to_csv(os.path.join(out_dir, 'orders.csv'), index=False)
+        equity = pd.DataFrame(curves)
+        equity.to_csv(os.path.join(out_dir, 'equity.csv'), index_label='date')
+        with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+
+        if run.get('plot'):
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+            ax = equity.plot(title=f"{run['name']} NPV")
+            ax.figure.savefig(os.path.join(out_dir, 'equity.png'))
+            plt.close(ax.figure)
+        print(f"[{run['name']}] results written to {out_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run backtests from a TOML/YAML run config")
+    parser.add_argument('config', help="path to the run config (.toml, .yml, .yaml)")
+    parser.add_argument('--run', action='append', help="only execute the named run(s)")
+    parser.add_argument('--dry-run', action='store_true', help="validate the config and list the runs")
+    args = parser.parse_args(argv)
+
+    runs = resolve_runs(load_config(args.config), os.path.dirname(os.path.abspath(args.config)))
+    if args.run:
+        runs = [r for r in runs if r['name'] in args.run]
+    if args.dry_run:
+        for r in runs:
+            print(f"{r['name']}: {list(r['strategies'])} {r.get('start_date')} ~ {r.get('end_date')} "
+                  f"universe={r.get('universe') or 'all'} mode={r['engine_mode']}")
+        return []
+
+    runner = BacktestRunner()
+    summaries = []
+    for r in runs:
+        summaries.append(runner.run(r))
+    return summaries
+
+
+if __name__ == "__main__":
+    main()
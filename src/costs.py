@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from models import OrderAction
+
+'''
+    Transaction cost / slippage models
+    - per-order path: fill(action, price, quantity, bar) -> (fill price, commission), used by ExecutionEngine.execute_order
+    - batch path: apply(quantities, prices, volume, high, low) on arrays of any (matching) shape, e.g. a whole
+      (T x N) fill matrix from a sweep or a rebalance, with the same formula as the per-order path
+    - signed quantities: > 0 buys, < 0 sells; costs always move the fill price against the trader
+'''
+
+
+class CostModel(ABC):
+    @abstractmethod
+    def apply(self, quantities, prices, volume, high, low):
+        # returns (fill prices, commissions) with the broadcast shape of the inputs
+        pass
+
+    def fill(self, action: str, price: float, quantity: float, bar) -> tuple:
+        signed = quantity if action == OrderAction.BUY.value else -quantity
+        if bar is None:
+            fill_price, commission = self.apply(signed, price, np.nan, np.nan, np.nan)
+        else:
+            fill_price, commission = self.apply(signed, price, bar.volume, bar.high, bar.low)
+        return float(fill_price), float(commission)
+
+
+class NoCost(CostModel):
+    def apply(self, quantities, prices, volume, high, low):
+        return np.asarray(prices, dtype=float) + 0.0, np.zeros(np.shape(quantities))
+
+
+class StandardCostModel(CostModel):
+    # commission per share (with a minimum per order), half the quoted spread, and square-root market
+    # impact: impact_coef * sigma * sqrt(|q| / volume) with sigma = (high - low) / price as a daily vol proxy
+    def __init__(self, commission_per_share: float = 0.005, min_commission: float = 1.0, spread_bps: float = 5.0,
+                 impact_coef: float = 0.1):
+        self.commission_per_share = commission_per_share
+        self.min_commission = min_commission
+        self.spread_bps = spread_bps
+        self.impact_coef = impact_coef
+
+    def apply(self, quantities, prices, volume, high, low):
+        quantities = np.asarray(quantities, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        size = np.abs(quantities)
+        side = np.sign(quantities)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma = (np.asarray(high, dtype=float) - np.asarray(low, dtype=float)) / prices
+            participation = size / np.asarray(volume, dtype=float)
+            impact = self.impact_coef * sigma * np.sqrt(participation)
+        # no bar / no volume information: spread and commission only
+        impact = np.where(np.isfinite(impact), impact, 0.0)
+
+        half_spread = self.spread_bps / 2 / 1e4
+        fill_prices = prices * (1.0 + side * (half_spread + impact))
+        commissions = np.where(size > 0, np.maximum(self.min_commission, self.commission_per_share * size), 0.0)
+        return fill_prices, commissions
+
+
+def apply_to_panel(cost_model: CostModel, quantities: np.ndarray, panel, price_field: str = 'open', next_bar: bool = True):
+    # (T x N) signed fill matrix decided on bar t -> fill prices / commissions; with next_bar the fill uses bar t+1
+    # (open price, volume and range), the last row has no next bar and is returned as NaN / 0
+    prices, volume, high, low = (panel[f] for f in (price_field, 'volume', 'high', 'low'))
+    if next_bar:
+        prices, volume, high, low = (np.vstack([a[1:], np.full((1, a.shape[1]), np.nan)]) for a in (prices, volume, high, low))
+    fill_prices, commissions = cost_model.apply(quantities, prices, volume, high, low)
+    commissions = np.where(np.isnan(prices), 0.0, commissions)
+    return fill_prices, commissions
@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 from models import MarketDataPoint
+from resampler import TickResampler, bars_to_market_data
 
 # Adjust data directory to be one level above 'src'
 def load_data() -> list[MarketDataPoint]:
@@ -14,3 +15,10 @@ def load_data() -> list[MarketDataPoint]:
     ]
     return market_data_points
     
+
+def load_bars(bar_type: str = "TIME", freq: str = "1min", threshold: float = None) -> dict:
+    # resample market_data.csv ticks into OHLCV bars keyed by timestamp for ExecutionEngine
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+    df = pd.read_csv(os.path.join(data_dir, "market_data.csv"))
+    bars = TickResampler(bar_type, freq=freq, threshold=threshold).resample_frame(df)
+    return bars_to_market_data(bars)
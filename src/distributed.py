@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import pandas as pd
+
+'''
+    Distributed sweep executor on a shared-filesystem job queue (local disk for one box, NFS/SMB for many hosts)
+        <root>/pending  <root>/running  <root>/done  <root>/failed  <root>/results
+    - a job is one JSON file (strategy x params x symbol shard x date window); its id is a hash of the
+      spec, so submitting the same sweep twice never duplicates work
+    - workers claim a job by os.rename(pending/x, running/x), which only one of them can win, and keep
+      the file's mtime fresh as a lease; the coordinator puts jobs with an expired lease back to pending
+    - failed jobs are retried up to max_attempts, then parked in failed/ with the last traceback
+    - results are written as results/<id>.json through a temp file + rename, so a rerun of the same job
+      (e.g. after a lease expired on a slow worker) overwrites it with the same content
+        python src/distributed.py submit ROOT configs/sweep.toml
+        python src/distributed.py worker ROOT [--processes N]     (on every host)
+        python src/distributed.py status ROOT
+'''
+
+STATES = ('pending', 'running', 'done', 'failed')
+
+
+def job_id(spec: dict) -> str:
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _write_json(path: str, payload: dict):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(payload, f, default=str)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def make_jobs(strategy: str, param_grid: dict, symbols: list, windows: list, shard_size: int = None,
+              data_dir: str = None, initial_capital: float = 1000000.0) -> list:
+    # cartesian product of params x symbol shards x (start, end) windows
+    keys = sorted(param_grid)
+    shard_size = shard_size or len(symbols)
+    shards = [symbols[i:i + shard_size] for i in range(0, len(symbols), shard_size)]
+    jobs = []
+    for values, shard, (start_date, end_date) in itertools.product(itertools.product(*(param_grid[k] for k in keys)),
+                                                                    shards, windows):
+        spec = {'strategy': strategy, 'params': dict(zip(keys, values)), 'symbols': shard,
+                'start_date': start_date, 'end_date': end_date, 'data_dir': data_dir,
+                'initial_capital': initial_capital}
+        jobs.append({'id': job_id(spec), **spec})
+    return jobs
+
+
+def run_job(job: dict) -> dict:
+    # one backtest over the job's shard and window, heavy modules imported in the worker only
+    from cli import resolve_strategy
+    from engine import ExecutionEngine
+    from panel import PricePanel, DATA_DIR
+    from reporting import equity_curve
+
+    panel = PricePanel.from_parquet(job['symbols'], job['start_date'], job['end_date'], data_dir=job['data_dir'] or DATA_DIR)
+    name = job['strategy']
+    engine = ExecutionEngine(panel, {name: resolve_strategy(name)(**job['params'])})
+    engine.initalize_portfolio(job['initial_capital'])
+    engine.run()
+    curve = equity_curve(engine, name, job['initial_capital'])
+    returns = curve.pct_change().fillna(0.0)
+    std = returns.std()
+    return {
+        'final_npv': float(curve.iloc[-1]) if len(curve) else job['initial_capital'],
+        'total_return': float(curve.iloc[-1] / job['initial_capital'] - 1.0) if len(curve) else 0.0,
+        'sharpe': float(returns.mean() / std) if std else 0.0,
+        'orders': sum(len(book.orders) for book in engine.ticker_book.values()),
+        'equity': {str(t.date()): v for t, v in curve.items()},
+    }
+
+
+class JobQueue:
+    def __init__(self, root: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        self.root = root
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for d in (*STATES, 'results'):
+            os.makedirs(os.path.join(root, d), exist_ok=True)
+
+    def path(self, state: str, jid: str) -> str:
+        return os.path.join(self.root, state, f"{jid}.json")
+
+    def result_path(self, jid: str) -> str:
+        return os.path.join(self.root, 'results', f"{jid}.json")
+
+    def submit(self, jobs: list) -> int:
+        # idempotent: jobs already queued, running or finished are skipped
+        submitted = 0
+        for job in jobs:
+            if any(os.path.exists(self.path(s, job['id'])) for s in STATES):
+                continue
+            _write_json(self.path('pending', job['id']), {**job, 'attempts': 0})
+            submitted += 1
+        return submitted
+
+    def claim(self, worker: str):
+        for name in sorted(os.listdir(os.path.join(self.root, 'pending'))):
+            if not name.endswith('.json'):
+                continue
+            jid = name[:-5]
+            pending, running = self.path('pending', jid), self.path('running', jid)
+            try:
+                # lease starts now, stamped before the move so requeue_expired never sees a claimed job with
+                # its old queued mtime
+                os.utime(pending)
+                os.rename(pending, running)
+            except FileNotFoundError:
+                continue  # another worker won
+            job = _read_json(running)
+            if os.path.exists(self.result_path(jid)):
+                # finished by an earlier attempt whose lease had expired
+                os.replace(running, self.path('done', jid))
+                continue
+            job['worker'] = worker
+            return job
+        return None
+
+    def heartbeat(self, job: dict):
+        try:
+            os.utime(self.path('running', job['id']))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, job: dict, result: dict):
+        _write_json(self.result_path(job['id']), {'id': job['id'], **{k: job[k] for k in job if k != 'attempts'}, **result})
+        try:
+            os.replace(self.path('running', job['id']), self.path('done', job['id']))
+        except FileNotFoundError:
+            pass  # lease expired and the job was requeued; the claim of the retry sees the result
+
+    def fail(self, job: dict, error: str):
+        running = self.path('running', job['id'])
+        if not os.path.exists(running):
+            return
+        job = {**_read_json(running), 'attempts': job.get('attempts', 0) + 1, 'error': error}
+        state = 'failed' if job['attempts'] >= self.max_attempts else 'pending'
+        _write_json(self.path(state, job['id']), job)
+        os.remove(running)
+
+    def requeue_expired(self) -> int:
+        # running jobs whose lease ran out count as a failed attempt
+        now = time.time()
+        requeued = 0
+        for name in os.listdir(os.path.join(self.root, 'running')):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.root, 'running', name)
+            try:
+                expired = now - os.path.getmtime(path) > self.lease_seconds
+                job = _read_json(path) if expired else None
+            except FileNotFoundError:
+                continue
+            if expired:
+                self.fail(job, f"lease expired after {self.lease_seconds}s")
+                requeued += 1
+        return requeued
+
+    def status(self) -> dict:
+        return {s: sum(n.endswith('.json') for n in os.listdir(os.path.join(self.root, s))) for s in STATES}
+
+    def results(self) -> pd.DataFrame:
+        rows = []
+        for name in sorted(os.listdir(os.path.join(self.root, 'results'))):
+            if name.endswith('.json'):
+                row = _read_json(os.path.join(self.root, 'results', name))
+                row.pop('equity', None)
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def worker(root: str, runner=run_job, worker_id: str = None, poll: float = 1.0, exit_when_idle: bool = True,
+           lease_seconds: float = 300.0, max_attempts: int = 3) -> int:
+    # pull jobs until the queue is empty (or forever with exit_when_idle=False); returns the number of jobs run
+    queue = JobQueue(root, lease_seconds, max_attempts)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            status = queue.status()
+            if exit_when_idle and status['pending'] == 0 and status['running'] == 0:
+                return done
+            queue.requeue_expired()
+            time.sleep(poll)
+            continue
+
+        stop = threading.Event()
+
+        def keep_lease():
+            while not stop.wait(lease_seconds / 3):
+                queue.heartbeat(job)
+
+        beat = threading.Thread(target=keep_lease, daemon=True)
+        beat.start()
+        try:
+            result = runner(job)
+        except Exception:
+            stop.set()
+            print(f"[{worker_id}] job {job['id']} failed (attempt {job.get('attempts', 0) + 1})")
+            queue.fail(job, traceback.format_exc())
+        else:
+            stop.set()
+            queue.complete(job, result)
+            done += 1
+        beat.join()
+
+
+class Coordinator:
+    def __init__(self, root: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        self.queue = JobQueue(root, lease_seconds, max_attempts)
+
+    def submit(self, jobs: list) -> int:
+        return self.queue.submit(jobs)
+
+    def wait(self, poll: float = 1.0, timeout: float = None) -> dict:
+        # requeues expired leases until nothing is pending or running
+        started = time.time()
+        while True:
+            self.queue.requeue_expired()
+            status = self.queue.status()
+            if status['pending'] == 0 and status['running'] == 0:
+                return status
+            if timeout is not None and time.time() - started > timeout:
+                raise TimeoutError(f"Sweep not finished after {timeout}s: {status}")
+            time.sleep(poll)
+
+    def run_local(self, processes: int = None, runner=run_job, poll: float = 0.2) -> pd.DataFrame:
+        # several worker processes on this box against the same queue
+        ctx = multiprocessing.get_context('spawn')
+        q = self.queue
+        workers = [ctx.Process(target=worker, args=(q.root, runner), kwargs={'poll': poll, 'lease_seconds': q.lease_seconds,
+                                                                            'max_attempts': q.max_attempts})
+                   for _ in range(processes or os.cpu_count())]
+        for p in workers:
+            p.start()
+        try:
+            self.wait(poll)
+        finally:
+            for p in workers:
+                p.join()
+        return q.results()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed sweep on a shared-filesystem job queue")
+    parser.add_argument('command', choices=('submit', 'worker', 'status', 'results'))
+    parser.add_argument('root', help="queue directory (shared by every host)")
+    parser.add_argument('config', nargs='?', help="sweep config for submit (.toml/.yaml with a [sweep] table)")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes on this host")
+    parser.add_argument('--lease', type=float, default=300.0, help="lease in seconds before a silent job is retried")
+    args = parser.parse_args()
+
+    if args.command == 'submit':
+        from cli import load_config
+        sweep = load_config(args.config)['sweep']
+        jobs = make_jobs(sweep['strategy'], sweep['params'], sweep['symbols'],
+                         [tuple(w) for w in sweep['windows']], sweep.get('shard_size'), sweep.get('data_dir'),
+                         sweep.get('initial_capital', 1000000.0))
+        print(f"Submitted {JobQueue(args.root).submit(jobs)} of {len(jobs)} jobs")
+    elif args.command == 'worker':
+        if args.processes > 1:
+            procs = [multiprocessing.Process(target=worker, args=(args.root,), kwargs={'lease_seconds': args.lease})
+                     for _ in range(args.processes)]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+        else:
+            print(f"Jobs run: {worker(args.root, lease_seconds=args.lease)}")
+    elif args.command == 'status':
+        print(JobQueue(args.root).status())
+    else:
+        print(JobQueue(args.root).results().to_string(index=False))
@@ -1,13 +1,39 @@
+from bisect import bisect_right
 from typing import Dict, List
-from models import MarketDataPoint, Order, OrderStatus, OrderAction, ExecutionError, OrderError, TickerBook
-from strategies import Strategy
+import numpy as np
+from models import MarketDataPoint, Order, OrderStatus, OrderAction, OrderType, TimeInForce, ExecutionError, OrderError, TickerBook
+from strategies import Strategy, TargetWeightStrategy
+from panel import PricePanel, to_ns
+from costs import CostModel
+from rebalancer import Rebalancer
+from orderbook import OrderBook
+from metrics import RunningMetrics
+from signals import SignalBuffer
 
 
 class ExecutionEngine:
-    def __init__(self, market_data: Dict[any, List[MarketDataPoint]], strategies: dict):
-        self.ticker_book: Dict[any, TickerBook] = {} # key: timestamp, value: TickerBook
+    def __init__(self, market_data: Dict[any, List[MarketDataPoint]], strategies: dict, participation_rate: float = None,
+                 cost_model: CostModel = None, fill_at: str = 'signal', rebalancer: Rebalancer = None, risk_manager=None,
+                 log_orders: bool = True):
+        if fill_at not in ('signal', 'next_open'):
+            raise ValueError(f"fill_at must be 'signal' or 'next_open', got {fill_at}")
+        self.ticker_book: Dict[any, TickerBook] = {} # key: timestamp, value: TickerBook (orders only when backed by a panel)
         self.strategies: Dict[str, Strategy] = strategies
         self.portfolio: Dict[str, dict] = {} # key: strategy name, value: portfolio dict
+        self.participation_rate = participation_rate # max fill as a fraction of the bar's volume, None = uncapped
+        self.cost_model = cost_model # commission / spread / impact applied in execute_order, None = free fills
+        self.fill_at = fill_at # 'signal': fill at the signal price, 'next_open': fill at the symbol's next bar open
+        self.rebalancer = rebalancer or Rebalancer() # sizing for TargetWeightStrategy strategies
+        self.panel: PricePanel = None # market data when given a panel, ticks are read from its arrays
+        self.__dense: PricePanel = None # panel view of ticker-book market data, built on demand
+        self.risk_manager = risk_manager # risk.RiskManager pre-trade limit checks, None = no limits
+        self.books: Dict[str, Dict[str, OrderBook]] = {} # key: strategy name, value: {symbol: resting limit / stop orders}
+        self.pending: Dict[str, dict] = {} # key: strategy name, value: {fill timestamp: [next_open market orders]}
+        self.log_orders = log_orders # False: fills only update portfolio / metrics, nothing is kept in the ticker book
+        self.metrics: Dict[str, RunningMetrics] = {} # key: strategy name, value: online metrics, readable during a run
+        self.signal_buffer = SignalBuffer() # reused for every tick, strategies write their actionable signals into it
+        self.__bars: Dict[any, dict] = {} # key: timestamp, value: {symbol: MarketDataPoint}, built on demand
+        self.__symbol_bars: Dict[str, tuple] = None # key: symbol, value: (sorted timestamps, bars), built on demand
         self.update_ticker_book(market_data)
         self.initalize_portfolio()
     
@@ -18,31 +44,143 @@ class ExecutionEngine:
                 'capital': initial_capital,
                 'positions': {},
                 'earnings': 0.0,
+                'costs': 0.0,
+                'unfilled': 0,
             }
+            self.metrics[strategy_name] = RunningMetrics(initial_capital)
 
     def update_ticker_book(self, market_data: Dict[str, List[MarketDataPoint]]):
+        if isinstance(market_data, PricePanel) and self.panel is None and not self.ticker_book:
+            # bars are read straight from the panel's arrays, no per-day dicts of ticks
+            self.panel = market_data
+            return
+        if self.panel is not None:
+            # more data for a panel-backed engine: its ticks move into the ticker book first
+            panel, self.panel = self.panel, None
+            self.update_ticker_book(panel.to_market_data())
+        if isinstance(market_data, PricePanel):
+            market_data = market_data.to_market_data()
+        self.__dense = None
+        self.__symbol_bars = None
         for timestamp, data_points in market_data.items():
+            # the per-timestamp bar lookup was built from the ticks known so far
+            self.__bars.pop(timestamp, None)
             for data_point in data_points:
                 if timestamp not in self.ticker_book:
                     self.ticker_book[timestamp] = TickerBook(orders=[], market_data=[])
                 self.ticker_book[timestamp].market_data.append(data_point)
 
+    def drop_market_data(self, timestamp):
+        # forgets the ticks of one timestamp, its logged orders are kept
+        book = self.ticker_book.get(timestamp)
+        if book is not None:
+            if book.orders:
+                book.market_data = []
+            else:
+                del self.ticker_book[timestamp]
+        self.__bars.pop(timestamp, None)
+        self.__dense = None
+        self.__symbol_bars = None
+
+    def iter_ticks(self):
+        # (timestamp, [MarketDataPoint]) in time order, from the panel's arrays or the ticker book
+        if self.panel is not None:
+            yield from self.panel.iter_ticks()
+            return
+        for t in sorted(self.ticker_book.keys()):
+            yield t, self.ticker_book[t].market_data
+
+    def log_order(self, order):
+        book = self.ticker_book.get(order.timestamp)
+        if book is None:
+            book = self.ticker_book[order.timestamp] = TickerBook(orders=[], market_data=[])
+        book.orders.append(order)
+
     def generate_signals(self, strategy):
         signals = []
-        for t in sorted(self.ticker_book.keys()):
-            tick_list = self.ticker_book[t].market_data
+        for t, tick_list in self.iter_ticks():
             for tick in tick_list:
                 signals.append(strategy.generate_signals(tick))
         return signals
 
+    def bar(self, timestamp, symbol):
+        if self.panel is not None:
+            i = self.panel.date_index.get(to_ns(timestamp))
+            j = self.panel.symbol_index.get(symbol)
+            if i is None or j is None or not self.panel.valid[i, j]:
+                return None
+            return self.panel.tick(i, j)
+        if timestamp not in self.__bars:
+            book = self.ticker_book.get(timestamp)
+            self.__bars[timestamp] = {tick.symbol: tick for tick in book.market_data} if book else {}
+        return self.__bars[timestamp].get(symbol)
+
+    def next_bar(self, timestamp, symbol):
+        # first bar of symbol strictly after timestamp, None at the end of the data
+        if self.panel is not None:
+            j = self.panel.symbol_index.get(symbol)
+            if j is None:
+                return None
+            later = self.panel.valid[int(np.searchsorted(self.panel.calendar, to_ns(timestamp), side='right')):, j]
+            k = int(later.argmax()) if len(later) else 0
+            return self.panel.tick(len(self.panel.calendar) - len(later) + k, j) if len(later) and later[k] else None
+        if self.__symbol_bars is None:
+            symbol_bars = {}
+            for t in sorted(self.ticker_book.keys()):
+                for tick in self.ticker_book[t].market_data:
+                    timestamps, bars = symbol_bars.setdefault(tick.symbol, ([], []))
+                    timestamps.append(t)
+                    bars.append(tick)
+            self.__symbol_bars = symbol_bars
+        if symbol not in self.__symbol_bars:
+            return None
+        timestamps, bars = self.__symbol_bars[symbol]
+        i = bisect_right(timestamps, timestamp)
+        return bars[i] if i < len(bars) else None
+
+    def cap_quantity(self, order) -> tuple:
+        # (fillable quantity, unfilled remainder) at participation_rate * bar volume; the order is left as is
+        bar = self.bar(order.timestamp, order.symbol)
+        if bar is None:
+            raise ExecutionError(f"No bar for {order.symbol} at {order.timestamp} to cap participation")
+        max_quantity = int(self.participation_rate * bar.volume)
+        if max_quantity <= 0:
+            raise ExecutionError(f"No volume available for {order.symbol} at {order.timestamp} (participation {self.participation_rate})")
+        if order.quantity > max_quantity:
+            return max_quantity, order.quantity - max_quantity
+        return order.quantity, 0
+
     def execute_order(self, order, portfolio):
+        unfilled = 0
+        if self.participation_rate is not None and order.action != OrderAction.HOLD.value:
+            quantity, unfilled = self.cap_quantity(order)
+            if unfilled:
+                # the checks below decide on the capped quantity; a rejected order keeps its requested one
+                requested, order.quantity = order.quantity, quantity
+                try:
+                    return self.__fill(order, portfolio, unfilled)
+                except ExecutionError:
+                    order.quantity = requested
+                    raise
+        return self.__fill(order, portfolio, unfilled)
+
+    def __fill(self, order, portfolio, unfilled):
+        commission = 0.0
+        if self.cost_model is not None and order.action != OrderAction.HOLD.value:
+            reference_price = order.price
+            order.price, commission = self.cost_model.fill(order.action, order.price, order.quantity, self.bar(order.timestamp, order.symbol))
+            order.commission = commission
+
+        if self.risk_manager is not None and order.action != OrderAction.HOLD.value:
+            self.risk_manager.check(order, portfolio)
+
         # Update portfolio
         if order.action == OrderAction.BUY.value:
-            if portfolio['capital'] >= order.price * order.quantity:
+            if portfolio['capital'] >= order.price * order.quantity + commission:
                 if order.symbol not in portfolio['positions']:
                     portfolio['positions'][order.symbol] = {'quantity': 0, 'avg_price': 0.0}
 
-                earnings = order.price * order.quantity
+                earnings = order.price * order.quantity + commission
                 pos = portfolio['positions'][order.symbol]
                 total_cost = pos['avg_price'] * pos['quantity'] + earnings
                 pos['quantity'] += order.quantity
@@ -54,15 +192,15 @@ class ExecutionEngine:
                 order.status = OrderStatus.FILLED.value
 
                 # update ticker book
-                self.ticker_book[order.timestamp].orders.append(order)
+                self.record_fill(order)
             else:
-                raise ExecutionError(f"Not enough capital to buy {order.symbol}. Current capital: {portfolio['capital']}, Required: {order.price * order.quantity}")
+                raise ExecutionError(f"Not enough capital to buy {order.symbol}. Current capital: {portfolio['capital']}, Required: {order.price * order.quantity + commission}")
         elif order.action == OrderAction.SELL.value:
             if order.symbol in portfolio['positions']:
                 pos = portfolio['positions'][order.symbol]
                 if pos['quantity'] >= order.quantity:
                     pos['quantity'] -= order.quantity
-                    earnings = order.price * order.quantity
+                    earnings = order.price * order.quantity - commission
                     portfolio['capital'] += earnings
                     portfolio['earnings'] += earnings
                     if pos['quantity'] == 0:
@@ -72,30 +210,201 @@ class ExecutionEngine:
                     order.status = OrderStatus.FILLED.value
 
                     # update ticker book
-                    self.ticker_book[order.timestamp].orders.append(order)
+                    self.record_fill(order)
                 else:
                     raise ExecutionError(f"Not enough quantity to sell for {order.symbol}. Requested: {order.quantity}, Available: {pos['quantity']}")
             else:
                 raise ExecutionError(f"No position to sell for {order.symbol}.")
-        
+
+        if self.cost_model is not None and order.status == OrderStatus.FILLED.value:
+            portfolio['costs'] = portfolio.get('costs', 0.0) + commission + abs(order.price - reference_price) * order.quantity
+        if unfilled and order.status == OrderStatus.FILLED.value:
+            # the part over the participation cap is not carried over: logged as a cancelled order
+            portfolio['unfilled'] = portfolio.get('unfilled', 0) + unfilled
+            if self.log_orders:
+                self.log_order(Order(order.timestamp, order.symbol, unfilled, order.price, OrderStatus.CANCELLED.value,
+                                     order.action, order.strategy))
         return order
     
+    def record_fill(self, order):
+        metrics = self.metrics.get(order.strategy)
+        if metrics is not None:
+            metrics.on_fill(order.symbol, order.quantity if order.action == OrderAction.BUY.value else -order.quantity, order.price)
+        if self.log_orders:
+            self.log_order(order)
+
+    def metrics_snapshot(self) -> dict:
+        return {name: metrics.snapshot() for name, metrics in self.metrics.items()}
+
+    def get_panel(self) -> PricePanel:
+        if self.panel is not None:
+            return self.panel
+        if self.__dense is None:
+            self.__dense = PricePanel.from_market_data({t: book.market_data for t, book in self.ticker_book.items()})
+        return self.__dense
+
+    def run_target_weights(self, strategy_name: str, strategy: TargetWeightStrategy):
+        # one vectorised rebalance per scheduled bar; only the resulting trades go through execute_order
+        panel = self.get_panel()
+        portfolio = self.portfolio[strategy_name]
+        dates = panel.dates
+        # last known close per symbol for valuation, fills at the bar's close (or next open)
+        marks = panel.to_frame('close').ffill().to_numpy()
+        opens = panel['open']
+        positions = np.zeros(len(panel.symbols))
+        schedule = self.rebalancer.schedule_mask(dates)
+        metrics = self.metrics[strategy_name]
+        pending = []
+        for i in range(len(dates)):
+            # next_open trades decided on the previous rebalance bar fill on this one, before it is valued
+            self.fill_rebalance(pending, portfolio, positions)
+            pending = []
+            if schedule[i]:
+                orders = self.rebalance(i, strategy_name, strategy, panel, positions, marks[i], opens)
+                if self.fill_at == 'next_open':
+                    pending = orders
+                else:
+                    self.fill_rebalance(orders, portfolio, positions)
+            values = np.nan_to_num(positions * marks[i])
+            metrics.update(dates[i], portfolio['capital'] + values.sum(), np.abs(values).sum(), values.sum())
+
+    def rebalance(self, i: int, strategy_name: str, strategy: TargetWeightStrategy, panel: PricePanel, positions: np.ndarray,
+                  marks: np.ndarray, opens: np.ndarray) -> list:
+        # (column, order) pairs for the trades to the target weights, dated at their fill bar, not executed yet
+        portfolio = self.portfolio[strategy_name]
+        dates = panel.dates
+        prices = np.where(panel.valid[i], panel['close'][i], np.nan)
+        equity = portfolio['capital'] + np.nansum(positions * marks)
+        deltas = self.rebalancer.order_deltas(strategy.target_weights(i, panel), positions, prices, equity)
+        traded = np.nonzero(deltas)[0]
+        if len(traded) == 0:
+            return []
+        if self.fill_at == 'next_open':
+            if i + 1 >= len(dates):
+                return []
+            t, fill_prices = dates[i + 1], opens[i + 1]
+        else:
+            t, fill_prices = dates[i], prices
+        # names without a price at the fill bar (e.g. no bar on the next day) are not traded
+        priced = np.isfinite(fill_prices[traded])
+        for j in traded[~priced]:
+            print(f"Order Skipped: no price for {panel.symbols[j]} at {t}")
+        traded = traded[priced]
+        # sells first so their proceeds fund the buys
+        orders = []
+        for j in traded[np.argsort(deltas[traded] > 0, kind='stable')]:
+            action = OrderAction.BUY.value if deltas[j] > 0 else OrderAction.SELL.value
+            try:
+                orders.append((j, Order(t, panel.symbols[j], int(abs(deltas[j])), float(fill_prices[j]), OrderStatus.UNFILLED.value,
+                                        action, strategy_name)))
+            except OrderError as e:
+                print(f"Order Creation Failed: {e}")
+        return orders
+
+    def fill_rebalance(self, orders: list, portfolio: dict, positions: np.ndarray):
+        for j, order in orders:
+            try:
+                self.execute_order(order, portfolio)
+                positions[j] += order.quantity if order.action == OrderAction.BUY.value else -order.quantity
+            except ExecutionError as e:
+                print(f"Order Execution Failed: {e}")
+
     def run(self):
         self.orders = []
         for strategy_name, strategy in self.strategies.items():
             print('\n' + '='*40)
             print(f'RUNNING STRATEGY: {strategy_name.upper()}')
             print('='*40 + '\n')
-            
-            signals = self.generate_signals(strategy)
-            for signal in signals:
-                for t, action, symbol, quantity, price in signal:
-                    try:
-                        order = Order(t, symbol, quantity, price, OrderStatus.UNFILLED.value, action, strategy_name)
-                        executed_order = self.execute_order(order, self.portfolio[strategy_name])
-                        # print(f"Executed Order: {executed_order.symbol}, {executed_order.quantity}, {executed_order.price}, {executed_order.status}, {executed_order.action}")
-                        # print(f"Portfolio: {self.portfolio}")
-                    except OrderError as e:
-                        print(f"Order Creation Failed: {e}")
-                    except ExecutionError as e:
-                        print(f"Order Execution Failed: {e}")
+            if self.risk_manager is not None:
+                # every strategy replays the timeline from the start, its risk model must too
+                self.risk_manager.reset()
+
+            if isinstance(strategy, TargetWeightStrategy):
+                self.run_target_weights(strategy_name, strategy)
+                continue
+
+            # tick by tick: resting orders of the symbol are matched against the bar before the strategy sees it
+            books = self.books[strategy_name] = {}
+            pending = self.pending[strategy_name] = {}
+            portfolio = self.portfolio[strategy_name]
+            metrics = self.metrics[strategy_name]
+            buffer = self.signal_buffer
+            for t, ticks in self.iter_ticks():
+                # next_open market orders fill at this bar's open: capital, metrics and the order log all move here
+                for order in pending.pop(t, ()):
+                    self.fill_market_order(order, portfolio)
+                for tick in ticks:
+                    metrics.on_tick(tick.symbol, tick.close)
+                    book = books.get(tick.symbol)
+                    if book is not None and book.open_count:
+                        self.match_book(book, tick, portfolio)
+                    buffer.clear()
+                    strategy.write_signals(tick, buffer)
+                    for k in range(buffer.size):
+                        self.process_signal(buffer.timestamps[k], buffer.actions[k], buffer.symbols[k], buffer.quantities[k],
+                                            buffer.prices[k], buffer.specs[k], strategy_name, portfolio, books)
+                metrics.close_bar(t, portfolio['capital'])
+
+    def process_signal(self, t, action: str, symbol: str, quantity: float, price: float, spec: dict, strategy_name: str,
+                       portfolio: dict, books: dict):
+        # one buffered signal; spec: None for a market order, else {'order_type', 'limit_price', 'stop_price', 'time_in_force'}
+        if action == OrderAction.HOLD.value:
+            return
+        order_type = spec.get('order_type', OrderType.MARKET.value) if spec else OrderType.MARKET.value
+        if order_type != OrderType.MARKET.value:
+            try:
+                order = Order(t, symbol, quantity, price, OrderStatus.UNFILLED.value, action, strategy_name, order_type,
+                              limit_price=spec.get('limit_price', price) if order_type in (OrderType.LIMIT.value, OrderType.STOP_LIMIT.value) else None,
+                              stop_price=spec.get('stop_price', price) if order_type in (OrderType.STOP.value, OrderType.STOP_LIMIT.value) else None,
+                              time_in_force=spec.get('time_in_force', TimeInForce.GTC.value))
+            except OrderError as e:
+                print(f"Order Creation Failed: {e}")
+                return
+            if symbol not in books:
+                books[symbol] = OrderBook()
+            books[symbol].add(order)
+            return
+
+        if self.fill_at == 'next_open':
+            bar = self.next_bar(t, symbol)
+            if bar is None:
+                print(f"Order Skipped: no bar after {t} to fill {action} {symbol}")
+                return
+            t, price = bar.timestamp, bar.open
+        try:
+            order = Order(t, symbol, quantity, price, OrderStatus.UNFILLED.value, action, strategy_name)
+        except OrderError as e:
+            print(f"Order Creation Failed: {e}")
+            return
+        if self.fill_at == 'next_open':
+            self.pending[strategy_name].setdefault(t, []).append(order)
+            return
+        self.fill_market_order(order, portfolio)
+
+    def fill_market_order(self, order, portfolio: dict):
+        try:
+            self.execute_order(order, portfolio)
+        except ExecutionError as e:
+            print(f"Order Execution Failed: {e}")
+
+    def match_book(self, book: OrderBook, bar: MarketDataPoint, portfolio: dict):
+        # fills go through execute_order at the bar's timestamp; rejected fills and expired DAY orders are logged as CANCELLED
+        for order, fill_price in book.match(bar):
+            order.timestamp, order.price = bar.timestamp, fill_price
+            try:
+                self.execute_order(order, portfolio)
+            except ExecutionError as e:
+                print(f"Order Execution Failed: {e}")
+                order.status = OrderStatus.CANCELLED.value
+                if self.log_orders:
+                    self.log_order(order)
+        for order in book.expire(bar.timestamp):
+            order.timestamp = bar.timestamp
+            if self.log_orders:
+                self.log_order(order)
+
+    def open_orders(self, strategy_name: str) -> list:
+        # resting orders still waiting at the end of the run
+        return [entry[2] for book in self.books.get(strategy_name, {}).values()
+                for heap in (book.buy_limits, book.sell_limits, book.buy_stops, book.sell_stops)
+                for entry in heap if entry[2].status == OrderStatus.UNFILLED.value]
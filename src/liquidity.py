@@ -0,0 +1,155 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+from models import OrderAction
+from strategies import Strategy, TargetWeightStrategy
+
+'''
+    Precomputed liquidity index
+    - rolling average daily volume (adv) and dollar volume (dollar_adv) per (symbol, date), built from the
+      close/volume columns only and stored as data/liquidity.parquet next to the price files
+    - ranks use the value as of the previous date, so a screen on date t never looks at t's own volume
+    - LiquidityIndex.screen() gives the symbols that are ever top-N in a date range, so a run can load only
+      those files (PricePanel.from_parquet(top_n=...)); membership() gives the per-date (T x N) mask
+    - screen_strategy() applies the per-date rule: LiquidityScreen for tick strategies (entries only, exits
+      are always allowed), LiquidityWeights for target-weight strategies
+'''
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+LIQUIDITY_FILE = "liquidity.parquet"
+
+
+def build_liquidity(data_dir: str = DATA_DIR, window: int = 20) -> pd.DataFrame:
+    dfs = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "price_*.parquet"))):
+        try:
+            df = pd.read_parquet(path, columns=['timestamp', 'symbol', 'close', 'volume'])
+        except ValueError:
+            continue
+        if not df.empty:
+            dfs.append(df)
+    df = pd.concat(dfs, ignore_index=True).sort_values(['symbol', 'timestamp'], kind='stable')
+    df['dollar_volume'] = df['close'] * df['volume']
+    rolling = df.groupby('symbol', sort=False)[['volume', 'dollar_volume']].rolling(window, min_periods=1).mean()
+    df['adv'] = rolling['volume'].to_numpy()
+    df['dollar_adv'] = rolling['dollar_volume'].to_numpy()
+    out = df[['timestamp', 'symbol', 'adv', 'dollar_adv']].reset_index(drop=True)
+    out.to_parquet(os.path.join(data_dir, LIQUIDITY_FILE), index=False)
+    print(f"Liquidity index written for {out['symbol'].nunique()} symbols ({len(out)} rows)")
+    return out
+
+
+def load_liquidity(data_dir: str = DATA_DIR, window: int = 20) -> pd.DataFrame:
+    # rebuild when missing or older than any price file
+    path = os.path.join(data_dir, LIQUIDITY_FILE)
+    price_files = glob.glob(os.path.join(data_dir, "price_*.parquet"))
+    if not os.path.exists(path) or any(os.path.getmtime(p) > os.path.getmtime(path) for p in price_files):
+        return build_liquidity(data_dir, window)
+    return pd.read_parquet(path)
+
+
+class LiquidityIndex:
+    def __init__(self, frame: pd.DataFrame, field: str = 'dollar_adv'):
+        wide = frame.pivot(index='timestamp', columns='symbol', values=field).sort_index()
+        self.dates = wide.index
+        self.calendar = wide.index.to_numpy(dtype='datetime64[ns]').view('int64')
+        self.symbols = list(wide.columns)
+        # liquidity known before trading on each date
+        self.values = wide.shift(1).to_numpy()
+        # rank 0 = most liquid; names without history get rank N
+        filled = np.where(np.isnan(self.values), -np.inf, self.values)
+        self.ranks = np.argsort(np.argsort(-filled, axis=1, kind='stable'), axis=1)
+        self.ranks[np.isnan(self.values)] = len(self.symbols)
+
+    @classmethod
+    def load(cls, data_dir: str = DATA_DIR, field: str = 'dollar_adv', window: int = 20):
+        return cls(load_liquidity(data_dir, window), field)
+
+    def _rows(self, start_date=None, end_date=None) -> slice:
+        lo = 0 if start_date is None else int(np.searchsorted(self.calendar, pd.Timestamp(start_date).value, side='left'))
+        hi = len(self.calendar) if end_date is None else int(np.searchsorted(self.calendar, pd.Timestamp(end_date).value, side='right'))
+        return slice(lo, hi)
+
+    def top_n(self, date, n: int) -> list:
+        # top-N on the last index date <= date
+        i = int(np.searchsorted(self.calendar, pd.Timestamp(date).value, side='right')) - 1
+        if i < 0:
+            return []
+        cols = np.nonzero(self.ranks[i] < n)[0]
+        return [self.symbols[j] for j in cols[np.argsort(self.ranks[i, cols])]]
+
+    def screen(self, n: int, start_date=None, end_date=None) -> list:
+        # every symbol that is top-N on at least one date of the range
+        in_top = (self.ranks[self._rows(start_date, end_date)] < n).any(axis=0)
+        return [s for s, keep in zip(self.symbols, in_top) if keep]
+
+    def membership(self, panel, n: int) -> np.ndarray:
+        # (T x N) bool aligned with a PricePanel: symbol is top-N on that date
+        rows = np.searchsorted(self.calendar, panel.calendar, side='right') - 1
+        cols = np.array([self.symbols.index(s) if s in self.symbols else -1 for s in panel.symbols])
+        mask = np.zeros(panel.shape, dtype=bool)
+        ok_rows = rows >= 0
+        ok_cols = cols >= 0
+        mask[np.ix_(ok_rows, ok_cols)] = self.ranks[np.ix_(rows[ok_rows], cols[ok_cols])] < n
+        return mask
+
+
+class LiquidityScreen(Strategy):
+    # wraps a strategy so it only opens positions in names that are top-N by liquidity on that date; every
+    # tick still reaches it (indicators stay current) and exits of names that left the top-N go through
+    def __init__(self, strategy: Strategy, index: LiquidityIndex, n: int):
+        self.strategy = strategy
+        self.__index = index
+        self.__n = n
+        self.__members = {}  # timestamp -> set of symbols, built once per date
+
+    def __member(self, tick) -> bool:
+        members = self.__members.get(tick.timestamp)
+        if members is None:
+            members = self.__members[tick.timestamp] = set(self.__index.top_n(tick.timestamp, self.__n))
+        return tick.symbol in members
+
+    def generate_signals(self, tick) -> list:
+        signals = self.strategy.generate_signals(tick)
+        if self.__member(tick):
+            return signals
+        return [s for s in signals if s[1] != OrderAction.BUY.value]
+
+    def write_signals(self, tick, buffer):
+        start = buffer.size
+        self.strategy.write_signals(tick, buffer)
+        if self.__member(tick):
+            return
+        # drop new entries of a non-member in place, keeping the order of the remaining signals
+        k = start
+        for m in range(start, buffer.size):
+            if buffer.actions[m] == OrderAction.BUY.value:
+                continue
+            if k != m:
+                buffer.timestamps[k], buffer.actions[k], buffer.symbols[k] = buffer.timestamps[m], buffer.actions[m], buffer.symbols[m]
+                buffer.quantities[k], buffer.prices[k], buffer.specs[k] = buffer.quantities[m], buffer.prices[m], buffer.specs[m]
+            k += 1
+        buffer.size = k
+
+
+class LiquidityWeights(TargetWeightStrategy):
+    # target-weight counterpart of LiquidityScreen: the wrapped strategy sees the panel with names outside
+    # the top-N on each date marked invalid, so it only ranks / weights the screened names
+    def __init__(self, strategy: TargetWeightStrategy, index: LiquidityIndex, n: int):
+        self.strategy = strategy
+        self.__index = index
+        self.__n = n
+        self.__screened = None  # (panel, screened view of it), built once per panel
+
+    def target_weights(self, i: int, panel) -> np.ndarray:
+        if self.__screened is None or self.__screened[0] is not panel:
+            valid = panel.valid & self.__index.membership(panel, self.__n)
+            self.__screened = (panel, type(panel)(panel.calendar, panel.symbols, panel.fields, valid))
+        return self.strategy.target_weights(i, self.__screened[1])
+
+
+def screen_strategy(strategy, index: LiquidityIndex, n: int):
+    if isinstance(strategy, TargetWeightStrategy):
+        return LiquidityWeights(strategy, index, n)
+    return LiquidityScreen(strategy, index, n)
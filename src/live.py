@@ -0,0 +1,280 @@
+from abc import ABC, abstractmethod
+from collections import deque
+import asyncio
+import json
+import math
+import time
+import pandas as pd
+from engine import ExecutionEngine
+from models import MarketDataPoint, Order, OrderStatus, OrderAction, ExecutionError, OrderError
+from panel import PricePanel
+
+'''
+    Asyncio live / paper-trading mode
+    - ReplayServer streams data/ parquet (via PricePanel) or market_data.csv ticks over a local TCP
+      socket (JSON lines) or an asyncio.Queue, at a speed multiple of real time or as a burst (speed=None)
+    - LiveEngine consumes a feed, runs every strategy's write_signals per tick and routes orders
+      to a pluggable BrokerAdapter (PaperBroker fills through ExecutionEngine.execute_order)
+    - tick-to-order latency (tick received -> broker ack) and feed latency (sent -> received) are kept
+      in log-bucketed histograms for p50/p99 without storing every sample
+    - LiveEngine keeps the ticks of the last `window` bars only (enough for bar() lookups by the cost model
+      and participation cap), so a long session does not grow the ticker book beyond its order log
+'''
+
+
+class LatencyHistogram:
+    # log-spaced buckets: bucket k covers [base^k, base^(k+1)) ns, ~5% relative resolution
+    def __init__(self, base: float = 1.05):
+        self.base = base
+        self.__log_base = math.log(base)
+        self.counts = {}
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        k = int(math.log(ns) / self.__log_base) if ns > 1 else 0
+        self.counts[k] = self.counts.get(k, 0) + 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q: float) -> float:
+        # upper edge of the bucket holding the q-th percentile, in ns
+        if self.count == 0:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for k in sorted(self.counts):
+            seen += self.counts[k]
+            if seen >= target:
+                return min(self.base ** (k + 1), self.max_ns)
+        return float(self.max_ns)
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1e3 if self.count else 0.0,
+            'p50_us': self.percentile(50) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'max_us': self.max_ns / 1e3,
+        }
+
+
+def _encode(tick: MarketDataPoint, sent_ns: int) -> bytes:
+    return (json.dumps([str(tick.timestamp), tick.symbol, tick.adj_close, tick.close, tick.high, tick.low,
+                        tick.open, tick.volume, sent_ns]) + "\n").encode()
+
+
+def _decode(line: bytes):
+    ts, symbol, adj_close, close, high, low, open_, volume, sent_ns = json.loads(line)
+    return MarketDataPoint(pd.Timestamp(ts), symbol, adj_close, close, high, low, open_, volume), sent_ns
+
+
+class ReplayServer:
+    def __init__(self, market_data, speed: float = None, host: str = "127.0.0.1", port: int = 0):
+        # a PricePanel is streamed chunk by chunk at replay time instead of materialised here
+        self.panel = market_data if isinstance(market_data, PricePanel) else None
+        self.ticks = [] if self.panel is not None else [tick for t in sorted(market_data) for tick in market_data[t]]
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.__server = None
+
+    @classmethod
+    def from_csv(cls, path: str, speed: float = None, **kwargs):
+        # timestamp,symbol,price ticks: price fills every OHLC field, size 1 like the resampler
+        df = pd.read_csv(path, parse_dates=['timestamp'])
+        market_data = {}
+        for ts, symbol, price in df[['timestamp', 'symbol', 'price']].itertuples(index=False):
+            market_data.setdefault(ts, []).append(MarketDataPoint(ts, symbol, price, price, price, price, price, 1.0))
+        return cls(market_data, speed, **kwargs)
+
+    async def replay(self, emit):
+        # calls `await emit(tick)` paced by the tick timestamps / speed
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        ticks = (tick for _, row in self.panel.iter_ticks() for tick in row) if self.panel is not None else iter(self.ticks)
+        first = None
+        for i, tick in enumerate(ticks):
+            if first is None:
+                first = pd.Timestamp(tick.timestamp)
+            if self.speed:
+                delay = (pd.Timestamp(tick.timestamp) - first).total_seconds() / self.speed - (loop.time() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % 1000 == 0:
+                await asyncio.sleep(0)  # burst mode: still let the consumer run
+            await emit(tick)
+
+    async def stream_to_queue(self, queue: asyncio.Queue):
+        async def emit(tick):
+            await queue.put((tick, time.time_ns()))
+        await self.replay(emit)
+        await queue.put(None)
+
+    async def start(self):
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port)
+        self.port = self.__server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+
+    async def __handle(self, reader, writer):
+        async def emit(tick):
+            writer.write(_encode(tick, time.time_ns()))
+            if writer.transport.get_write_buffer_size() > 1 << 16:
+                await writer.drain()
+        try:
+            await self.replay(emit)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def queue_feed(queue: asyncio.Queue):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        yield item
+
+
+async def socket_feed(host: str, port: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            yield _decode(line)
+    finally:
+        writer.close()
+
+
+class BrokerAdapter(ABC):
+    @abstractmethod
+    async def submit(self, order: Order, portfolio: dict) -> Order:
+        pass
+
+
+class PaperBroker(BrokerAdapter):
+    # fills immediately at the order price using the engine's portfolio accounting
+    def __init__(self, engine: ExecutionEngine):
+        self.engine = engine
+
+    async def submit(self, order: Order, portfolio: dict) -> Order:
+        return self.engine.execute_order(order, portfolio)
+
+
+class LiveEngine(ExecutionEngine):
+    def __init__(self, strategies: dict, broker: BrokerAdapter = None, window: int = 256, **kwargs):
+        # kwargs: ExecutionEngine options (participation_rate, cost_model, risk_manager, log_orders)
+        super().__init__({}, strategies, **kwargs)
+        self.window = window # bars of ticks kept for bar() lookups
+        self.__window = deque() # timestamps of the kept bars, oldest first
+        self.broker = broker or PaperBroker(self)
+        self.latency = LatencyHistogram()       # tick received -> broker ack
+        self.feed_latency = LatencyHistogram()  # tick sent by the feed -> received
+        self.ticks_processed = 0
+        self.orders_sent = 0
+        self.rejected = 0
+        self.elapsed = 0.0
+        self.__bar_timestamp = None
+
+    def close_bar(self):
+        # running metrics see a bar once the feed moves past its timestamp
+        if self.__bar_timestamp is not None:
+            for strategy_name, metrics in self.metrics.items():
+                metrics.close_bar(self.__bar_timestamp, self.portfolio[strategy_name]['capital'])
+
+    async def on_tick(self, tick: MarketDataPoint, received_ns: int):
+        self.update_ticker_book({tick.timestamp: [tick]})
+        self.ticks_processed += 1
+        if tick.timestamp != self.__bar_timestamp:
+            self.close_bar()
+            self.__bar_timestamp = tick.timestamp
+            self.__window.append(tick.timestamp)
+            while len(self.__window) > self.window:
+                self.drop_market_data(self.__window.popleft())
+        for strategy_name, strategy in self.strategies.items():
+            self.metrics[strategy_name].on_tick(tick.symbol, tick.close)
+            buffer = self.signal_buffer
+            buffer.clear()
+            strategy.write_signals(tick, buffer)
+            for k in range(buffer.size):
+                if buffer.actions[k] == OrderAction.HOLD.value:
+                    continue
+                try:
+                    order = Order(buffer.timestamps[k], buffer.symbols[k], buffer.quantities[k], buffer.prices[k],
+                                  OrderStatus.UNFILLED.value, buffer.actions[k], strategy_name)
+                    await self.broker.submit(order, self.portfolio[strategy_name])
+                    self.orders_sent += 1
+                except (OrderError, ExecutionError):
+                    self.rejected += 1
+                self.latency.record(time.perf_counter_ns() - received_ns)
+
+    async def run_live(self, feed):
+        # feed: async iterator of (tick, sent_time_ns) from queue_feed / socket_feed
+        started = time.perf_counter()
+        async for tick, sent_ns in feed:
+            received_ns = time.perf_counter_ns()
+            self.feed_latency.record(max(time.time_ns() - sent_ns, 1))
+            await self.on_tick(tick, received_ns)
+        self.close_bar()
+        self.__bar_timestamp = None
+        self.elapsed = time.perf_counter() - started
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            'ticks': self.ticks_processed,
+            'orders': self.orders_sent,
+            'rejected': self.rejected,
+            'ticks_per_second': self.ticks_processed / self.elapsed if self.elapsed else 0.0,
+            'tick_to_order': self.latency.summary(),
+            'feed': self.feed_latency.summary(),
+            'metrics': self.metrics_snapshot(),
+        }
+
+
+async def replay(market_data, strategies: dict, speed: float = None, transport: str = "socket", broker: BrokerAdapter = None,
+                 initial_capital: float = 1000000.0) -> LiveEngine:
+    # run strategies against a local replay of market_data, over a TCP socket or an in-process queue
+    server = ReplayServer(market_data, speed)
+    engine = LiveEngine(strategies, broker)
+    engine.initalize_portfolio(initial_capital)
+    if transport == "queue":
+        queue = asyncio.Queue(maxsize=10000)
+        producer = asyncio.create_task(server.stream_to_queue(queue))
+        await engine.run_live(queue_feed(queue))
+        await producer
+    else:
+        await server.start()
+        try:
+            await engine.run_live(socket_feed(server.host, server.port))
+        finally:
+            await server.stop()
+    return engine
+
+
+if __name__ == "__main__":
+    import os
+    from BenchmarkStrategy import LongOnlyOnce
+    from strategies import RSI
+
+    csv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "market_data.csv"))
+
+    async def main():
+        server = await ReplayServer.from_csv(csv_path, speed=None).start()
+        engine = LiveEngine({'RSI': RSI(), 'LO': LongOnlyOnce()})
+        try:
+            print(await engine.run_live(socket_feed(server.host, server.port)))
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+import math
+import pandas as pd
+
+'''
+    Online performance metrics, O(1) per tick / fill / bar and strategy
+    - positions are marked as ticks arrive: a tick moves the long / short market value by
+      quantity * price change, a fill by the traded quantity at the current mark
+    - close_bar(capital) closes a bar: equity, running peak and drawdown, Welford mean / variance of bar
+      returns (Sharpe in the reporting.compute_performance convention: per bar, population std,
+      risk-free rate 0), traded notional / turnover, gross and net exposure
+    - snapshot() can be read at any time during a run; keep_history keeps the (timestamp, equity) series
+'''
+
+
+class RunningMetrics:
+    def __init__(self, initial_capital: float = 1000000.0, keep_history: bool = True):
+        self.initial_capital = initial_capital
+        self.quantities = {}  # symbol -> signed quantity
+        self.marks = {}       # symbol -> last price
+        self.long_value = 0.0
+        self.short_value = 0.0
+        self.equity = initial_capital
+        self.peak = initial_capital
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.bars = 0
+        self.fills = 0
+        self.traded_notional = 0.0
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.__n = 0          # Welford over bar returns
+        self.__mean = 0.0
+        self.__m2 = 0.0
+        self.__equity_sum = 0.0
+        self.history = [] if keep_history else None
+
+    def __move(self, quantity: float, delta: float):
+        if quantity > 0:
+            self.long_value += quantity * delta
+        else:
+            self.short_value -= quantity * delta
+
+    def on_tick(self, symbol: str, price: float):
+        quantity = self.quantities.get(symbol)
+        if quantity:
+            self.__move(quantity, price - self.marks[symbol])
+        self.marks[symbol] = price
+
+    def on_fill(self, symbol: str, signed_quantity: float, price: float):
+        mark = self.marks.setdefault(symbol, price)
+        before = self.quantities.get(symbol, 0)
+        after = before + signed_quantity
+        # take the old position out at the mark, put the new one back in
+        self.__move(before, -mark)
+        self.__move(after, mark)
+        self.quantities[symbol] = after
+        self.traded_notional += abs(signed_quantity) * price
+        self.fills += 1
+
+    def close_bar(self, timestamp, capital: float):
+        self.update(timestamp, capital + self.long_value - self.short_value, self.long_value + self.short_value,
+                    self.long_value - self.short_value)
+
+    def update(self, timestamp, equity: float, gross_value: float, net_value: float):
+        # one bar from precomputed values (e.g. a vectorised rebalancer)
+        previous = self.equity
+        self.equity = equity
+        if self.bars:
+            r = equity / previous - 1.0 if previous else 0.0
+            self.__n += 1
+            delta = r - self.__mean
+            self.__mean += delta / self.__n
+            self.__m2 += delta * (r - self.__mean)
+        self.bars += 1
+        self.__equity_sum += equity
+        self.peak = max(self.peak, equity)
+        self.drawdown = (equity - self.peak) / self.peak if self.peak else 0.0
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        self.gross_exposure = gross_value / equity if equity else 0.0
+        self.net_exposure = net_value / equity if equity else 0.0
+        if self.history is not None:
+            self.history.append((timestamp, equity))
+
+    @property
+    def volatility(self) -> float:
+        return math.sqrt(self.__m2 / self.__n) if self.__n else 0.0
+
+    @property
+    def sharpe(self) -> float:
+        std = self.volatility
+        return self.__mean / std if std else 0.0
+
+    @property
+    def turnover(self) -> float:
+        # traded notional over average equity
+        average = self.__equity_sum / self.bars if self.bars else self.initial_capital
+        return self.traded_notional / average if average else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            'equity': self.equity,
+            'total_return': self.equity / self.initial_capital - 1.0,
+            'peak': self.peak,
+            'drawdown': self.drawdown,
+            'max_drawdown': self.max_drawdown,
+            'mean_return': self.__mean,
+            'volatility': self.volatility,
+            'sharpe': self.sharpe,
+            'traded_notional': self.traded_notional,
+            'turnover': self.turnover,
+            'gross_exposure': self.gross_exposure,
+            'net_exposure': self.net_exposure,
+            'bars': self.bars,
+            'fills': self.fills,
+        }
+
+    def equity_series(self, name: str = None) -> pd.Series:
+        if not self.history:
+            return pd.Series([], dtype=float, name=name)
+        dates, values = zip(*self.history)
+        return pd.Series(values, index=pd.to_datetime(list(dates)), name=name)
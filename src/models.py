@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from enum import Enum
 import datetime
+import math
 from typing import List
 
 @dataclass(frozen=True)
@@ -12,7 +13,7 @@ class MarketDataPoint:
     high: float
     low: float
     open: float
-    volume: float
+    volume: float  # int under a precision.PrecisionPolicy with volume_dtype='int64'
 
 class OrderStatus(Enum):
     UNFILLED = "UNFILLED"
@@ -24,22 +25,47 @@ class OrderAction(Enum):
     SELL = "SELL"
     HOLD = "HOLD"
 
+class OrderType(Enum):
+    MARKET = "MARKET"
+    LIMIT = "LIMIT"
+    STOP = "STOP"
+    STOP_LIMIT = "STOP_LIMIT"
+
+class TimeInForce(Enum):
+    GTC = "GTC"   # rests until filled
+    DAY = "DAY"   # cancelled if the next bar of the symbol does not fill it
+
 class OrderError(Exception):
     pass
 
 class ExecutionError(Exception):
     pass    
 
+class RiskLimitError(ExecutionError):
+    pass
+
 class Order:
-    def __init__(self, timestamp: datetime, symbol: str, quantity: float, price: float, status: str, action: str, strategy: str):
+    def __init__(self, timestamp: datetime, symbol: str, quantity: float, price: float, status: str, action: str, strategy: str,
+                 order_type: str = OrderType.MARKET.value, limit_price: float = None, stop_price: float = None,
+                 time_in_force: str = TimeInForce.GTC.value):
         if quantity <= 0:
             raise OrderError("Quantity must be positive")
         if price <= 0:
             raise OrderError("Price must be positive")
+        if not math.isfinite(price):
+            raise OrderError("Price must be finite")
         if not symbol or not isinstance(symbol, str):
             raise OrderError("Symbol must be a non-empty string")
         if status not in [ os.value for os in OrderStatus ]:
             raise OrderError("Invalid order status")
+        if order_type not in [ ot.value for ot in OrderType ]:
+            raise OrderError("Invalid order type")
+        if time_in_force not in [ tif.value for tif in TimeInForce ]:
+            raise OrderError("Invalid time in force")
+        if order_type in (OrderType.LIMIT.value, OrderType.STOP_LIMIT.value) and not (limit_price and limit_price > 0):
+            raise OrderError("Limit price must be positive")
+        if order_type in (OrderType.STOP.value, OrderType.STOP_LIMIT.value) and not (stop_price and stop_price > 0):
+            raise OrderError("Stop price must be positive")
 
         self.timestamp = timestamp
         self.symbol = symbol
@@ -48,8 +74,16 @@ class Order:
         self.status = status
         self.action = action
         self.strategy = strategy
+        self.order_type = order_type
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.time_in_force = time_in_force
+        self.commission = 0.0  # set by the engine when the order fills under a cost model
 
     def __repr__(self):
+        if self.order_type != OrderType.MARKET.value:
+            return (f"Order(symbol={self.symbol}, quantity={self.quantity}, price={self.price}, status={self.status}, action={self.action}, "
+                    f"strategy={self.strategy}, type={self.order_type}, limit={self.limit_price}, stop={self.stop_price}, tif={self.time_in_force})")
         return f"Order(symbol={self.symbol}, quantity={self.quantity}, price={self.price}, status={self.status}, action={self.action}, strategy={self.strategy})"
 
 @dataclass
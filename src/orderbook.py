@@ -0,0 +1,110 @@
+import heapq
+import itertools
+from collections import deque
+from models import Order, OrderAction, OrderStatus, OrderType, TimeInForce
+
+'''
+    Resting limit / stop / stop-limit orders
+    - one OrderBook per (strategy, symbol) with four heaps keyed so the top is always the first order to
+      trade: buy limits (highest limit first), sell limits (lowest first), buy stops (lowest stop first),
+      sell stops (highest first); a bar only looks at heap tops, so bars that cross nothing cost O(1)
+      and every fill / trigger is one O(log n) pop
+    - matching a bar: stops trigger on high / low (stop -> market, stop-limit -> limit), then limits fill on
+      low / high; fill prices are the limit / stop level, or the open when the bar gaps through it
+    - a stop-limit filling on its trigger bar trades no better than the stop: max(limit, min(open, stop)) for
+      a sell, min(limit, max(open, stop)) for a buy; one whose limit is out of the bar's range rests as a limit
+    - orders only see bars after the one they were placed on; DAY orders are cancelled after their first bar
+    - cancellation is lazy: a cancelled order stays in its heap until it reaches the top
+'''
+
+_sequence = itertools.count()  # FIFO tie-break between orders at the same price
+# enum values looked up once, matching runs on every bar
+_UNFILLED, _BUY = OrderStatus.UNFILLED.value, OrderAction.BUY.value
+_STOP, _STOP_LIMIT, _DAY = OrderType.STOP.value, OrderType.STOP_LIMIT.value, TimeInForce.DAY.value
+
+
+class OrderBook:
+    def __init__(self):
+        self.buy_limits = []   # (-limit, seq, order)
+        self.sell_limits = []  # (limit, seq, order)
+        self.buy_stops = []    # (stop, seq, order)
+        self.sell_stops = []   # (-stop, seq, order)
+        self.day_orders = deque()  # (placed timestamp, order), in placement order
+        self.open_count = 0
+
+    def add(self, order: Order):
+        buy = order.action == _BUY
+        if order.order_type in (_STOP, _STOP_LIMIT):
+            if buy:
+                heapq.heappush(self.buy_stops, (order.stop_price, next(_sequence), order))
+            else:
+                heapq.heappush(self.sell_stops, (-order.stop_price, next(_sequence), order))
+        else:
+            self.__add_limit(order)
+        if order.time_in_force == _DAY:
+            self.day_orders.append((order.timestamp, order))
+        self.open_count += 1
+
+    def __add_limit(self, order: Order):
+        if order.action == _BUY:
+            heapq.heappush(self.buy_limits, (-order.limit_price, next(_sequence), order))
+        else:
+            heapq.heappush(self.sell_limits, (order.limit_price, next(_sequence), order))
+
+    def cancel(self, order: Order):
+        if order.status == _UNFILLED:
+            order.status = OrderStatus.CANCELLED.value
+            self.open_count -= 1
+
+    @staticmethod
+    def __pop_crossed(heap: list, crossed):
+        # pops live orders from the top while crossed(key) holds; cancelled ones are dropped on the way
+        out = []
+        while heap:
+            key, _, order = heap[0]
+            if order.status != _UNFILLED:
+                heapq.heappop(heap)
+            elif crossed(key):
+                heapq.heappop(heap)
+                out.append(order)
+            else:
+                break
+        return out
+
+    def match(self, bar) -> list:
+        # orders that trade on this bar as (order, fill price), in trigger / fill order
+        fills = []
+        o, h, l = bar.open, bar.high, bar.low
+
+        for order in self.__pop_crossed(self.buy_stops, lambda stop: h >= stop):
+            if order.order_type == _STOP:
+                fills.append((order, max(o, order.stop_price)))
+            elif l <= order.limit_price:
+                fills.append((order, min(order.limit_price, max(o, order.stop_price))))
+            else:
+                self.__add_limit(order)
+        for order in self.__pop_crossed(self.sell_stops, lambda neg_stop: l <= -neg_stop):
+            if order.order_type == _STOP:
+                fills.append((order, min(o, order.stop_price)))
+            elif h >= order.limit_price:
+                fills.append((order, max(order.limit_price, min(o, order.stop_price))))
+            else:
+                self.__add_limit(order)
+
+        for order in self.__pop_crossed(self.buy_limits, lambda neg_limit: l <= -neg_limit):
+            fills.append((order, min(o, order.limit_price)))
+        for order in self.__pop_crossed(self.sell_limits, lambda limit: h >= limit):
+            fills.append((order, max(o, order.limit_price)))
+
+        self.open_count -= len(fills)
+        return fills
+
+    def expire(self, timestamp) -> list:
+        # DAY orders placed before `timestamp` had their bar: cancel the ones still open
+        cancelled = []
+        while self.day_orders and self.day_orders[0][0] < timestamp:
+            _, order = self.day_orders.popleft()
+            if order.status == _UNFILLED:
+                self.cancel(order)
+                cancelled.append(order)
+        return cancelled
@@ -0,0 +1,224 @@
+import glob
+import os
+import numpy as np
+import pandas as pd
+from models import MarketDataPoint
+from validation import validate_universe, usable_paths
+from liquidity import LiquidityIndex
+from precision import PrecisionPolicy
+
+'''
+    Dense (T x N) price panel on a master trading calendar
+    - calendar: sorted int64 epoch-ns timestamps, union of all symbols' dates
+    - fields: one (T x N) array per OHLCV field, NaN where a symbol has no bar (float64 unless a
+      precision.PrecisionPolicy asks for float32 prices / int64 volume / memory-mapped storage)
+    - valid: (T x N) bool mask, False for missing / not-yet-listed names
+    - date_index / symbol_index give O(1) date -> row and symbol -> column lookups
+    - iter_ticks() streams MarketDataPoints in chunks of chunk_rows rows (set from the PrecisionPolicy)
+'''
+
+FIELDS = ('adj_close', 'close', 'high', 'low', 'open', 'volume')
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+
+
+def to_ns(date) -> int:
+    return pd.Timestamp(date).value
+
+
+def timestamps_ns(column) -> np.ndarray:
+    # timestamp column -> naive (UTC) int64 epoch ns
+    timestamps = pd.to_datetime(column)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    return timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+class PricePanel:
+    def __init__(self, calendar: np.ndarray, symbols: list, fields: dict, valid: np.ndarray, chunk_rows: int = None):
+        self.calendar = np.asarray(calendar, dtype='int64')
+        self.symbols = list(symbols)
+        self.fields = fields
+        self.valid = valid
+        self.chunk_rows = chunk_rows or PrecisionPolicy().chunk_rows(len(self.symbols))
+        self.date_index = {t: i for i, t in enumerate(self.calendar.tolist())}
+        self.symbol_index = {s: j for j, s in enumerate(self.symbols)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fields=FIELDS, policy: PrecisionPolicy = None):
+        # long format (timestamp, symbol, fields...) -> panel, fully vectorised
+        policy = policy or PrecisionPolicy()
+        fields = [f for f in fields if f in df.columns]
+        ts_ns = timestamps_ns(df['timestamp'])
+        calendar, rows = np.unique(ts_ns, return_inverse=True)
+        symbols, cols = np.unique(df['symbol'].to_numpy(dtype=object), return_inverse=True)
+
+        shape = (len(calendar), len(symbols))
+        valid = np.zeros(shape, dtype=bool)
+        valid[rows, cols] = True
+        arrays = {}
+        for f in fields:
+            arr = policy.allocate(shape, f)
+            arr[rows, cols] = policy.cast(df[f].to_numpy(), f)
+            arrays[f] = arr
+        return cls(calendar, [policy.symbol(s) for s in symbols.tolist()], arrays, valid, policy.chunk_rows(len(symbols)))
+
+    @classmethod
+    def from_parquet(cls, symbols: list = None, start_date=None, end_date=None, data_dir: str = DATA_DIR, fields=FIELDS,
+                     validate: bool = False, top_n: int = None, policy: PrecisionPolicy = None):
+        if top_n is not None:
+            # liquidity screen before any OHLCV is read: only names that are top-N somewhere in the range,
+            # within the requested symbols when there are any
+            screened = LiquidityIndex.load(data_dir).screen(top_n, start_date, end_date)
+            if symbols is None:
+                symbols = screened
+            else:
+                keep = {s.upper() for s in screened}
+                symbols = [s for s in symbols if s.upper() in keep]
+        if symbols is None:
+            paths = sorted(glob.glob(os.path.join(data_dir, "price_*.parquet")))
+        else:
+            paths = [os.path.join(data_dir, f"price_{s.lower()}.parquet") for s in symbols]
+        if validate:
+            # only files changed since the last manifest are re-checked; files with errors are dropped
+            paths = usable_paths(paths, validate_universe(paths, data_dir))
+        filters = []
+        if start_date is not None:
+            filters.append(('timestamp', '>=', pd.Timestamp(start_date)))
+        if end_date is not None:
+            filters.append(('timestamp', '<=', pd.Timestamp(end_date)))
+        if policy is not None and policy.memory_budget_mb is not None:
+            return cls.stream_parquet(paths, filters, data_dir, fields, policy)
+
+        dfs = []
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"Skipping {path}: file not found")
+                continue
+            try:
+                df = pd.read_parquet(path, columns=['timestamp', 'symbol', *fields], filters=filters or None)
+            except ValueError as e:
+                # e.g. empty placeholder files written when a download returned nothing
+                print(f"Skipping {path}: {str(e).splitlines()[0]}")
+                continue
+            if not df.empty:
+                dfs.append(df)
+        if not dfs:
+            raise ValueError(f"No price data found in {data_dir} for the requested symbols/dates")
+        return cls.from_frame(pd.concat(dfs, ignore_index=True), fields, policy)
+
+    @classmethod
+    def stream_parquet(cls, paths: list, filters: list, data_dir: str, fields, policy: PrecisionPolicy):
+        # two passes, one file at a time: timestamps / symbols first to size the arrays, then the fields
+        # straight into them, so peak memory is the panel (possibly memory-mapped) plus one file
+        stamps, symbols, readable = [], [], []
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"Skipping {path}: file not found")
+                continue
+            try:
+                df = pd.read_parquet(path, columns=['timestamp', 'symbol'], filters=filters or None)
+            except ValueError as e:
+                print(f"Skipping {path}: {str(e).splitlines()[0]}")
+                continue
+            if df.empty:
+                continue
+            stamps.append(np.unique(timestamps_ns(df['timestamp'])))
+            symbols.append(df['symbol'].iloc[0])
+            readable.append(path)
+        if not readable:
+            raise ValueError(f"No price data found in {data_dir} for the requested symbols/dates")
+
+        calendar = np.unique(np.concatenate(stamps))
+        symbols = sorted(set(symbols))
+        col_of = {s: j for j, s in enumerate(symbols)}
+        shape = (len(calendar), len(symbols))
+        valid = np.zeros(shape, dtype=bool)
+        arrays = {f: policy.allocate(shape, f) for f in fields}
+        for path in readable:
+            df = pd.read_parquet(path, columns=['timestamp', 'symbol', *fields], filters=filters or None)
+            rows = np.searchsorted(calendar, timestamps_ns(df['timestamp']))
+            cols = df['symbol'].map(col_of).to_numpy()
+            valid[rows, cols] = True
+            for f in fields:
+                arrays[f][rows, cols] = policy.cast(df[f].to_numpy(), f)
+        return cls(calendar, [policy.symbol(s) for s in symbols], arrays, valid, policy.chunk_rows(len(symbols)))
+
+    @classmethod
+    def from_market_data(cls, market_data: dict, fields=FIELDS):
+        # ragged {timestamp: [MarketDataPoint]} -> panel
+        records = [(tick.timestamp, tick.symbol, *(getattr(tick, f) for f in fields))
+                   for ticks in market_data.values() for tick in ticks]
+        return cls.from_frame(pd.DataFrame(records, columns=['timestamp', 'symbol', *fields]), fields)
+
+    @property
+    def shape(self):
+        return self.valid.shape
+
+    @property
+    def nbytes(self) -> int:
+        # bytes of the field arrays and mask, memory-mapped ones included
+        return sum(arr.nbytes for arr in self.fields.values()) + self.valid.nbytes
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.to_datetime(self.calendar, unit='ns')
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    def row(self, date) -> int:
+        return self.date_index[to_ns(date)]
+
+    def col(self, symbol: str) -> int:
+        return self.symbol_index[symbol]
+
+    def cols(self, symbols) -> np.ndarray:
+        return np.array([self.symbol_index[s] for s in symbols], dtype='int64')
+
+    def get(self, field: str, date, symbol: str) -> float:
+        return self.fields[field][self.row(date), self.col(symbol)]
+
+    def slice(self, start_date=None, end_date=None, symbols=None):
+        # sub-panel by date range (inclusive) and/or symbols; date slices are views
+        lo = 0 if start_date is None else int(np.searchsorted(self.calendar, to_ns(start_date), side='left'))
+        hi = len(self.calendar) if end_date is None else int(np.searchsorted(self.calendar, to_ns(end_date), side='right'))
+        cols = slice(None) if symbols is None else self.cols(symbols)
+        return PricePanel(self.calendar[lo:hi],
+                          self.symbols if symbols is None else list(symbols),
+                          {f: arr[lo:hi, cols] for f, arr in self.fields.items()},
+                          self.valid[lo:hi, cols], self.chunk_rows)
+
+    def returns(self, field: str = 'adj_close') -> np.ndarray:
+        # simple returns between consecutive calendar rows, NaN where either side is missing
+        prices = self.fields[field]
+        out = np.full(prices.shape, np.nan)
+        out[1:] = prices[1:] / prices[:-1] - 1.0
+        return out
+
+    def to_frame(self, field: str = 'adj_close') -> pd.DataFrame:
+        return pd.DataFrame(self.fields[field], index=self.dates, columns=self.symbols)
+
+    def tick(self, i: int, j: int) -> MarketDataPoint:
+        t = pd.Timestamp(int(self.calendar[i]))
+        return MarketDataPoint(t, self.symbols[j], *(self.fields[f][i, j].item() if f in self.fields else np.nan for f in FIELDS))
+
+    def iter_ticks(self):
+        # (timestamp, [MarketDataPoint]) per calendar row with at least one valid cell; the arrays (possibly
+        # memory-mapped) are read chunk_rows rows at a time, so only one chunk of ticks is ever built
+        dates = self.dates
+        for lo in range(0, len(self.calendar), self.chunk_rows):
+            hi = min(lo + self.chunk_rows, len(self.calendar))
+            rows, cols = np.nonzero(self.valid[lo:hi])
+            values = [self.fields[f][lo:hi][rows, cols].tolist() if f in self.fields else [np.nan] * len(rows) for f in FIELDS]
+            bounds = np.searchsorted(rows, np.arange(hi - lo + 1)).tolist()
+            symbols = [self.symbols[j] for j in cols.tolist()]
+            for r in range(hi - lo):
+                a, b = bounds[r], bounds[r + 1]
+                if a == b:
+                    continue
+                t = dates[lo + r]
+                yield t, [MarketDataPoint(t, symbols[k], *(v[k] for v in values)) for k in range(a, b)]
+
+    def to_market_data(self) -> dict:
+        # back to the {timestamp: [MarketDataPoint]} layout, valid cells only
+        return dict(self.iter_ticks())
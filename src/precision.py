@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+'''
+    Run-level precision / memory policy
+    - price_dtype: 'float64' (default, reference) or 'float32' for the (T x N) price arrays of a PricePanel
+    - volume_dtype: 'float64' or 'int64' (missing bars hold 0, PricePanel.valid says which cells exist)
+    - symbols are interned so every MarketDataPoint / order of a symbol shares one string
+    - memory_budget_mb: arrays that would push the panel past the budget are allocated as memory-mapped
+      files in spill_dir (unlinked right away, the OS pages them out), and PricePanel.from_parquet streams
+      file by file into the preallocated arrays instead of concatenating one big frame
+    - the engine streams ticks out of the panel in row chunks sized by chunk_rows(), so the MarketDataPoint
+      objects alive at any time stay a small share of the budget as well
+    - compare_curves / peak_rss_mb give the error against a float64 reference run and the peak RSS
+'''
+
+PRICE_DTYPES = ('float64', 'float32')
+VOLUME_DTYPES = ('float64', 'int64')
+CHUNK_ROWS = 256           # rows per tick chunk without a budget
+TICK_BYTES = 600           # rough size of one MarketDataPoint with its boxed fields
+TICK_BUDGET_SHARE = 0.05   # share of memory_budget_mb for the ticks of one chunk
+
+
+class PrecisionPolicy:
+    def __init__(self, price_dtype: str = 'float64', volume_dtype: str = 'float64', intern_symbols: bool = True,
+                 memory_budget_mb: float = None, spill_dir: str = None):
+        if price_dtype not in PRICE_DTYPES:
+            raise ValueError(f"price_dtype must be one of {PRICE_DTYPES}, got {price_dtype}")
+        if volume_dtype not in VOLUME_DTYPES:
+            raise ValueError(f"volume_dtype must be one of {VOLUME_DTYPES}, got {volume_dtype}")
+        self.price_dtype = np.dtype(price_dtype)
+        self.volume_dtype = np.dtype(volume_dtype)
+        self.intern_symbols = intern_symbols
+        self.memory_budget_mb = memory_budget_mb
+        self.spill_dir = spill_dir
+        self.allocated = 0  # bytes held in RAM by allocate()
+        self.spilled = 0    # bytes placed in memory-mapped files
+
+    def dtype(self, field: str) -> np.dtype:
+        return self.volume_dtype if field == 'volume' else self.price_dtype
+
+    def fill_value(self, field: str):
+        return 0 if self.dtype(field).kind == 'i' else np.nan
+
+    def cast(self, values, field: str) -> np.ndarray:
+        dtype = self.dtype(field)
+        values = np.asarray(values)
+        if dtype.kind == 'i' and values.dtype.kind == 'f':
+            values = np.rint(np.nan_to_num(values, nan=0.0))
+        return values.astype(dtype, copy=False)
+
+    def symbol(self, symbol: str) -> str:
+        return sys.intern(symbol) if self.intern_symbols else symbol
+
+    def chunk_rows(self, n_symbols: int) -> int:
+        # panel rows turned into ticks at once by PricePanel.iter_ticks
+        if self.memory_budget_mb is None:
+            return CHUNK_ROWS
+        budget = self.memory_budget_mb * 1024 * 1024 * TICK_BUDGET_SHARE
+        return int(min(CHUNK_ROWS, max(1, budget // (max(n_symbols, 1) * TICK_BYTES))))
+
+    def allocate(self, shape: tuple, field: str) -> np.ndarray:
+        dtype = self.dtype(field)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        budget = None if self.memory_budget_mb is None else self.memory_budget_mb * 1024 * 1024
+        if budget is not None and self.allocated + nbytes > budget:
+            fd, path = tempfile.mkstemp(suffix=f".{field}.mmap", dir=self.spill_dir)
+            os.close(fd)
+            arr = np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+            try:
+                os.unlink(path)  # the mapping stays valid until the array is released
+            except OSError:
+                pass
+            arr[:] = self.fill_value(field)
+            self.spilled += nbytes
+            return arr
+        self.allocated += nbytes
+        return np.full(shape, self.fill_value(field), dtype=dtype)
+
+
+def peak_rss_mb() -> float:
+    # peak resident set size of this process (0.0 where the resource module is unavailable)
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def compare_curves(reference: pd.Series, candidate: pd.Series) -> dict:
+    # error of a reduced-precision equity curve against the float64 reference run
+    reference, candidate = reference.align(candidate, join='outer')
+    diff = (candidate - reference).abs()
+    rel = diff / reference.abs()
+    return {
+        'max_abs_error': float(diff.max()) if len(diff) else 0.0,
+        'max_rel_error': float(rel.max()) if len(rel) else 0.0,
+        'final_rel_error': float(rel.iloc[-1]) if len(rel) else 0.0,
+    }
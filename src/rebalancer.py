@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+'''
+    Target-weight rebalancer
+    - strategies (strategies.TargetWeightStrategy) return a weight per panel symbol, the rebalancer turns
+      (target weights, current share positions, prices, equity) into integer share deltas for the whole
+      universe in one vectorised step
+    - schedule: 'daily', 'weekly' (first bar of each week), 'monthly' (first bar of each month) or every k bars
+    - drift_threshold: a name is only traded when |current weight - target weight| exceeds it (turnover control)
+'''
+
+SCHEDULES = ('daily', 'weekly', 'monthly')
+
+
+class Rebalancer:
+    def __init__(self, schedule='daily', drift_threshold: float = 0.0, lot_size: int = 1):
+        if not (schedule in SCHEDULES or (isinstance(schedule, int) and schedule > 0)):
+            raise ValueError(f"schedule must be one of {SCHEDULES} or a positive number of bars, got {schedule}")
+        self.schedule = schedule
+        self.drift_threshold = drift_threshold
+        self.lot_size = lot_size
+
+    def schedule_mask(self, dates: pd.DatetimeIndex) -> np.ndarray:
+        # True on the bars where a rebalance is allowed
+        n = len(dates)
+        if self.schedule == 'daily':
+            return np.ones(n, dtype=bool)
+        if isinstance(self.schedule, int):
+            return np.arange(n) % self.schedule == 0
+        period = dates.to_period('W' if self.schedule == 'weekly' else 'M').asi8
+        mask = np.ones(n, dtype=bool)
+        mask[1:] = period[1:] != period[:-1]
+        return mask
+
+    def order_deltas(self, target_weights: np.ndarray, positions: np.ndarray, prices: np.ndarray, equity: float) -> np.ndarray:
+        # signed share deltas (multiples of lot_size) per symbol, 0 where no trade is needed or possible
+        tradable = np.isfinite(prices) & (prices > 0)
+        safe_prices = np.where(tradable, prices, 1.0)
+        target_weights = np.nan_to_num(target_weights)
+
+        current_weights = np.where(tradable, positions * safe_prices / equity, 0.0) if equity > 0 else np.zeros_like(prices)
+        drifted = np.abs(current_weights - target_weights) > self.drift_threshold
+
+        target_shares = np.trunc(target_weights * equity / safe_prices / self.lot_size) * self.lot_size
+        deltas = np.where(tradable & drifted, target_shares - positions, 0.0)
+        return deltas
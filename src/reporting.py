@@ -2,6 +2,7 @@ from data_loader import load_data
 from strategies import macd, BollingerBandsStrategy
 from engine import ExecutionEngine
 import numpy as np
+import pandas as pd
 
 def executed_orders() -> list:
     # 1. load data
@@ -35,7 +36,7 @@ def trace_portfolio_log(orders_by_strategy, initial_capital=100000.0):
 
         for o in orders:
             if o.action == 'BUY':
-                cost = o.price * o.quantity
+                cost = o.price * o.quantity + o.commission
                 portfolio['capital'] -= cost
                 portfolio['earnings'] -= cost
                 if o.symbol not in portfolio['positions']:
@@ -46,7 +47,7 @@ def trace_portfolio_log(orders_by_strategy, initial_capital=100000.0):
                 pos['avg_price'] = total_cost / pos['quantity']
 
             elif o.action == 'SELL':
-                revenue = o.price * o.quantity
+                revenue = o.price * o.quantity - o.commission
                 portfolio['capital'] += revenue
                 portfolio['earnings'] += revenue
                 pos = portfolio['positions'][o.symbol]
@@ -65,6 +66,48 @@ def trace_portfolio_log(orders_by_strategy, initial_capital=100000.0):
     return portfolio_log
 
 
+def equity_curve(engine, strategy_name, initial_capital=1000000.0):
+    # daily NPV of one strategy: replay its filled orders (commissions included) from the ticker book and mark positions at close
+    capital = initial_capital
+    positions = {}
+    marks = {}
+    dates, values = [], []
+    for t, ticks in engine.iter_ticks():
+        book = engine.ticker_book.get(t)
+        for o in book.orders if book else []:
+            if o.strategy != strategy_name or o.status != 'FILLED':
+                continue
+            if o.action == 'BUY':
+                capital -= o.price * o.quantity + o.commission
+                positions[o.symbol] = positions.get(o.symbol, 0) + o.quantity
+            elif o.action == 'SELL':
+                capital += o.price * o.quantity - o.commission
+                positions[o.symbol] = positions.get(o.symbol, 0) - o.quantity
+        for tick in ticks:
+            marks[tick.symbol] = tick.close
+        dates.append(t)
+        values.append(capital + sum(q * marks.get(sym, 0.0) for sym, q in positions.items()))
+
+    return pd.Series(values, index=pd.to_datetime(dates), name=strategy_name)
+
+
+def performance_from_metrics(engine):
+    # compute_performance layout from the engine's online metrics, without an order log replay
+    performance = {}
+    for strategy, metrics in engine.metrics.items():
+        snapshot = metrics.snapshot()
+        values = [v for _, v in metrics.history] if metrics.history else [snapshot['equity']]
+        performance[strategy] = {
+            "Initial NPV": values[0],
+            "Final NPV": values[-1],
+            "Total Return": (values[-1] - values[0]) / values[0],
+            "Sharpe Ratio": snapshot['sharpe'],
+            "Max Drawdown": snapshot['max_drawdown'],
+            "Time Series of NPV": values,
+        }
+    return performance
+
+
 def compute_performance(portfolio_log):
     performance = {}
 
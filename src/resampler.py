@@ -0,0 +1,157 @@
+from collections import defaultdict
+from enum import Enum
+import numpy as np
+import pandas as pd
+from models import MarketDataPoint
+
+'''
+    Tick -> bar resampler
+    - online mode: feed ticks one by one, completed bars are returned as soon as they close
+    - batch mode: vectorised resampling of a whole tick DataFrame (e.g. market_data.csv)
+    - bar types: time (1min/5min/1h...), volume and dollar bars
+    - ticks without a size (timestamp,symbol,price files) count as size 1
+'''
+
+
+def _to_ns(timestamps: pd.Series) -> np.ndarray:
+    # int64 epoch nanoseconds, independent of the pandas datetime resolution
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+    return timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+class BarType(Enum):
+    TIME = "TIME"
+    VOLUME = "VOLUME"
+    DOLLAR = "DOLLAR"
+
+
+class _BarState:
+    # constant-size per-symbol state of the bar being built
+    __slots__ = ('bar_id', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'cum')
+
+    def __init__(self):
+        self.bar_id = None
+        self.timestamp = None
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+        self.cum = 0.0  # running volume / dollar total for threshold bars
+
+    def start(self, bar_id, timestamp, price, size):
+        self.bar_id = bar_id
+        self.timestamp = timestamp
+        self.open = self.high = self.low = self.close = price
+        self.volume = size
+
+    def add(self, price, size):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += size
+
+    def to_bar(self, symbol):
+        return MarketDataPoint(self.timestamp, symbol, self.close, self.close, self.high, self.low, self.open, self.volume)
+
+
+class TickResampler:
+    def __init__(self, bar_type: str = BarType.TIME.value, freq: str = "1min", threshold: float = None):
+        self.bar_type = BarType(bar_type)
+        if self.bar_type == BarType.TIME:
+            self.freq_ns = pd.Timedelta(freq).value
+            if self.freq_ns <= 0:
+                raise ValueError("Bar frequency must be positive")
+        else:
+            if threshold is None or threshold <= 0:
+                raise ValueError("Volume/dollar bars need a positive threshold")
+        self.freq = freq
+        self.threshold = threshold
+        self.__state = defaultdict(_BarState)
+
+    def on_tick(self, timestamp, symbol: str, price: float, size: float = 1.0) -> list:
+        # returns the list of bars completed by this tick (usually empty or one bar)
+        state = self.__state[symbol]
+        completed = []
+
+        if self.bar_type == BarType.TIME:
+            ts = pd.Timestamp(timestamp)
+            bar_id = ts.value // self.freq_ns
+            if state.bar_id is None:
+                state.start(bar_id, pd.Timestamp(bar_id * self.freq_ns, tz=ts.tz), price, size)
+            elif bar_id != state.bar_id:
+                completed.append(state.to_bar(symbol))
+                state.start(bar_id, pd.Timestamp(bar_id * self.freq_ns, tz=ts.tz), price, size)
+            else:
+                state.add(price, size)
+            return completed
+
+        # threshold bars: a tick belongs to bar floor(cum_before / threshold) and the bar
+        # closes on the tick that pushes the running total over the next multiple
+        amount = size if self.bar_type == BarType.VOLUME else price * size
+        bar_id = int(state.cum // self.threshold)
+        if state.bar_id is None or bar_id != state.bar_id:
+            state.start(bar_id, pd.Timestamp(timestamp), price, size)
+        else:
+            state.add(price, size)
+        state.cum += amount
+        if state.cum // self.threshold > bar_id:
+            completed.append(state.to_bar(symbol))
+            state.bar_id = None
+        return completed
+
+    def flush(self, now=None) -> list:
+        # close open bars; with `now` only time bars whose interval has ended are closed
+        completed = []
+        for symbol, state in self.__state.items():
+            if state.bar_id is None:
+                continue
+            if now is not None:
+                if self.bar_type != BarType.TIME or pd.Timestamp(now).value // self.freq_ns <= state.bar_id:
+                    continue
+            completed.append(state.to_bar(symbol))
+            state.bar_id = None
+        return completed
+
+    def resample_frame(self, df: pd.DataFrame, price_col: str = "price", size_col: str = None) -> pd.DataFrame:
+        # vectorised batch mode, same bar boundaries as the online mode
+        df = df[['timestamp', 'symbol', price_col] + ([size_col] if size_col else [])].copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.rename(columns={price_col: 'price'})
+        df['size'] = df[size_col].astype(float) if size_col else 1.0
+        df = df.sort_values(['symbol', 'timestamp'], kind='stable').reset_index(drop=True)
+        tz = df['timestamp'].dt.tz
+
+        if self.bar_type == BarType.TIME:
+            df['bar_id'] = _to_ns(df['timestamp']) // self.freq_ns
+        else:
+            amount = df['size'] if self.bar_type == BarType.VOLUME else df['price'] * df['size']
+            cum_before = amount.groupby(df['symbol']).cumsum() - amount
+            df['bar_id'] = np.floor_divide(cum_before.to_numpy(), self.threshold).astype('int64')
+
+        bars = df.groupby(['symbol', 'bar_id'], sort=False).agg(
+            timestamp=('timestamp', 'first'),
+            open=('price', 'first'),
+            high=('price', 'max'),
+            low=('price', 'min'),
+            close=('price', 'last'),
+            volume=('size', 'sum'),
+        ).reset_index()
+
+        if self.bar_type == BarType.TIME:
+            bars['timestamp'] = pd.to_datetime(bars['bar_id'] * self.freq_ns, unit='ns', utc=tz is not None)
+            if tz is not None:
+                bars['timestamp'] = bars['timestamp'].dt.tz_convert(tz)
+        bars['adj_close'] = bars['close']
+        bars = bars.drop(columns='bar_id').sort_values(['timestamp', 'symbol'], kind='stable').reset_index(drop=True)
+        return bars[['timestamp', 'symbol', 'adj_close', 'close', 'high', 'low', 'open', 'volume']]
+
+
+def bars_to_market_data(bars) -> dict:
+    # DataFrame from resample_frame or a list of bars -> {timestamp: [MarketDataPoint]} for ExecutionEngine
+    market_data_dict = defaultdict(list)
+    if isinstance(bars, pd.DataFrame):
+        bars = [MarketDataPoint(*row) for row in bars[['timestamp', 'symbol', 'adj_close', 'close', 'high', 'low', 'open', 'volume']].itertuples(index=False)]
+    for bar in bars:
+        market_data_dict[bar.timestamp].append(bar)
+    return dict(sorted(market_data_dict.items()))
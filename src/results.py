@@ -0,0 +1,204 @@
+import glob
+import json
+import os
+import time
+import uuid
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from contextlib import contextmanager
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+'''
+    Persistent result store
+    - every run writes three parquet tables under <root>/<table>/run_id=.../strategy=.../year=YYYY/:
+        orders   : timestamp, symbol, action, quantity, price, commission, status
+        positions: timestamp, symbol, quantity after the fills of that date (only dates where it changed)
+        equity   : timestamp, npv
+      rows are sorted by (symbol, timestamp) so parquet row-group statistics can skip symbols / dates
+    - <root>/catalog.parquet has one row per run (run_id, name, created, strategies, date range, order
+      count, config), so runs are picked from the catalog without touching their data; writers update it
+      holding an OS lock (flock / msvcrt) on <root>/catalog.parquet.lock, so concurrent runs (e.g.
+      distributed.py workers) never drop each other's entries; the OS releases it if a writer dies
+    - the orders table is the engine's order log: engines run with log_orders=False cannot be stored
+    - queries only open the partitions of the selected runs and push strategy / symbol / action / date
+      filters down to pyarrow.dataset
+'''
+
+TABLES = ('orders', 'positions', 'equity')
+CATALOG = "catalog.parquet"
+PARTITIONING = ds.partitioning(pa.schema([('run_id', pa.string()), ('strategy', pa.string()), ('year', pa.int32())]),
+                               flavor='hive')
+
+
+def _frames(engine, curves: dict) -> dict:
+    # orders / positions / equity of every strategy of a finished engine, long format
+    orders = [o for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders]
+    orders = pd.DataFrame([(o.timestamp, o.strategy, o.symbol, o.action, float(o.quantity), float(o.price), float(o.commission),
+                            o.status) for o in orders],
+                          columns=['timestamp', 'strategy', 'symbol', 'action', 'quantity', 'price', 'commission', 'status'])
+    orders['timestamp'] = pd.to_datetime(orders['timestamp'])
+
+    filled = orders[orders['status'] == 'FILLED']
+    signed = filled['quantity'].where(filled['action'] == 'BUY', -filled['quantity'])
+    positions = (signed.groupby([filled['strategy'], filled['symbol'], filled['timestamp']]).sum()
+                 .groupby(level=['strategy', 'symbol']).cumsum().rename('quantity').reset_index())
+
+    equity = pd.concat([pd.DataFrame({'timestamp': pd.to_datetime(curve.index), 'strategy': name, 'npv': curve.to_numpy()})
+                        for name, curve in curves.items()], ignore_index=True) if curves else \
+        pd.DataFrame(columns=['timestamp', 'strategy', 'npv'])
+    return {'orders': orders, 'positions': positions, 'equity': equity}
+
+
+class ResultStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def catalog(self) -> pd.DataFrame:
+        path = os.path.join(self.root, CATALOG)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=['run_id', 'name', 'created', 'strategies', 'start', 'end', 'orders', 'config'])
+        return pd.read_parquet(path)
+
+    def runs(self, name: str = None, strategy: str = None, since=None, until=None) -> list:
+        # run ids from the catalog only
+        cat = self.catalog()
+        mask = pd.Series(True, index=cat.index)
+        if name is not None:
+            mask &= cat['name'] == name
+        if strategy is not None:
+            mask &= cat['strategies'].map(lambda s: strategy in json.loads(s))
+        if since is not None:
+            mask &= cat['created'] >= pd.Timestamp(since)
+        if until is not None:
+            mask &= cat['created'] <= pd.Timestamp(until)
+        return cat.loc[mask, 'run_id'].tolist()
+
+    def write_run(self, engine, curves: dict, name: str, config: dict = None, run_id: str = None) -> str:
+        if not engine.log_orders:
+            raise ValueError(f"Run {name}: the engine kept no order log (log_orders=False), nothing to store")
+        created = pd.Timestamp.now()
+        run_id = run_id or f"{name}-{created:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        frames = _frames(engine, curves)
+        for table, df in frames.items():
+            if df.empty:
+                continue
+            keys = ['strategy', 'symbol', 'timestamp'] if 'symbol' in df.columns else ['strategy', 'timestamp']
+            df = df.sort_values(keys, kind='stable').reset_index(drop=True)
+            df['run_id'] = run_id
+            df['year'] = df['timestamp'].dt.year.astype('int32')
+            ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), os.path.join(self.root, table),
+                             format='parquet', partitioning=PARTITIONING, basename_template=f"{run_id}-{{i}}.parquet",
+                             existing_data_behavior='overwrite_or_ignore')
+
+        orders = frames['orders']
+        entry = pd.DataFrame([{
+            'run_id': run_id, 'name': name, 'created': created,
+            'strategies': json.dumps(sorted(engine.strategies)),
+            'start': orders['timestamp'].min() if len(orders) else pd.NaT,
+            'end': orders['timestamp'].max() if len(orders) else pd.NaT,
+            'orders': len(orders), 'config': json.dumps(config or {}, default=str),
+        }])
+        # catalog is rewritten through a temp file so readers never see a partial index
+        with self.catalog_lock():
+            catalog = self.catalog()
+            catalog = pd.concat([catalog, entry], ignore_index=True) if len(catalog) else entry
+            path = os.path.join(self.root, CATALOG)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            catalog.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        return run_id
+
+    @contextmanager
+    def catalog_lock(self, timeout: float = 60.0, poll: float = 0.02):
+        # the lock file itself stays; holding the lock is the OS lock on it, taken without blocking and polled
+        path = os.path.join(self.root, CATALOG + ".lock")
+        fd = os.open(path, os.O_CREAT | os.O_RDWR)
+        started = time.time()
+        try:
+            while True:
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if time.time() - started > timeout:
+                        raise TimeoutError(f"Catalog lock {path} held for more than {timeout}s")
+                    time.sleep(poll)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def dataset(self, table: str, runs: list = None) -> ds.Dataset:
+        # with runs, only those runs' files are listed (no discovery over the whole store)
+        base = os.path.join(self.root, table)
+        if runs is None:
+            return ds.dataset(base, format='parquet', partitioning=PARTITIONING)
+        files = [f for r in runs for f in glob.glob(os.path.join(base, f"run_id={r}", "**", "*.parquet"), recursive=True)]
+        return ds.dataset(files, format='parquet', partitioning=PARTITIONING, partition_base_dir=base)
+
+    def query(self, table: str, runs: list = None, strategies: list = None, symbols: list = None, actions: list = None,
+              start_date=None, end_date=None, columns: list = None) -> pd.DataFrame:
+        if table not in TABLES:
+            raise ValueError(f"Unknown table {table}, choose from {TABLES}")
+        if runs is not None and len(runs) == 0:
+            return pd.DataFrame(columns=columns)
+        if not os.path.isdir(os.path.join(self.root, table)):
+            return pd.DataFrame(columns=columns)
+        dataset = self.dataset(table, runs)
+
+        conditions = []
+        if strategies is not None:
+            conditions.append(ds.field('strategy').isin(list(strategies)))
+        if symbols is not None:
+            conditions.append(ds.field('symbol').isin(list(symbols)))
+        if actions is not None:
+            conditions.append(ds.field('action').isin(list(actions)))
+        if start_date is not None:
+            start_date = pd.Timestamp(start_date)
+            conditions.append(ds.field('year') >= start_date.year)
+            conditions.append(ds.field('timestamp') >= start_date)
+        if end_date is not None:
+            end_date = pd.Timestamp(end_date)
+            conditions.append(ds.field('year') <= end_date.year)
+            conditions.append(ds.field('timestamp') <= end_date)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+        if 'year' in df.columns:
+            df = df.drop(columns='year')
+        return df
+
+    def orders(self, **filters) -> pd.DataFrame:
+        return self.query('orders', **filters)
+
+    def positions(self, **filters) -> pd.DataFrame:
+        return self.query('positions', **filters)
+
+    def equity(self, **filters) -> pd.DataFrame:
+        return self.query('equity', **filters)
+
+
+if __name__ == "__main__":
+    import sys
+
+    store = ResultStore(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "results"))
+    started = time.perf_counter()
+    print(store.catalog()[['run_id', 'name', 'created', 'strategies', 'orders']].to_string(index=False))
+    print(f"{time.perf_counter() - started:.3f}s")
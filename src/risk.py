@@ -0,0 +1,231 @@
+from dataclasses import dataclass
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from models import OrderAction, RiskLimitError
+
+'''
+    Incremental portfolio risk
+    - CovarianceModel keeps the covariance of daily returns across the whole universe and is updated one
+      return row at a time: EWMA (RiskMetrics, zero mean, `halflife` in bars) or an equal-weighted rolling
+      window kept as a ring buffer with running sums, O(N^2) per bar instead of a full recompute
+    - the same ring buffer holds the last `window` return rows for historical VaR / ES of today's weights
+    - RiskManager walks a PricePanel forward as orders arrive and gives volatility, parametric and historical
+      VaR / ES, beta against a benchmark and gross / net / sector exposure; with RiskLimits it is the
+      pre-trade check of ExecutionEngine(risk_manager=...) and raises RiskLimitError on a breach
+    - risk_report() gives the same metrics per bar for one strategy of a finished run
+    - VaR / ES are positive fractions of equity over one bar, missing returns count as 0
+'''
+
+
+class CovarianceModel:
+    def __init__(self, n: int, halflife: float = None, window: int = 60):
+        self.n = n
+        self.window = window
+        self.decay = 0.5 ** (1.0 / halflife) if halflife else None
+        self.history = np.zeros((window, n))  # last `window` return rows, ring buffer
+        self.count = 0
+        self.__cov = np.zeros((n, n))         # EWMA covariance
+        self.__sum = np.zeros(n)              # rolling sums
+        self.__sum_outer = np.zeros((n, n))
+
+    def update(self, returns: np.ndarray):
+        r = np.nan_to_num(returns)
+        k = self.count % self.window
+        old = self.history[k].copy()
+        self.history[k] = r
+        self.count += 1
+        if self.decay is not None:
+            self.__cov *= self.decay
+            self.__cov += (1.0 - self.decay) * np.outer(r, r)
+        elif k == self.window - 1:
+            # full window: resum once per cycle so the running sums do not drift
+            self.__sum = self.history.sum(axis=0)
+            self.__sum_outer = self.history.T @ self.history
+        else:
+            self.__sum += r - old
+            self.__sum_outer += np.outer(r, r) - np.outer(old, old)
+
+    def scenarios(self) -> np.ndarray:
+        # stored return rows (at most `window`)
+        return self.history[:min(self.count, self.window)]
+
+    def covariance(self) -> np.ndarray:
+        if self.decay is not None:
+            return self.__cov
+        m = min(self.count, self.window)
+        if m < 2:
+            return np.zeros((self.n, self.n))
+        mean = self.__sum / m
+        return (self.__sum_outer - m * np.outer(mean, mean)) / (m - 1)
+
+
+def portfolio_vol(weights: np.ndarray, cov: np.ndarray) -> float:
+    return float(np.sqrt(max(weights @ cov @ weights, 0.0)))
+
+
+def parametric_var(weights: np.ndarray, cov: np.ndarray, confidence: float = 0.99) -> float:
+    return NormalDist().inv_cdf(confidence) * portfolio_vol(weights, cov)
+
+
+def parametric_es(weights: np.ndarray, cov: np.ndarray, confidence: float = 0.99) -> float:
+    z = NormalDist().inv_cdf(confidence)
+    return NormalDist().pdf(z) / (1.0 - confidence) * portfolio_vol(weights, cov)
+
+
+def historical_var(pnl: np.ndarray, confidence: float = 0.99) -> float:
+    if len(pnl) == 0:
+        return 0.0
+    return float(max(0.0, -np.quantile(pnl, 1.0 - confidence)))
+
+
+def historical_es(pnl: np.ndarray, confidence: float = 0.99) -> float:
+    if len(pnl) == 0:
+        return 0.0
+    var = historical_var(pnl, confidence)
+    tail = pnl[pnl <= -var]
+    return float(max(0.0, -tail.mean())) if len(tail) else var
+
+
+def beta(weights: np.ndarray, cov: np.ndarray, benchmark_weights: np.ndarray) -> float:
+    benchmark_var = benchmark_weights @ cov @ benchmark_weights
+    return float(weights @ cov @ benchmark_weights / benchmark_var) if benchmark_var > 0 else 0.0
+
+
+def exposure(weights: np.ndarray, symbols: list = None, sectors: dict = None) -> dict:
+    # gross / net / long / short as fractions of equity, plus net weight per sector when a mapping is given
+    out = {
+        'gross': float(np.abs(weights).sum()),
+        'net': float(weights.sum()),
+        'long': float(weights[weights > 0].sum()),
+        'short': float(np.abs(weights[weights < 0]).sum()),
+    }
+    if sectors:
+        labels = np.array([sectors.get(s, 'Unknown') for s in symbols])
+        for sector in np.unique(labels[weights != 0]):
+            out[f'sector_{sector}'] = float(weights[labels == sector].sum())
+    return out
+
+
+@dataclass
+class RiskLimits:
+    max_position_weight: float = None  # |position value| / equity per symbol
+    max_gross: float = None            # sum |position value| / equity
+    max_net: float = None              # |sum position value| / equity
+    max_var: float = None              # parametric one-bar VaR as a fraction of equity
+    confidence: float = 0.99
+
+
+class RiskManager:
+    def __init__(self, panel, limits: RiskLimits = None, halflife: float = None, window: int = 60,
+                 benchmark: str = None, sectors: dict = None):
+        self.panel = panel
+        self.limits = limits or RiskLimits()
+        self.sectors = sectors
+        self.halflife = halflife
+        self.window = window
+        self.model = CovarianceModel(len(panel.symbols), halflife, window)
+        self.__returns = panel.returns('adj_close')
+        self.__marks = panel.to_frame('close').ffill().fillna(0.0).to_numpy()
+        # benchmark: one panel symbol (e.g. SPY) or the equal-weighted universe
+        self.benchmark_weights = np.zeros(len(panel.symbols))
+        if benchmark in panel.symbol_index:
+            self.benchmark_weights[panel.col(benchmark)] = 1.0
+        else:
+            self.benchmark_weights[:] = 1.0 / len(panel.symbols)
+        self.__next_row = 0
+
+    def reset(self):
+        # empty model, e.g. before the next strategy of a sequential run replays the timeline
+        self.model = CovarianceModel(len(self.panel.symbols), self.halflife, self.window)
+        self.__next_row = 0
+
+    def advance(self, i: int):
+        # feed return rows up to and including bar i, already fed rows are skipped; a bar before the
+        # last one fed starts over, so the model never holds returns after bar i
+        if i < self.__next_row - 1:
+            self.reset()
+        while self.__next_row <= i:
+            self.model.update(self.__returns[self.__next_row])
+            self.__next_row += 1
+
+    def positions_vector(self, positions: dict) -> np.ndarray:
+        # engine portfolio['positions'] -> share vector in panel symbol order
+        vector = np.zeros(len(self.panel.symbols))
+        for symbol, pos in positions.items():
+            j = self.panel.symbol_index.get(symbol)
+            if j is not None:
+                vector[j] = pos['quantity']
+        return vector
+
+    def weights(self, i: int, shares: np.ndarray, capital: float) -> np.ndarray:
+        values = shares * self.__marks[i]
+        equity = capital + values.sum()
+        return values / equity if equity > 0 else np.zeros_like(values)
+
+    def snapshot(self, i: int, shares: np.ndarray, capital: float) -> dict:
+        self.advance(i)
+        w = self.weights(i, shares, capital)
+        cov = self.model.covariance()
+        pnl = self.model.scenarios() @ w
+        c = self.limits.confidence
+        metrics = {
+            'volatility': portfolio_vol(w, cov),
+            'var': parametric_var(w, cov, c),
+            'es': parametric_es(w, cov, c),
+            'historical_var': historical_var(pnl, c),
+            'historical_es': historical_es(pnl, c),
+            'beta': beta(w, cov, self.benchmark_weights),
+        }
+        metrics.update(exposure(w, self.panel.symbols, self.sectors))
+        return metrics
+
+    def check(self, order, portfolio: dict):
+        # raises RiskLimitError if the order would breach a limit; trades that reduce the breached measure pass
+        i = self.panel.date_index.get(pd.Timestamp(order.timestamp).value)
+        if i is None:
+            return
+        self.advance(i)
+        j = self.panel.symbol_index.get(order.symbol)
+        if j is None:
+            return
+        sign = 1 if order.action == OrderAction.BUY.value else -1
+        before = self.positions_vector(portfolio['positions'])
+        after = before.copy()
+        after[j] += sign * order.quantity
+        # the trade moves cash as well as the position
+        w_before = self.weights(i, before, portfolio['capital'])
+        w_after = self.weights(i, after, portfolio['capital'] - sign * order.quantity * order.price)
+        limits = self.limits
+
+        def breach(name, limit, value_before, value_after):
+            if limit is not None and value_after > limit and value_after > value_before:
+                raise RiskLimitError(f"{name} limit breached by {order.action} {order.quantity} {order.symbol} "
+                                     f"at {order.timestamp}: {value_after:.4f} > {limit}")
+
+        breach('Position weight', limits.max_position_weight, abs(w_before[j]), abs(w_after[j]))
+        breach('Gross exposure', limits.max_gross, np.abs(w_before).sum(), np.abs(w_after).sum())
+        breach('Net exposure', limits.max_net, abs(w_before.sum()), abs(w_after.sum()))
+        if limits.max_var is not None:
+            cov = self.model.covariance()
+            breach('VaR', limits.max_var, parametric_var(w_before, cov, limits.confidence),
+                   parametric_var(w_after, cov, limits.confidence))
+
+
+def risk_report(engine, strategy_name: str, initial_capital: float = 1000000.0, **risk_kwargs) -> pd.DataFrame:
+    # per-bar risk metrics of one strategy: replays its filled orders like reporting.equity_curve
+    panel = engine.get_panel()
+    manager = RiskManager(panel, **risk_kwargs)
+    shares = np.zeros(len(panel.symbols))
+    capital = initial_capital
+    rows = []
+    for i, t in enumerate(panel.dates):
+        book = engine.ticker_book.get(t)
+        for o in book.orders if book else []:
+            if o.strategy != strategy_name or o.status != 'FILLED':
+                continue
+            sign = 1 if o.action == OrderAction.BUY.value else -1
+            shares[panel.col(o.symbol)] += sign * o.quantity
+            capital -= sign * o.price * o.quantity + o.commission
+        rows.append(manager.snapshot(i, shares, capital))
+    return pd.DataFrame(rows, index=panel.dates)
@@ -0,0 +1,161 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+import pandas as pd
+
+'''
+    Monte Carlo / bootstrap robustness of strategy results
+    - block bootstrap of daily returns  -> CI for Sharpe, max drawdown and total return
+    - trade reshuffle (random order of the trade P&L list) -> drawdown distribution (total return does not
+      depend on the order of the trades, so it is not reported)
+    - randomised entry (random days in market with the same exposure) -> Sharpe p-value
+    - simulations run in NumPy batches (n_batch x T matrices) split across worker processes;
+      every batch gets its own child seed of one SeedSequence so results only depend on `seed`
+    - Sharpe uses the reporting.compute_performance convention (per period, risk-free rate 0)
+'''
+
+
+def sharpe_ratio(returns: np.ndarray) -> np.ndarray:
+    # row-wise Sharpe of a (n_sims x T) return matrix
+    std = returns.std(axis=-1)
+    mean = returns.mean(axis=-1)
+    return np.divide(mean, std, out=np.zeros_like(mean), where=std != 0)
+
+
+def max_drawdown(returns: np.ndarray) -> np.ndarray:
+    values = np.cumprod(1.0 + returns, axis=-1)
+    roll_max = np.maximum.accumulate(values, axis=-1)
+    return ((values - roll_max) / roll_max).min(axis=-1)
+
+
+def total_return(returns: np.ndarray) -> np.ndarray:
+    return np.prod(1.0 + returns, axis=-1) - 1.0
+
+
+def _summarise(samples: dict, point: dict, confidence: float) -> pd.DataFrame:
+    lo, hi = (1 - confidence) / 2, 1 - (1 - confidence) / 2
+    rows = {}
+    for name, values in samples.items():
+        rows[name] = {
+            'Point Estimate': point[name],
+            'Mean': values.mean(),
+            'Std': values.std(),
+            f'CI Low ({confidence:.0%})': np.quantile(values, lo),
+            f'CI High ({confidence:.0%})': np.quantile(values, hi),
+        }
+    return pd.DataFrame(rows).T
+
+
+def _block_bootstrap_batch(args):
+    returns, n_sims, block_size, seed = args
+    rng = np.random.default_rng(seed)
+    T = len(returns)
+    n_blocks = -(-T // block_size)
+    # circular block bootstrap: random block starts, consecutive indices wrapped around the sample
+    starts = rng.integers(0, T, size=(n_sims, n_blocks, 1))
+    idx = ((starts + np.arange(block_size)) % T).reshape(n_sims, -1)[:, :T]
+    sims = returns[idx]
+    return sharpe_ratio(sims), max_drawdown(sims), total_return(sims)
+
+
+def _trade_reshuffle_batch(args):
+    trade_returns, n_sims, seed = args
+    rng = np.random.default_rng(seed)
+    sims = rng.permuted(np.broadcast_to(trade_returns, (n_sims, len(trade_returns))), axis=1)
+    return max_drawdown(sims)
+
+
+def _random_entry_batch(args):
+    asset_returns, n_days_in_market, n_sims, seed = args
+    rng = np.random.default_rng(seed)
+    # the n smallest of a uniform matrix per row = a random subset of n days without replacement
+    keys = rng.random((n_sims, len(asset_returns)))
+    in_market = keys <= np.partition(keys, n_days_in_market - 1, axis=1)[:, n_days_in_market - 1:n_days_in_market]
+    sims = asset_returns * in_market
+    return sharpe_ratio(sims), total_return(sims)
+
+
+class RobustnessEngine:
+    def __init__(self, n_sims: int = 10000, batch_size: int = 1000, seed: int = 42, max_workers: int = None,
+                 confidence: float = 0.95):
+        self.n_sims = n_sims
+        self.batch_size = batch_size
+        self.seed = seed
+        self.max_workers = max_workers or os.cpu_count()
+        self.confidence = confidence
+
+    def _batches(self):
+        # (batch size, child seed) pairs; seeds are fixed by self.seed regardless of worker count
+        sizes = [min(self.batch_size, self.n_sims - i) for i in range(0, self.n_sims, self.batch_size)]
+        return list(zip(sizes, np.random.SeedSequence(self.seed).spawn(len(sizes))))
+
+    def _map(self, fn, tasks):
+        if self.max_workers == 1 or len(tasks) == 1:
+            return [fn(t) for t in tasks]
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(fn, tasks))
+
+    def block_bootstrap(self, returns, block_size: int = 20) -> pd.DataFrame:
+        returns = np.asarray(returns, dtype=float)
+        tasks = [(returns, n, block_size, s) for n, s in self._batches()]
+        results = self._map(_block_bootstrap_batch, tasks)
+        samples = {
+            'Sharpe Ratio': np.concatenate([r[0] for r in results]),
+            'Max Drawdown': np.concatenate([r[1] for r in results]),
+            'Total Return': np.concatenate([r[2] for r in results]),
+        }
+        point = {
+            'Sharpe Ratio': float(sharpe_ratio(returns)),
+            'Max Drawdown': float(max_drawdown(returns)),
+            'Total Return': float(total_return(returns)),
+        }
+        return _summarise(samples, point, self.confidence)
+
+    def trade_reshuffle(self, trade_returns) -> pd.DataFrame:
+        # total return is order-independent, the drawdown path is what reshuffling tests
+        trade_returns = np.asarray(trade_returns, dtype=float)
+        tasks = [(trade_returns, n, s) for n, s in self._batches()]
+        results = self._map(_trade_reshuffle_batch, tasks)
+        samples = {'Max Drawdown': np.concatenate(results)}
+        point = {'Max Drawdown': float(max_drawdown(trade_returns))}
+        return _summarise(samples, point, self.confidence)
+
+    def random_entry(self, strategy_returns, asset_returns, in_market) -> pd.DataFrame:
+        # compare the strategy with random timing that spends the same number of days in the market
+        strategy_returns = np.asarray(strategy_returns, dtype=float)
+        asset_returns = np.asarray(asset_returns, dtype=float)
+        n_days = int(np.count_nonzero(in_market))
+        if n_days == 0:
+            raise ValueError("Strategy is never in the market")
+        tasks = [(asset_returns, n_days, n, s) for n, s in self._batches()]
+        results = self._map(_random_entry_batch, tasks)
+        samples = {
+            'Sharpe Ratio': np.concatenate([r[0] for r in results]),
+            'Total Return': np.concatenate([r[1] for r in results]),
+        }
+        point = {
+            'Sharpe Ratio': float(sharpe_ratio(strategy_returns)),
+            'Total Return': float(total_return(strategy_returns)),
+        }
+        summary = _summarise(samples, point, self.confidence)
+        # share of random-entry runs that did at least as well as the strategy
+        summary['p-value'] = [np.mean(samples[k] >= point[k]) for k in summary.index]
+        return summary
+
+
+def trade_returns_from_orders(orders) -> np.ndarray:
+    # return of every SELL fill against the average cost of the position, like the engine's avg_price;
+    # a SELL only closes what is held (long-only, as the engine), the excess has no cost basis and is ignored
+    positions = {}
+    trades = []
+    for o in orders:
+        if o.status != 'FILLED':
+            continue
+        qty, avg = positions.get(o.symbol, (0, 0.0))
+        if o.action == 'BUY':
+            positions[o.symbol] = (qty + o.quantity, (avg * qty + o.price * o.quantity) / (qty + o.quantity))
+        elif o.action == 'SELL' and qty > 0:
+            trades.append(o.price / avg - 1.0)
+            left = qty - min(o.quantity, qty)
+            positions[o.symbol] = (left, avg if left else 0.0)
+    return np.array(trades)
@@ -0,0 +1,54 @@
+'''
+    Signal buffer protocol
+    - the engine owns one SignalBuffer and clears it before every tick; Strategy.write_signals(tick, buffer)
+      appends actionable signals only, HOLD is implicit (nothing written)
+    - columns are preallocated slot lists reused across ticks (doubled when full), so the main loop does not
+      build a list of 5-tuples per tick and no Order exists before the engine decides to fill
+    - the optional spec column carries resting-order settings (see orderbook.py), None for market orders
+'''
+
+
+class SignalBuffer:
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.size = 0
+        self.timestamps = [None] * capacity
+        self.actions = [None] * capacity
+        self.symbols = [None] * capacity
+        self.quantities = [0] * capacity
+        self.prices = [0.0] * capacity
+        self.specs = [None] * capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    def clear(self):
+        self.size = 0
+
+    def append(self, timestamp, action: str, symbol: str, quantity: float, price: float, spec: dict = None):
+        k = self.size
+        if k == self.capacity:
+            self.__grow()
+        self.timestamps[k] = timestamp
+        self.actions[k] = action
+        self.symbols[k] = symbol
+        self.quantities[k] = quantity
+        self.prices[k] = price
+        self.specs[k] = spec
+        self.size = k + 1
+
+    def __grow(self):
+        extra = self.capacity
+        for column in (self.timestamps, self.actions, self.symbols, self.specs):
+            column.extend([None] * extra)
+        self.quantities.extend([0] * extra)
+        self.prices.extend([0.0] * extra)
+        self.capacity += extra
+
+    def to_list(self) -> list:
+        # tuple form for callers of Strategy.generate_signals
+        out = []
+        for k in range(self.size):
+            signal = (self.timestamps[k], self.actions[k], self.symbols[k], self.quantities[k], self.prices[k])
+            out.append(signal if self.specs[k] is None else signal + (self.specs[k],))
+        return out
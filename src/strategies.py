@@ -3,14 +3,76 @@ from models import MarketDataPoint
 from models import OrderAction
 from collections import deque, defaultdict
 import statistics
+import numpy as np
 import pandas as pd
+from signals import SignalBuffer
 
 class Strategy(ABC):
     @abstractmethod
     def generate_signals(self, tick) -> list:
         pass
 
-class Volatility(Strategy):
+    def write_signals(self, tick, buffer: SignalBuffer):
+        # buffer protocol used by the engine: actionable signals only, HOLD is implicit;
+        # by default adapted from generate_signals for strategies that only speak tuples
+        for signal in self.generate_signals(tick):
+            if signal[1] != OrderAction.HOLD.value:
+                buffer.append(*signal)
+
+class BufferedStrategy(Strategy):
+    # written against the buffer protocol; generate_signals is kept for callers of the tuple API
+    @abstractmethod
+    def write_signals(self, tick, buffer: SignalBuffer):
+        pass
+
+    def generate_signals(self, tick) -> list:
+        buffer = SignalBuffer(4)
+        self.write_signals(tick, buffer)
+        return buffer.to_list()
+
+class TargetWeightStrategy(Strategy):
+    # portfolio-level strategy: returns target weights for every panel symbol on bar i,
+    # ExecutionEngine.run_target_weights turns them into orders through a Rebalancer
+    @abstractmethod
+    def target_weights(self, i: int, panel) -> np.ndarray:
+        pass
+
+    def generate_signals(self, tick) -> list:
+        return []  # sized by the rebalancer, not tick by tick
+
+
+class EqualWeight(TargetWeightStrategy):
+    def __init__(self, gross: float = 1.0):
+        self.__gross = gross
+
+    def target_weights(self, i: int, panel) -> np.ndarray:
+        valid = panel.valid[i]
+        n = np.count_nonzero(valid)
+        return np.where(valid, self.__gross / n, 0.0) if n else np.zeros(len(valid))
+
+
+class MomentumTopN(TargetWeightStrategy):
+    # equal weight in the top_n names by trailing `lookback`-bar return
+    def __init__(self, lookback: int = 60, top_n: int = 20, gross: float = 1.0):
+        self.__lookback = lookback
+        self.__top_n = top_n
+        self.__gross = gross
+
+    def target_weights(self, i: int, panel) -> np.ndarray:
+        weights = np.zeros(len(panel.symbols))
+        if i < self.__lookback:
+            return weights
+        prices = panel['adj_close']
+        momentum = prices[i] / prices[i - self.__lookback] - 1.0
+        momentum = np.where(panel.valid[i] & ~np.isnan(momentum), momentum, -np.inf)
+        n = min(self.__top_n, np.count_nonzero(np.isfinite(momentum)))
+        if n == 0:
+            return weights
+        weights[np.argpartition(-momentum, n - 1)[:n]] = self.__gross / n
+        return weights
+
+
+class Volatility(BufferedStrategy):
     def __init__(self, k:float =0.1, atr: float = 1, equity: float = 10000, risk_pct: float = 0.01):
         self.__k=k
         self.__prior_high={str:float}
@@ -19,9 +81,8 @@ class Volatility(Strategy):
         self.__equity=equity
         self.__risk_pct=risk_pct
 
-    def generate_signals(self, tick) -> list:
+    def write_signals(self, tick, buffer: SignalBuffer):
         print(tick)
-        signals = []
 
         long_threshold = self.__prior_high.get(tick.symbol,0) + self.__k * self.__atr
         short_threshold = self.__prior_low.get(tick.symbol,0) - self.__k * self.__atr
@@ -36,15 +97,10 @@ class Volatility(Strategy):
 
         # check breakout conditions
         if tick.open >= long_threshold and quantity > 0:
-            signals.append((tick.timestamp, OrderAction.BUY.value, tick.symbol, 1, tick.open))
+            buffer.append(tick.timestamp, OrderAction.BUY.value, tick.symbol, 1, tick.open)
 
         elif tick.open <= short_threshold and quantity > 0:
-            signals.append((tick.timestamp, OrderAction.SELL.value, tick.symbol, 1, tick.open))
-
-        else:
-            signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, 1, tick.open))
-
-        return signals
+            buffer.append(tick.timestamp, OrderAction.SELL.value, tick.symbol, 1, tick.open)
 
 class MAStrategy(Strategy):  # moving average crossover
     def __init__(self, short_window: int = 20, long_window: int = 50):  # maybe? consider making qty(=100) as configurable later
@@ -88,7 +144,7 @@ class MAStrategy(Strategy):  # moving average crossover
 
         return signals        
 
-class macd(Strategy):  # moving average convergence divergence
+class macd(BufferedStrategy):  # moving average convergence divergence
     def __init__(self, short_window: int = 15, large_window: int = 30, macd_window: int = 9):
         self.__short_window = short_window
         self.__large_window = large_window
@@ -96,13 +152,11 @@ class macd(Strategy):  # moving average convergence divergence
         self.__prev = {}
         self.__prices = defaultdict(list)
 
-    def generate_signals(self, tick) -> list:
+    def write_signals(self, tick, buffer: SignalBuffer):
         self.__prices[tick.symbol].append(tick.close)
         if tick.symbol not in self.__prev:
             self.__prev[tick.symbol] = OrderAction.HOLD.value
 
-        signals = []
-
         if len(self.__prices[tick.symbol]) >= self.__large_window:
             fast_ema = self.ema(self.__prices[tick.symbol][-self.__short_window:], self.__short_window)[-1]
             slow_ema = self.ema(self.__prices[tick.symbol][-self.__large_window:], self.__large_window)[-1]
@@ -112,17 +166,13 @@ class macd(Strategy):  # moving average convergence divergence
             if macd_line > signal_line:
                 if self.__prev[tick.symbol] == OrderAction.BUY.value:
                     self.__prev[tick.symbol] = OrderAction.HOLD.value
-                    signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, 100, tick.close))
                 else:
-                    signals.append((tick.timestamp, OrderAction.BUY.value, tick.symbol, 100, tick.close))
+                    buffer.append(tick.timestamp, OrderAction.BUY.value, tick.symbol, 100, tick.close)
             else:
                 if self.__prev[tick.symbol] == OrderAction.SELL.value:
                     self.__prev[tick.symbol] = OrderAction.HOLD.value
-                    signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, 100, tick.close))
                 else:
-                    signals.append((tick.timestamp, OrderAction.SELL.value, tick.symbol, 100, tick.close))
-
-        return signals
+                    buffer.append(tick.timestamp, OrderAction.SELL.value, tick.symbol, 100, tick.close)
 
     def ema(self, prices, window) -> list:  # exponential moving average
         alpha = 2 / (window + 1)
@@ -134,7 +184,7 @@ class macd(Strategy):  # moving average convergence divergence
             prev = ema
         return v
 
-class BollingerBandsStrategy(Strategy):
+class BollingerBandsStrategy(BufferedStrategy):
     def __init__(self, window: int = 20, num_std: float = 2.0, qty: int = 100):  # maybe? consider making qty(=100) as configurable later
 
         self.__window = window
@@ -142,11 +192,9 @@ class BollingerBandsStrategy(Strategy):
         self.__qty = qty
         self.__prices = deque(maxlen=window)
 
-    def generate_signals(self, tick: MarketDataPoint) -> list:
+    def write_signals(self, tick: MarketDataPoint, buffer: SignalBuffer):
         self.__prices.append(tick.close)
 
-        signals = []
-
         if len(self.__prices) >= self.__window:
             ma = sum(self.__prices) / self.__window
             std = statistics.pstdev(self.__prices)
@@ -155,16 +203,12 @@ class BollingerBandsStrategy(Strategy):
             lower_band = ma - self.__num_std * std
 
             if tick.close < lower_band:
-                signals.append((tick.timestamp, OrderAction.BUY.value, tick.symbol, self.__qty, tick.close))
+                buffer.append(tick.timestamp, OrderAction.BUY.value, tick.symbol, self.__qty, tick.close)
             elif tick.close > upper_band:
-                signals.append((tick.timestamp, OrderAction.SELL.value, tick.symbol, self.__qty, tick.close))
-            else:
-                signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, self.__qty, tick.close))
+                buffer.append(tick.timestamp, OrderAction.SELL.value, tick.symbol, self.__qty, tick.close)
 
-        return signals
 
-
-class MACD(Strategy):
+class MACD(BufferedStrategy):
     def __init__(self, short_window: int = 12, long_window: int = 26, signal_window: int = 9, qty: int = 1):
         self.__short_window = short_window
         self.__long_window = long_window
@@ -179,7 +223,7 @@ class MACD(Strategy):
         self.__slow_ema_prev = {}
         self.__signal_ema_prev = {}
 
-    def generate_signals(self, tick):
+    def write_signals(self, tick, buffer: SignalBuffer):
         self.__prices[tick.symbol].append(tick.close)
         if tick.symbol not in self.__prev_action:
             self.__prev_action[tick.symbol] = OrderAction.HOLD.value
@@ -190,8 +234,6 @@ class MACD(Strategy):
         if tick.symbol not in self.__signal_ema_prev:
             self.__signal_ema_prev[tick.symbol] = None
 
-        signals = []
-
         if len(self.__prices[tick.symbol]) >= self.__long_window:
             # MACD line, using EMA of price
             # decide alpha : smoothing weight, typically set as '2'
@@ -215,20 +257,14 @@ class MACD(Strategy):
             # select signals
             if macd_line > self.__signal_ema_prev[tick.symbol]:
                 if self.__prev_action[tick.symbol] != OrderAction.BUY.value:  # signal must came from neutral status
-                    signals.append((tick.timestamp, OrderAction.BUY.value, tick.symbol, self.__qty, tick.close))
+                    buffer.append(tick.timestamp, OrderAction.BUY.value, tick.symbol, self.__qty, tick.close)
                     self.__prev_action[tick.symbol] = OrderAction.BUY.value
-                else:
-                    signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, self.__qty, tick.close))
             else:
                 if self.__prev_action[tick.symbol] != OrderAction.SELL.value:  # signal must came from neutral status
-                    signals.append((tick.timestamp, OrderAction.SELL.value, tick.symbol, self.__qty, tick.close))
+                    buffer.append(tick.timestamp, OrderAction.SELL.value, tick.symbol, self.__qty, tick.close)
                     self.__prev_action[tick.symbol] = OrderAction.SELL.value
-                else:
-                    signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, self.__qty, tick.close))
 
-        return signals
-
-class RSI(Strategy):
+class RSI(BufferedStrategy):
     def __init__(self, period: int = 14, oversold: int = 30, overbought: int = 70, qty: int = 1):
         self.__period = period
         self.__oversold = oversold
@@ -237,11 +273,10 @@ class RSI(Strategy):
         self.__prices = defaultdict(list)
         self.__prev_action = {}
 
-    def generate_signals(self, tick: MarketDataPoint) -> list:
+    def write_signals(self, tick: MarketDataPoint, buffer: SignalBuffer):
         self.__prices[tick.symbol].append(tick.close)
         if tick.symbol not in self.__prev_action:
             self.__prev_action[tick.symbol] = OrderAction.HOLD.value
-        signals = []
 
         if len(self.__prices[tick.symbol]) > self.__period:
             delta = [self.__prices[tick.symbol][i] - self.__prices[tick.symbol][i - 1] for i in range(1, len(self.__prices[tick.symbol]))]
@@ -257,20 +292,12 @@ class RSI(Strategy):
 
             if current_rsi < self.__oversold:
                 if self.__prev_action[tick.symbol] != OrderAction.BUY.value:
-                    signals.append((tick.timestamp, OrderAction.BUY.value, tick.symbol, self.__qty, tick.close))
+                    buffer.append(tick.timestamp, OrderAction.BUY.value, tick.symbol, self.__qty, tick.close)
                     self.__prev_action[tick.symbol] = OrderAction.BUY.value
-                else:
-                    signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, self.__qty, tick.close))
             elif current_rsi > self.__overbought:
                 if self.__prev_action[tick.symbol] != OrderAction.SELL.value:
-                    signals.append((tick.timestamp, OrderAction.SELL.value, tick.symbol, self.__qty, tick.close))
+                    buffer.append(tick.timestamp, OrderAction.SELL.value, tick.symbol, self.__qty, tick.close)
                     self.__prev_action[tick.symbol] = OrderAction.SELL.value
-                else:
-                    signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, self.__qty, tick.close))
-            else:
-                signals.append((tick.timestamp, OrderAction.HOLD.value, tick.symbol, self.__qty, tick.close))
-
-        return signals
 
     @staticmethod
     def ewm(values, period):
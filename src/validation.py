@@ -0,0 +1,156 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+'''
+    Data-quality / corporate-action validation of data/price_*.parquet
+    - all changed files are concatenated and checked in one vectorised pass (grouped by file)
+    - errors  : missing or non-positive prices (the engine would raise OrderError on them), duplicate timestamps, empty files
+    - warnings: business-day gaps, high < low / close outside [low, high], zero volume,
+                split-sized close jumps and jumps in the adj_close / close factor
+    - results go to data/manifest.json (rows, date range, size, mtime, sha256, issue counts per file);
+      later runs only re-read files whose size/mtime and hash changed
+'''
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+MANIFEST = "manifest.json"
+PRICE_COLS = ['adj_close', 'close', 'high', 'low', 'open']
+ERROR_ISSUES = ('empty_file', 'missing_price', 'nonpositive_price', 'duplicate_timestamp')
+SPLIT_RATIOS = np.array([2.0, 3.0, 4.0, 5.0, 1.5, 10.0, 20.0])
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(data_dir: str = DATA_DIR) -> dict:
+    path = os.path.join(data_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, data_dir: str = DATA_DIR):
+    path = os.path.join(data_dir, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def check_frame(df: pd.DataFrame, max_gap_days: int = 5, jump_threshold: float = 0.3, factor_threshold: float = 0.2) -> pd.DataFrame:
+    # long frame (file, timestamp, symbol, prices, volume) -> one row per file with issue counts
+    df = df.sort_values(['file', 'timestamp'], kind='stable').reset_index(drop=True)
+    same_file = df['file'].eq(df['file'].shift())
+
+    prices = df[PRICE_COLS].to_numpy(dtype=float)
+    flags = pd.DataFrame({'file': df['file']})
+    flags['missing_price'] = np.isnan(prices).any(axis=1)
+    flags['nonpositive_price'] = (prices <= 0).any(axis=1)
+    flags['duplicate_timestamp'] = same_file & df['timestamp'].eq(df['timestamp'].shift())
+    flags['ohlc_inconsistent'] = (df['high'] < df['low']) | (df['close'] > df['high'] * 1.0001) | (df['close'] < df['low'] * 0.9999)
+    flags['zero_volume'] = df['volume'].fillna(0) <= 0
+
+    days = df['timestamp'].to_numpy(dtype='datetime64[D]')
+    gap = np.zeros(len(df), dtype='int64')
+    gap[1:] = np.busday_count(days[:-1], days[1:])
+    flags['gap'] = same_file & (gap > max_gap_days)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        close_ratio = (df['close'] / df['close'].shift()).to_numpy()
+        adj_ratio = (df['adj_close'] / df['adj_close'].shift()).to_numpy()
+        factor = (df['adj_close'] / df['close']).to_numpy()
+        factor_change = np.abs(factor / np.roll(factor, 1) - 1.0)
+        # a raw jump close to a split ratio (either direction) that adj_close does not share
+        jump = np.maximum(close_ratio, 1.0 / close_ratio)
+        near_split = np.abs(jump[:, None] / SPLIT_RATIOS - 1.0).min(axis=1) < 0.05
+        adj_mismatch = np.abs(adj_ratio / close_ratio - 1.0) > factor_threshold
+    flags['split_sized_jump'] = same_file & (np.abs(close_ratio - 1.0) > jump_threshold) & near_split & adj_mismatch
+    flags['adj_factor_jump'] = same_file & (factor_change > factor_threshold)
+
+    issues = flags.groupby('file', sort=False).sum()
+    summary = df.groupby('file', sort=False).agg(symbol=('symbol', 'first'), rows=('timestamp', 'size'),
+                                                start=('timestamp', 'min'), end=('timestamp', 'max'))
+    return summary.join(issues)
+
+
+def validate_universe(paths: list = None, data_dir: str = DATA_DIR, write: bool = True, **check_kwargs) -> dict:
+    # returns the manifest {file name: entry}; unchanged files keep their previous entry without being read
+    manifest = load_manifest(data_dir)
+    if paths is None:
+        paths = sorted(glob.glob(os.path.join(data_dir, "price_*.parquet")))
+
+    to_check = []
+    changed = False
+    for path in paths:
+        name = os.path.basename(path)
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        entry = manifest.get(name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            continue
+        digest = file_hash(path)
+        if entry and entry['sha256'] == digest:
+            entry['mtime_ns'] = stat.st_mtime_ns  # touched, same content
+            changed = True
+            continue
+        manifest[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        to_check.append(path)
+
+    frames = []
+    for path in to_check:
+        name = os.path.basename(path)
+        try:
+            df = pd.read_parquet(path, columns=['timestamp', 'symbol', *PRICE_COLS, 'volume'])
+        except (ValueError, KeyError):
+            df = pd.DataFrame()
+        if df.empty:
+            manifest[name].update({'symbol': None, 'rows': 0, 'start': None, 'end': None,
+                                   'issues': {'empty_file': 1}, 'status': 'error'})
+            continue
+        df['file'] = name
+        frames.append(df)
+
+    if frames:
+        print(f"Validating {len(frames)} changed file(s)...")
+        results = check_frame(pd.concat(frames, ignore_index=True), **check_kwargs)
+        issue_cols = [c for c in results.columns if c not in ('symbol', 'rows', 'start', 'end')]
+        for name, row in results.iterrows():
+            issues = {c: int(row[c]) for c in issue_cols if row[c]}
+            status = 'error' if any(c in ERROR_ISSUES for c in issues) else 'warning' if issues else 'clean'
+            manifest[name].update({'symbol': row['symbol'], 'rows': int(row['rows']), 'start': str(row['start']),
+                                   'end': str(row['end']), 'issues': issues, 'status': status})
+
+    if write and (to_check or changed):
+        save_manifest(manifest, data_dir)
+    return manifest
+
+
+def usable_paths(paths: list, manifest: dict) -> list:
+    # drop files whose manifest entry has blocking errors
+    usable = []
+    for path in paths:
+        entry = manifest.get(os.path.basename(path))
+        if entry and entry.get('status') == 'error':
+            print(f"Skipping {os.path.basename(path)}: {entry['issues']}")
+            continue
+        usable.append(path)
+    return usable
+
+
+if __name__ == "__main__":
+    manifest = validate_universe()
+    statuses = pd.Series({k: v['status'] for k, v in manifest.items()}).value_counts()
+    print(statuses)
+    for name, entry in sorted(manifest.items()):
+        if entry['status'] != 'clean':
+            print(f"{name}: {entry['status']} {entry['issues']}")
@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from engine import ExecutionEngine
+from reporting import equity_curve
+
+'''
+    Walk-forward optimisation
+    - the timeline is split into rolling (fixed length) or expanding train windows, each followed by a test window
+    - every parameter set is backtested ONCE over the full timeline in a worker process; the daily
+      return series is cached and each fold just slices it, so overlapping train windows never
+      recompute indicators and total cost is (#param sets) runs instead of (#folds x #param sets)
+    - parameters are picked on the train slice only, the chosen set's test slice is the out-of-sample
+      result and the test slices are stitched into one OOS equity curve
+'''
+
+_MARKET_DATA = None  # read-only market data shared by the worker processes
+
+
+def _init_worker(market_data):
+    global _MARKET_DATA
+    _MARKET_DATA = market_data
+
+
+def _run_candidate(task):
+    strategy_cls, params, initial_capital = task
+    name = strategy_cls.__name__
+    engine = ExecutionEngine(_MARKET_DATA, {name: strategy_cls(**params)})
+    engine.initalize_portfolio(initial_capital)
+    engine.run()
+    return equity_curve(engine, name, initial_capital).pct_change().fillna(0.0).to_numpy()
+
+
+def sharpe(returns: np.ndarray) -> float:
+    # same convention as reporting.compute_performance (per period, risk-free rate 0)
+    std = returns.std()
+    return float(returns.mean() / std) if std != 0 else 0.0
+
+
+def total_return(returns: np.ndarray) -> float:
+    return float(np.prod(1.0 + returns) - 1.0)
+
+
+METRICS = {'sharpe': sharpe, 'total_return': total_return}
+
+
+def make_folds(n_dates: int, train_size: int, test_size: int, step: int = None, expanding: bool = False) -> list:
+    # list of (train_start, train_end, test_start, test_end) positional slices, ends exclusive
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("train_size and test_size must be positive")
+    step = step or test_size
+    folds = []
+    train_end = train_size
+    while train_end + test_size <= n_dates:
+        train_start = 0 if expanding else train_end - train_size
+        folds.append((train_start, train_end, train_end, train_end + test_size))
+        train_end += step
+    return folds
+
+
+class WalkForwardRunner:
+    def __init__(self, market_data: dict, strategy_cls, param_grid: dict, train_size: int = 252, test_size: int = 63,
+                 step: int = None, expanding: bool = False, metric: str = 'sharpe', max_workers: int = None,
+                 initial_capital: float = 1000000.0):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, choose from {list(METRICS)}")
+        self.market_data = market_data
+        self.strategy_cls = strategy_cls
+        self.param_sets = [dict(zip(param_grid.keys(), values)) for values in itertools.product(*param_grid.values())]
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.expanding = expanding
+        self.metric = metric
+        self.max_workers = max_workers
+        self.initial_capital = initial_capital
+        self.dates = pd.to_datetime(sorted(market_data.keys()))
+        self.returns = None  # (n_param_sets x n_dates) cache of daily returns
+
+    def compute_returns(self) -> np.ndarray:
+        if self.returns is not None:
+            return self.returns
+        tasks = [(self.strategy_cls, params, self.initial_capital) for params in self.param_sets]
+        # fork shares the market data copy-on-write; other start methods pickle it once per worker
+        ctx = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(self.market_data,)) as pool:
+            self.returns = np.vstack(list(pool.map(_run_candidate, tasks)))
+        return self.returns
+
+    def run(self) -> dict:
+        folds = make_folds(len(self.dates), self.train_size, self.test_size, self.step, self.expanding)
+        if not folds:
+            raise ValueError(f"Not enough dates ({len(self.dates)}) for train_size={self.train_size}, test_size={self.test_size}")
+        returns = self.compute_returns()
+        score = METRICS[self.metric]
+
+        records = []
+        oos = []
+        for train_start, train_end, test_start, test_end in folds:
+            train_scores = [score(r[train_start:train_end]) for r in returns]
+            best = int(np.argmax(train_scores))
+            test_returns = returns[best, test_start:test_end]
+            oos.append(pd.Series(test_returns, index=self.dates[test_start:test_end]))
+            records.append({
+                'train_start': self.dates[train_start],
+                'train_end': self.dates[train_end - 1],
+                'test_start': self.dates[test_start],
+                'test_end': self.dates[test_end - 1],
+                'params': self.param_sets[best],
+                'train_score': train_scores[best],
+                'test_score': score(test_returns),
+                'test_return': total_return(test_returns),
+            })
+
+        # overlapping test windows (step < test_size) keep the most recent fold's returns
+        oos_returns = pd.concat(oos)
+        oos_returns = oos_returns[~oos_returns.index.duplicated(keep='last')].sort_index()
+        return {
+            'folds': pd.DataFrame(records),
+            'oos_returns': oos_returns,
+            'oos_equity': self.initial_capital * (1.0 + oos_returns).cumprod(),
+        }
+
+
+if __name__ == "__main__":
+    from PriceLoader_reporting import PriceLoader
+    from strategies import RSI
+
+    price_loader = PriceLoader()
+    data_points = price_loader.load_data(start_date="2023-01-01", end_date="2024-12-31")
+    runner = WalkForwardRunner(data_points, RSI, {'period': [7, 14, 21], 'oversold': [25, 30]}, train_size=126, test_size=42)
+    result = runner.run()
+    print(result['folds'])
+    print(result['oos_equity'].tail())
@@ -0,0 +1,54 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from models import MarketDataPoint
+from panel import PricePanel
+from benchmark import (stock_universe, buy_and_hold_returns, equal_weight_returns, cap_weight_proxy_returns,
+                       index_returns, benchmark_returns, relative_metrics)
+
+DAYS = [datetime.datetime(2024, 1, d) for d in (2, 3, 4)]
+CLOSES = {'AAA': [10.0, 11.0, 12.1], 'BBB': [20.0, 19.0, 19.0], 'SPY': [400.0, 800.0, 1600.0]}
+VOLUMES = {'AAA': 100, 'BBB': 300, 'SPY': 10_000}
+
+
+def _panel():
+    return PricePanel.from_market_data({d: [MarketDataPoint(d, s, c[k], c[k], c[k], c[k], c[k], VOLUMES[s])
+                                            for s, c in CLOSES.items()] for k, d in enumerate(DAYS)})
+
+
+def test_index_etfs_are_not_in_the_benchmark_universe():
+    panel = _panel()
+    assert stock_universe(panel).symbols == ['AAA', 'BBB']
+    out = benchmark_returns(panel, include_index=False)
+    assert list(out.index) == list(panel.dates)
+    assert out['Equal Weight'].tolist() == pytest.approx([0.0, (0.1 - 0.05) / 2, 0.05])
+    # a SPY that doubles every day would dominate every benchmark if it were included
+    assert out.abs().to_numpy().max() < 0.1
+
+
+def test_buy_and_hold_and_cap_weight_proxy():
+    stocks = stock_universe(_panel())
+    assert buy_and_hold_returns(stocks)[1] == pytest.approx((1.1 + 0.95) / 2 - 1.0)
+    # day 1 weights from day 0 dollar volume: AAA 1000, BBB 6000
+    assert cap_weight_proxy_returns(stocks)[1] == pytest.approx((1000 * 0.1 + 6000 * -0.05) / 7000)
+    assert equal_weight_returns(stocks)[0] == 0.0
+
+
+def test_index_returns_from_parquet(tmp_path):
+    pd.DataFrame({'timestamp': pd.to_datetime(DAYS), 'adj_close': CLOSES['SPY']}).to_parquet(tmp_path / 'price_spy.parquet')
+    out = index_returns(_panel(), symbols=('SPY', 'VOO'), data_dir=str(tmp_path))
+    assert list(out.columns) == ['SPY']
+    assert out['SPY'].tolist()[1:] == [1.0, 1.0]
+
+
+def test_relative_metrics_against_itself_and_a_scaled_copy():
+    rng = np.random.default_rng(0)
+    benchmark = pd.Series(rng.normal(0.0, 0.01, 250), index=pd.bdate_range('2024-01-01', periods=250))
+    strategies = pd.DataFrame({'same': benchmark, 'double': 2 * benchmark})
+    metrics = relative_metrics(strategies, benchmark)
+    assert metrics.loc['same', 'Beta'] == pytest.approx(1.0)
+    assert metrics.loc['same', 'Tracking Error'] == pytest.approx(0.0)
+    assert np.isnan(metrics.loc['same', 'Information Ratio'])
+    assert metrics.loc['double', 'Beta'] == pytest.approx(2.0)
+    assert metrics.loc['double', 'Alpha'] == pytest.approx(0.0, abs=1e-12)
@@ -0,0 +1,73 @@
+import json
+import os
+import pandas as pd
+import pytest
+from cli import resolve_runs, build_strategies, main
+from strategies import RSI
+from BenchmarkStrategy import LongOnlyOnce
+
+CONFIG = '''
+[defaults]
+data_dir = "data"
+output_dir = "out"
+initial_capital = 10000.0
+
+[[runs]]
+name = "lo"
+universe = ["AAA", "BBB"]
+
+[runs.strategies.LO]
+class = "LongOnlyOnce"
+'''
+
+
+def _write_prices(data_dir):
+    os.makedirs(data_dir)
+    dates = pd.bdate_range('2024-01-01', periods=5)
+    for symbol, base in (('AAA', 10.0), ('BBB', 20.0)):
+        prices = [base + k for k in range(5)]
+        pd.DataFrame({'timestamp': dates, 'adj_close': prices, 'close': prices, 'high': prices, 'low': prices,
+                      'open': prices, 'volume': [1000.0] * 5, 'symbol': symbol}
+                     ).to_parquet(os.path.join(data_dir, f"price_{symbol.lower()}.parquet"))
+
+
+def test_resolve_runs_merges_defaults_and_resolves_relative_paths(tmp_path):
+    config = {'defaults': {'data_dir': 'data', 'output_dir': '/abs/out', 'strategies': {'R': 'RSI'}},
+              'runs': [{'name': 'a'}, {'engine_mode': 'replay', 'data_dir': '../shared'}]}
+    runs = resolve_runs(config, str(tmp_path / 'configs'))
+    assert [r['name'] for r in runs] == ['a', 'run_1']
+    assert runs[0]['data_dir'] == str(tmp_path / 'configs' / 'data')
+    assert runs[1]['data_dir'] == str(tmp_path / 'shared')
+    assert runs[0]['output_dir'] == '/abs/out'
+    assert runs[1]['engine_mode'] == 'replay' and runs[0]['initial_capital'] == 1000000.0
+    with pytest.raises(ValueError):
+        resolve_runs({'runs': [{'name': 'x', 'strategies': {'R': 'RSI'}, 'engine_mode': 'fast'}]})
+    with pytest.raises(ValueError):
+        resolve_runs({'runs': [{'name': 'x'}]})
+    with pytest.raises(ValueError, match='order log'):
+        resolve_runs({'runs': [{'name': 'x', 'strategies': {'R': 'RSI'}, 'store': 'results', 'log_orders': False}]})
+
+
+def test_build_strategies():
+    strategies = build_strategies({'R': {'class': 'RSI', 'params': {'period': 7}}, 'LongOnlyOnce': {},
+                                   'B': 'BenchmarkStrategy:LongOnlyOnce'})
+    assert isinstance(strategies['R'], RSI)
+    assert isinstance(strategies['LongOnlyOnce'], LongOnlyOnce) and isinstance(strategies['B'], LongOnlyOnce)
+    with pytest.raises(ValueError):
+        build_strategies({'X': 'NoSuchStrategy'})
+
+
+def test_main_runs_config_relative_to_its_directory(tmp_path, monkeypatch):
+    config_dir = tmp_path / 'configs'
+    _write_prices(str(config_dir / 'data'))
+    (config_dir / 'run.toml').write_text(CONFIG)
+    monkeypatch.chdir(tmp_path)  # a different working directory must not matter
+
+    assert main([str(config_dir / 'run.toml'), '--dry-run']) == []
+    summaries = main([str(config_dir / 'run.toml')])
+    out_dir = config_dir / 'out' / 'lo'
+    orders = pd.read_csv(out_dir / 'orders.csv')
+    assert sorted(orders['symbol']) == ['AAA', 'BBB']
+    summary = json.loads((out_dir / 'summary.json').read_text())
+    assert summary['strategies']['LO']['final_npv'] == pytest.approx(summaries[0]['strategies']['LO']['final_npv'])
+    assert summary['strategies']['LO']['final_npv'] == pytest.approx(10000.0 - 10.0 - 20.0 + 14.0 + 24.0)
@@ -0,0 +1,75 @@
+import datetime
+import numpy as np
+import pytest
+from models import MarketDataPoint, OrderAction, OrderStatus
+from engine import ExecutionEngine
+from costs import StandardCostModel
+from strategies import Strategy
+
+D1, D2 = datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 3)
+
+
+class BuyOnce(Strategy):
+    def __init__(self):
+        self.done = False
+
+    def generate_signals(self, tick):
+        if self.done:
+            return []
+        self.done = True
+        return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 100, tick.close)]
+
+
+def _market_data():
+    return {
+        D1: [MarketDataPoint(D1, 'AAPL', 100.0, 100.0, 102.0, 98.0, 99.0, 10_000)],
+        D2: [MarketDataPoint(D2, 'AAPL', 101.0, 101.0, 103.0, 100.0, 100.5, 20_000)],
+    }
+
+
+def test_per_order_and_batch_paths_agree():
+    model = StandardCostModel(commission_per_share=0.01, min_commission=1.0, spread_bps=10, impact_coef=0.5)
+    bar = _market_data()[D1][0]
+    buy_price, buy_commission = model.fill(OrderAction.BUY.value, 100.0, 400, bar)
+    sell_price, _ = model.fill(OrderAction.SELL.value, 100.0, 400, bar)
+    assert buy_price > 100.0 > sell_price
+    assert buy_commission == 4.0
+
+    fills, commissions = model.apply(np.array([[400.0, -400.0, 0.0]]), 100.0, 10_000, 102.0, 98.0)
+    assert fills[0, 0] == pytest.approx(buy_price)
+    assert fills[0, 1] == pytest.approx(sell_price)
+    assert commissions.tolist() == [[4.0, 4.0, 0.0]]
+
+
+def test_engine_applies_costs_and_next_open_fills():
+    model = StandardCostModel()
+    engine = ExecutionEngine(_market_data(), {'buy': BuyOnce()}, cost_model=model, fill_at='next_open')
+    engine.run()
+
+    orders = engine.ticker_book[D2].orders
+    assert len(orders) == 1 and orders[0].status == OrderStatus.FILLED.value
+    expected_price, commission = model.fill(OrderAction.BUY.value, 100.5, 100, _market_data()[D2][0])
+    assert orders[0].price == pytest.approx(expected_price)
+
+    portfolio = engine.portfolio['buy']
+    assert portfolio['capital'] == pytest.approx(1_000_000 - expected_price * 100 - commission)
+    assert portfolio['costs'] == pytest.approx(commission + (expected_price - 100.5) * 100)
+
+
+class RoundTrip(Strategy):
+    def generate_signals(self, tick):
+        action = OrderAction.BUY.value if tick.timestamp == D1 else OrderAction.SELL.value
+        return [(tick.timestamp, action, tick.symbol, 100, tick.close)]
+
+
+def test_equity_curve_includes_commissions():
+    from reporting import equity_curve
+    model = StandardCostModel(commission_per_share=0.0, min_commission=50.0, spread_bps=0.0, impact_coef=0.0)
+    engine = ExecutionEngine(_market_data(), {'rt': RoundTrip()}, cost_model=model)
+    engine.run()
+    curve = equity_curve(engine, 'rt')
+    # +1 per share on 100 shares, minus two 50 minimum commissions
+    assert engine.portfolio['rt']['capital'] == pytest.approx(1_000_000 + 100 - 100)
+    assert curve.iloc[-1] == pytest.approx(engine.portfolio['rt']['capital'])
+    assert curve.iloc[-1] == pytest.approx(engine.metrics['rt'].equity)
+    assert [o.commission for o in engine.ticker_book[D2].orders] == [50.0]
@@ -0,0 +1,59 @@
+import os
+import time
+from distributed import Coordinator, JobQueue, make_jobs, worker
+
+
+def square_runner(job):
+    if job['params']['x'] == 3 and job['attempts'] == 0:
+        raise RuntimeError("transient failure")
+    return {'value': job['params']['x'] ** 2, 'pid': os.getpid()}
+
+
+def _jobs():
+    return make_jobs('RSI', {'x': [1, 2, 3, 4, 5, 6]}, ['AAPL'], [('2024-01-01', '2024-12-31')])
+
+
+def test_submit_is_idempotent_and_failures_retry(tmp_path):
+    queue = JobQueue(str(tmp_path), max_attempts=2)
+    assert queue.submit(_jobs()) == 6
+    assert queue.submit(_jobs()) == 0
+    assert worker(str(tmp_path), square_runner, poll=0.01, max_attempts=2) == 6
+    assert queue.status() == {'pending': 0, 'running': 0, 'done': 6, 'failed': 0}
+    assert sorted(queue.results()['value']) == [1, 4, 9, 16, 25, 36]
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    queue = JobQueue(str(tmp_path), lease_seconds=0.05)
+    queue.submit(_jobs()[:1])
+    queue.claim('dead-worker')
+    time.sleep(0.1)
+    assert queue.requeue_expired() == 1
+    assert queue.claim('other')['attempts'] == 1
+
+
+def test_local_worker_processes(tmp_path):
+    coordinator = Coordinator(str(tmp_path))
+    coordinator.submit(_jobs())
+    results = coordinator.run_local(processes=3, runner=square_runner, poll=0.05)
+    assert sorted(results['value']) == [1, 4, 9, 16, 25, 36]
+    assert coordinator.queue.status()['done'] == 6
+
+
+def test_claimed_job_is_not_requeued_with_its_queued_mtime(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path), lease_seconds=60.0)
+    queue.submit(_jobs()[:1])
+    # queued long ago: its mtime alone is older than the lease
+    for name in os.listdir(tmp_path / 'pending'):
+        os.utime(tmp_path / 'pending' / name, (0, 0))
+    requeued = []
+    rename = os.rename
+
+    def rename_then_requeue(src, dst):
+        # a coordinator scanning running/ right after the claiming rename
+        rename(src, dst)
+        requeued.append(JobQueue(str(tmp_path), lease_seconds=60.0).requeue_expired())
+
+    monkeypatch.setattr(os, 'rename', rename_then_requeue)
+    job = queue.claim('w')
+    assert requeued == [0] and job['attempts'] == 0
+    assert queue.status()['running'] == 1 and queue.status()['pending'] == 0
@@ -0,0 +1,157 @@
+import os
+import pandas as pd
+import pytest
+from cli import BacktestRunner
+from engine import ExecutionEngine
+from liquidity import LiquidityIndex, LiquidityScreen, LiquidityWeights, load_liquidity, screen_strategy
+from models import ExecutionError, MarketDataPoint, Order, OrderAction, OrderStatus
+from panel import PricePanel
+from strategies import Strategy, EqualWeight
+
+DATES = pd.bdate_range('2024-01-01', periods=4)
+# dollar volume per day: AAA always largest; CCC overtakes BBB from the second day on
+DOLLAR_VOLUME = {'AAA': [900.0, 900.0, 900.0, 900.0], 'BBB': [500.0, 100.0, 100.0, 100.0], 'CCC': [200.0, 600.0, 600.0, 600.0]}
+
+
+def _frame():
+    return pd.DataFrame([(t, s, v[k], v[k]) for s, v in DOLLAR_VOLUME.items() for k, t in enumerate(DATES)],
+                        columns=['timestamp', 'symbol', 'adv', 'dollar_adv'])
+
+
+def _write_prices(data_dir):
+    for symbol, values in DOLLAR_VOLUME.items():
+        prices = [10.0] * len(DATES)
+        pd.DataFrame({'timestamp': DATES, 'adj_close': prices, 'close': prices, 'high': prices, 'low': prices,
+                      'open': prices, 'volume': [v / 10.0 for v in values], 'symbol': symbol}
+                     ).to_parquet(os.path.join(data_dir, f"price_{symbol.lower()}.parquet"))
+
+
+def test_ranks_use_the_previous_date():
+    index = LiquidityIndex(_frame())
+    assert index.top_n(DATES[0], 2) == []  # nothing known before the first date
+    assert index.top_n(DATES[1], 2) == ['AAA', 'BBB']
+    assert index.top_n(DATES[2], 2) == ['AAA', 'CCC']
+    assert index.top_n(DATES[3] + pd.Timedelta(days=3), 1) == ['AAA']
+    assert index.screen(2) == ['AAA', 'BBB', 'CCC']
+    assert index.screen(2, start_date=DATES[2]) == ['AAA', 'CCC']
+
+
+def test_from_parquet_top_n_keeps_the_requested_universe(tmp_path):
+    _write_prices(str(tmp_path))
+    load_liquidity(str(tmp_path), window=1)
+    panel = PricePanel.from_parquet(start_date=DATES[2], data_dir=str(tmp_path), top_n=2)
+    assert panel.symbols == ['AAA', 'CCC']
+    # the screen narrows an explicit universe, it never replaces it
+    panel = PricePanel.from_parquet(['bbb', 'ccc'], start_date=DATES[2], data_dir=str(tmp_path), top_n=2)
+    assert panel.symbols == ['CCC']
+
+
+class BuyEveryBar(Strategy):
+    def generate_signals(self, tick):
+        return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 1, tick.close)]
+
+
+def _panel():
+    return PricePanel.from_market_data({t: [MarketDataPoint(t, s, 10.0, 10.0, 10.0, 10.0, 10.0, v[k] / 10.0)
+                                            for s, v in DOLLAR_VOLUME.items()] for k, t in enumerate(DATES)})
+
+
+def _bought(engine):
+    return [(t, o.symbol) for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders]
+
+
+def test_liquidity_screen_trades_the_top_n_of_each_date():
+    index = LiquidityIndex(_frame())
+    engine = ExecutionEngine(_panel(), {'B': screen_strategy(BuyEveryBar(), index, 2)})
+    assert isinstance(engine.strategies['B'], LiquidityScreen)
+    engine.run()
+    assert _bought(engine) == [(DATES[1], 'AAA'), (DATES[1], 'BBB'), (DATES[2], 'AAA'), (DATES[2], 'CCC'),
+                               (DATES[3], 'AAA'), (DATES[3], 'CCC')]
+
+
+class BuyThenSell(Strategy):
+    def __init__(self):
+        self.seen = []
+
+    def generate_signals(self, tick):
+        self.seen.append((tick.timestamp, tick.symbol))
+        if tick.timestamp == DATES[1]:
+            return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 1, tick.close)]
+        if tick.timestamp == DATES[3]:
+            return [(tick.timestamp, OrderAction.SELL.value, tick.symbol, 1, tick.close)]
+        return []
+
+
+def test_liquidity_screen_lets_names_that_left_the_universe_exit():
+    strategy = BuyThenSell()
+    engine = ExecutionEngine(_panel(), {'S': screen_strategy(strategy, LiquidityIndex(_frame()), 2)})
+    engine.run()
+    # the wrapped strategy sees every tick, only its BBB entry is screened out once CCC overtakes it
+    assert len(strategy.seen) == len(DATES) * len(DOLLAR_VOLUME)
+    assert [(t, o.symbol, o.action) for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders] == [
+        (DATES[1], 'AAA', 'BUY'), (DATES[1], 'BBB', 'BUY'),
+        (DATES[3], 'AAA', 'SELL'), (DATES[3], 'BBB', 'SELL')]
+    assert {s: p['quantity'] for s, p in engine.portfolio['S']['positions'].items()} == {'AAA': 0, 'BBB': 0}
+
+
+def test_liquidity_weights_only_weight_screened_names():
+    panel = _panel()
+    strategy = screen_strategy(EqualWeight(), LiquidityIndex(_frame()), 2)
+    assert isinstance(strategy, LiquidityWeights)
+    assert strategy.target_weights(0, panel).tolist() == [0.0, 0.0, 0.0]
+    assert strategy.target_weights(1, panel).tolist() == [0.5, 0.5, 0.0]
+    assert strategy.target_weights(2, panel).tolist() == [0.5, 0.0, 0.5]
+
+
+def test_cli_wraps_strategies_when_top_n_is_set(tmp_path):
+    _write_prices(str(tmp_path))
+    load_liquidity(str(tmp_path), window=1)
+    # from DATES[1] on, when the screen has a first ranking: LongOnlyOnce's one entry per name is screened
+    run = {'name': 'screened', 'engine_mode': 'batch', 'initial_capital': 1000.0, 'data_dir': str(tmp_path), 'top_n': 1,
+           'start_date': str(DATES[1].date()), 'strategies': {'LO': 'LongOnlyOnce'}}
+    runner = BacktestRunner()
+    engine = runner.execute(run, runner.load_panel(run))
+    assert isinstance(engine.strategies['LO'], LiquidityScreen)
+    assert [s for _, s in _bought(engine)] == ['AAA']
+
+
+class BuyLots(Strategy):
+    def generate_signals(self, tick):
+        if tick.timestamp == DATES[1]:
+            return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 50, tick.close)]
+        return []
+
+
+@pytest.mark.parametrize('log_orders', [True, False])
+def test_participation_cap_logs_the_unfilled_remainder(log_orders):
+    # volume on DATES[1]: AAA 90, BBB 10, CCC 60 -> at 50% participation AAA fills 45, BBB 5, CCC 30
+    engine = ExecutionEngine(_panel(), {'L': BuyLots()}, participation_rate=0.5, log_orders=log_orders)
+    engine.run()
+    portfolio = engine.portfolio['L']
+    assert {s: p['quantity'] for s, p in portfolio['positions'].items()} == {'AAA': 45, 'BBB': 5, 'CCC': 30}
+    assert portfolio['unfilled'] == 5 + 45 + 20
+    log = [(o.symbol, o.quantity, o.status) for o in engine.ticker_book[DATES[1]].orders] if log_orders else []
+    assert log == ([('AAA', 45, 'FILLED'), ('AAA', 5, 'CANCELLED'), ('BBB', 5, 'FILLED'), ('BBB', 45, 'CANCELLED'),
+                    ('CCC', 30, 'FILLED'), ('CCC', 20, 'CANCELLED')] if log_orders else [])
+
+
+def test_participation_cap_rejects_when_nothing_can_fill():
+    engine = ExecutionEngine(_panel(), {'L': BuyLots()}, participation_rate=0.01)
+    engine.run()
+    assert engine.portfolio['L']['positions'] == {} and engine.portfolio['L']['unfilled'] == 0
+
+
+def test_participation_cap_leaves_rejected_orders_untouched():
+    engine = ExecutionEngine(_panel(), {'L': BuyLots()}, participation_rate=0.5)
+    engine.initalize_portfolio(100.0)
+    order = Order(DATES[1], 'AAA', 50, 10.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 'L')
+    # capped to 45, which the capital cannot pay for: no fill, no cancelled remainder, quantity as requested
+    with pytest.raises(ExecutionError, match='Not enough capital'):
+        engine.execute_order(order, engine.portfolio['L'])
+    assert order.quantity == 50 and order.status == OrderStatus.UNFILLED.value
+    assert engine.portfolio['L']['unfilled'] == 0 and not engine.ticker_book
+    # without a bar there is no volume to cap against: rejected rather than filled uncapped
+    order = Order(DATES[3] + pd.Timedelta(days=1), 'AAA', 1, 10.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 'L')
+    with pytest.raises(ExecutionError, match='No bar'):
+        engine.execute_order(order, engine.portfolio['L'])
+    assert engine.portfolio['L']['positions'] == {}
@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+from models import MarketDataPoint, OrderAction
+from BenchmarkStrategy import LongOnlyOnce
+from live import LatencyHistogram, LiveEngine, queue_feed, replay
+from strategies import Strategy
+
+
+def _market_data(n_days=5):
+    market_data = {}
+    for d in range(n_days):
+        t = datetime.datetime(2024, 1, 2 + d)
+        market_data[t] = [MarketDataPoint(t, 'AAPL', 100.0 + d, 100.0 + d, 101.0 + d, 99.0 + d, 99.5 + d, 1000),
+                          MarketDataPoint(t, 'MSFT', 50.0 + d, 50.0 + d, 51.0 + d, 49.0 + d, 49.5 + d, 500)]
+    return market_data
+
+
+def test_latency_histogram_percentiles():
+    hist = LatencyHistogram()
+    for ns in [1_000] * 98 + [1_000_000, 2_000_000]:
+        hist.record(ns)
+    assert hist.count == 100
+    assert 1_000 <= hist.percentile(50) <= 1_050
+    assert 1_000_000 <= hist.percentile(99) <= 1_050_000
+    assert hist.summary()['max_us'] == 2_000.0
+
+
+def test_replay_over_socket_and_queue_fill_orders():
+    for transport in ("socket", "queue"):
+        engine = asyncio.run(replay(_market_data(), {'LO': LongOnlyOnce()}, transport=transport))
+        stats = engine.stats()
+        assert stats['ticks'] == 10
+        assert stats['orders'] == 2
+        assert stats['tick_to_order']['count'] == 2
+        positions = engine.portfolio['LO']['positions']
+        assert positions['AAPL']['quantity'] == 1 and positions['MSFT']['quantity'] == 1
+
+
+class BuyTen(Strategy):
+    def generate_signals(self, tick):
+        return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 10, tick.close)]
+
+
+def test_live_bars_of_every_symbol_in_a_bar_and_bounded_window():
+    # 1% of 1000 / 500 volume: AAPL fills 10, MSFT is capped at 5 - on every bar, whichever symbol comes second
+    engine = LiveEngine({'B': BuyTen()}, window=2, participation_rate=0.01)
+
+    async def run():
+        queue = asyncio.Queue()
+        for ticks in _market_data().values():
+            for tick in ticks:
+                queue.put_nowait((tick, 0))
+        queue.put_nowait(None)
+        return await engine.run_live(queue_feed(queue))
+
+    stats = asyncio.run(run())
+    assert stats['orders'] == 10 and stats['rejected'] == 0
+    positions = engine.portfolio['B']['positions']
+    assert positions['AAPL']['quantity'] == 50 and positions['MSFT']['quantity'] == 25
+    assert engine.portfolio['B']['unfilled'] == 25
+    # ticks of the last two bars only, the order log of every bar
+    assert [t.day for t, book in sorted(engine.ticker_book.items()) if book.market_data] == [5, 6]
+    assert sum(o.status == 'FILLED' for book in engine.ticker_book.values() for o in book.orders) == 10
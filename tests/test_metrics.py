@@ -0,0 +1,66 @@
+import datetime
+import numpy as np
+import pytest
+from models import MarketDataPoint, OrderAction
+from engine import ExecutionEngine
+from metrics import RunningMetrics
+from reporting import equity_curve
+from strategies import Strategy
+
+DAYS = [datetime.datetime(2024, 1, d) for d in (2, 3, 4, 5)]
+CLOSES = [100.0, 110.0, 99.0, 104.0]
+
+
+class BuyFirstSellLast(Strategy):
+    def generate_signals(self, tick):
+        if tick.timestamp == DAYS[0]:
+            return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 100, tick.close)]
+        if tick.timestamp == DAYS[2]:
+            return [(tick.timestamp, OrderAction.SELL.value, tick.symbol, 40, tick.close)]
+        return []
+
+
+def _market_data():
+    return {d: [MarketDataPoint(d, 'AAA', c, c, c, c, c, 1000)] for d, c in zip(DAYS, CLOSES)}
+
+
+def test_running_metrics_match_batch_computation():
+    engine = ExecutionEngine(_market_data(), {'S': BuyFirstSellLast()})
+    engine.initalize_portfolio(10_000.0)
+    engine.run()
+    values = equity_curve(engine, 'S', 10_000.0).to_numpy()
+    returns = np.diff(values) / values[:-1]
+    snapshot = engine.metrics['S'].snapshot()
+    assert snapshot['equity'] == pytest.approx(values[-1])
+    assert snapshot['sharpe'] == pytest.approx(returns.mean() / returns.std())
+    assert snapshot['max_drawdown'] == pytest.approx(((values - np.maximum.accumulate(values)) / np.maximum.accumulate(values)).min())
+    assert snapshot['traded_notional'] == pytest.approx(100 * 100.0 + 40 * 99.0)
+    assert snapshot['gross_exposure'] == pytest.approx(60 * 104.0 / values[-1])
+
+
+def test_metrics_without_order_log():
+    engine = ExecutionEngine(_market_data(), {'S': BuyFirstSellLast()}, log_orders=False)
+    engine.run()
+    assert all(not book.orders for book in engine.ticker_book.values())
+    assert engine.metrics['S'].fills == 2
+    assert engine.metrics['S'].equity_series().iloc[-1] == pytest.approx(1_000_000.0 - 10_000.0 + 3_960.0 + 60 * 104.0)
+
+
+def test_short_position_marking():
+    metrics = RunningMetrics(1000.0)
+    metrics.on_tick('AAA', 10.0)
+    metrics.on_fill('AAA', -5, 10.0)
+    metrics.on_tick('AAA', 12.0)
+    metrics.close_bar(DAYS[0], 1050.0)
+    assert metrics.equity == pytest.approx(990.0) and metrics.short_value == pytest.approx(60.0)
+
+
+def test_next_open_fills_hit_metrics_on_the_fill_bar():
+    engine = ExecutionEngine(_market_data(), {'S': BuyFirstSellLast()}, fill_at='next_open')
+    engine.initalize_portfolio(100_000.0)
+    engine.run()
+    assert [t for t in engine.ticker_book if engine.ticker_book[t].orders] == [DAYS[1], DAYS[3]]
+    series = engine.metrics['S'].equity_series()
+    assert series.tolist() == pytest.approx(equity_curve(engine, 'S', 100_000.0).tolist())
+    # flat on the signal bar, bought 100 at the DAYS[1] open, 40 sold at the DAYS[3] open
+    assert series.tolist() == pytest.approx([100_000.0, 100_000.0, 98_900.0, 99_400.0])
@@ -0,0 +1,70 @@
+import datetime
+from models import MarketDataPoint, Order, OrderAction, OrderStatus, OrderType, TimeInForce
+from engine import ExecutionEngine
+from orderbook import OrderBook
+from strategies import Strategy
+
+D1, D2, D3 = (datetime.datetime(2024, 1, d) for d in (2, 3, 4))
+
+
+class RestingOrders(Strategy):
+    def generate_signals(self, tick):
+        if tick.timestamp != D1:
+            return []
+        return [
+            (tick.timestamp, OrderAction.BUY.value, tick.symbol, 10, 97.0, {'order_type': OrderType.LIMIT.value}),
+            (tick.timestamp, OrderAction.BUY.value, tick.symbol, 5, 90.0,
+             {'order_type': OrderType.LIMIT.value, 'time_in_force': TimeInForce.DAY.value}),
+            (tick.timestamp, OrderAction.BUY.value, tick.symbol, 3, 105.0, {'order_type': OrderType.STOP.value}),
+        ]
+
+
+def test_engine_fills_and_expires_resting_orders():
+    market_data = {
+        D1: [MarketDataPoint(D1, 'AAA', 100.0, 100.0, 101.0, 99.0, 100.0, 1000)],
+        D2: [MarketDataPoint(D2, 'AAA', 96.0, 96.0, 100.0, 95.0, 99.0, 1000)],
+        D3: [MarketDataPoint(D3, 'AAA', 108.0, 108.0, 110.0, 96.0, 97.0, 1000)],
+    }
+    engine = ExecutionEngine(market_data, {'R': RestingOrders()})
+    engine.run()
+    log = [(o.timestamp, o.quantity, o.price, o.status) for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders]
+    assert log == [(D2, 10, 97.0, OrderStatus.FILLED.value), (D2, 5, 90.0, OrderStatus.CANCELLED.value),
+                   (D3, 3, 105.0, OrderStatus.FILLED.value)]
+    assert engine.portfolio['R']['positions']['AAA']['quantity'] == 13
+    assert engine.open_orders('R') == []
+
+
+def test_stop_limit_triggers_then_fills_on_same_bar():
+    book = OrderBook()
+    order = Order(D1, 'AAA', 10, 95.0, OrderStatus.UNFILLED.value, OrderAction.SELL.value, 'R',
+                  OrderType.STOP_LIMIT.value, limit_price=94.0, stop_price=95.0)
+    book.add(order)
+    assert book.match(MarketDataPoint(D2, 'AAA', 97.0, 97.0, 99.0, 96.0, 98.0, 1000)) == []
+    # stop at 95 is hit, the resulting 94 sell limit is reachable within the same bar
+    assert book.match(MarketDataPoint(D3, 'AAA', 93.0, 93.0, 96.0, 92.0, 93.5, 1000)) == [(order, 94.0)]
+    assert book.open_count == 0
+
+
+def test_stop_limit_fill_on_trigger_bar_is_clamped_to_the_stop():
+    book = OrderBook()
+    sell = Order(D1, 'AAA', 10, 95.0, OrderStatus.UNFILLED.value, OrderAction.SELL.value, 'R',
+                 OrderType.STOP_LIMIT.value, limit_price=94.0, stop_price=95.0)
+    buy = Order(D1, 'BBB', 10, 105.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 'R',
+                OrderType.STOP_LIMIT.value, limit_price=106.0, stop_price=105.0)
+    book.add(sell)
+    # opens at 98 and trades down through the stop: no fill above 95
+    assert book.match(MarketDataPoint(D2, 'AAA', 93.0, 93.0, 99.0, 92.0, 98.0, 1000)) == [(sell, 95.0)]
+    book = OrderBook()
+    book.add(buy)
+    # opens at 100 and trades up through the stop: no fill below 105
+    assert book.match(MarketDataPoint(D2, 'BBB', 107.0, 107.0, 108.0, 99.0, 100.0, 1000)) == [(buy, 105.0)]
+
+
+def test_stop_limit_rests_when_limit_is_out_of_the_trigger_bar():
+    book = OrderBook()
+    order = Order(D1, 'AAA', 10, 95.0, OrderStatus.UNFILLED.value, OrderAction.SELL.value, 'R',
+                  OrderType.STOP_LIMIT.value, limit_price=94.0, stop_price=95.0)
+    book.add(order)
+    assert book.match(MarketDataPoint(D2, 'AAA', 91.0, 91.0, 93.0, 90.0, 92.0, 1000)) == []
+    assert book.open_count == 1
+    assert book.match(MarketDataPoint(D3, 'AAA', 95.0, 95.0, 96.0, 92.0, 93.0, 1000)) == [(order, 94.0)]
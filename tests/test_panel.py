@@ -0,0 +1,68 @@
+import datetime
+import numpy as np
+import pandas as pd
+from models import MarketDataPoint, OrderAction
+from panel import PricePanel
+from engine import ExecutionEngine
+from strategies import Strategy
+
+D1, D2, D3 = (datetime.datetime(2024, 1, d) for d in (2, 3, 4))
+
+
+def _market_data():
+    # MSFT only "lists" on the second day
+    return {
+        D1: [MarketDataPoint(D1, 'AAPL', 100.0, 100.0, 101.0, 99.0, 99.5, 1000)],
+        D2: [MarketDataPoint(D2, 'AAPL', 102.0, 102.0, 103.0, 100.0, 100.5, 1100),
+             MarketDataPoint(D2, 'MSFT', 50.0, 50.0, 51.0, 49.0, 49.5, 500)],
+        D3: [MarketDataPoint(D3, 'MSFT', 55.0, 55.0, 56.0, 50.0, 50.5, 600),
+             MarketDataPoint(D3, 'AAPL', 101.0, 101.0, 102.0, 100.0, 101.5, 900)],
+    }
+
+
+def test_panel_layout_and_lookup():
+    panel = PricePanel.from_market_data(_market_data())
+    assert panel.shape == (3, 2)
+    assert panel.symbols == ['AAPL', 'MSFT']
+    assert panel.calendar.dtype == np.int64
+    assert panel.valid.tolist() == [[True, False], [True, True], [True, True]]
+    assert np.isnan(panel['close'][0, panel.col('MSFT')])
+    assert panel.get('close', D3, 'MSFT') == 55.0
+    assert panel.get('volume', pd.Timestamp('2024-01-02'), 'AAPL') == 1000
+
+    returns = panel.returns('close')
+    assert returns[2, panel.col('MSFT')] == 55.0 / 50.0 - 1.0
+    assert np.isnan(returns[1, panel.col('MSFT')])
+
+
+def test_panel_slice_and_round_trip():
+    panel = PricePanel.from_market_data(_market_data())
+    sub = panel.slice(start_date=D2, symbols=['MSFT'])
+    assert sub.shape == (2, 1)
+    assert sub['close'][:, 0].tolist() == [50.0, 55.0]
+
+    market_data = panel.to_market_data()
+    assert [len(ticks) for ticks in market_data.values()] == [1, 2, 2]
+    assert market_data[pd.Timestamp(D1)][0].symbol == 'AAPL'
+
+
+class BuyEveryBar(Strategy):
+    def generate_signals(self, tick):
+        return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 1, tick.close)]
+
+
+def test_engine_reads_bars_from_the_panel():
+    def orders(engine):
+        return [(o.timestamp, o.symbol, o.price) for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders]
+
+    panel = PricePanel.from_market_data(_market_data())
+    engine = ExecutionEngine(panel, {'B': BuyEveryBar()}, fill_at='next_open')
+    reference = ExecutionEngine(_market_data(), {'B': BuyEveryBar()}, fill_at='next_open')
+    engine.run()
+    reference.run()
+    # no per-day tick lists: the ticker book only holds the bars that got orders
+    assert all(not book.market_data for book in engine.ticker_book.values())
+    assert engine.get_panel() is panel
+    assert orders(engine) == orders(reference) == [(D2, 'AAPL', 100.5), (D3, 'AAPL', 101.5), (D3, 'MSFT', 50.5)]
+    assert engine.bar(D2, 'MSFT') == reference.bar(D2, 'MSFT')
+    assert engine.bar(D1, 'MSFT') is None and engine.next_bar(D3, 'AAPL') is None
@@ -0,0 +1,45 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from panel import PricePanel
+from precision import PrecisionPolicy, compare_curves
+
+
+def _frame():
+    return pd.DataFrame({
+        'timestamp': [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 3), datetime.datetime(2024, 1, 3)],
+        'symbol': ['AAPL', 'AAPL', 'MSFT'],
+        'adj_close': [100.1, 101.2, 50.3], 'close': [100.1, 101.2, 50.3], 'high': [101.0, 102.0, 51.0],
+        'low': [99.0, 100.0, 49.0], 'open': [100.0, 101.0, 50.0], 'volume': [1000.0, 2000.0, 300.0],
+    })
+
+
+def test_compact_policy_dtypes_and_spill():
+    policy = PrecisionPolicy('float32', 'int64', memory_budget_mb=0)
+    panel = PricePanel.from_frame(_frame(), policy=policy)
+    assert panel['close'].dtype == np.float32 and isinstance(panel['close'], np.memmap)
+    assert panel['volume'].tolist() == [[1000, 0], [2000, 300]]
+    assert policy.allocated == 0 and policy.spilled == panel.nbytes - panel.valid.nbytes
+    ticks = panel.to_market_data()[pd.Timestamp('2024-01-03')]
+    assert ticks[1].volume == 300 and isinstance(ticks[1].volume, int)
+    reference = PricePanel.from_frame(_frame())
+    assert np.nanmax(np.abs(panel['close'] - reference['close']) / reference['close']) < 1e-6
+
+
+def test_compare_curves():
+    dates = pd.date_range('2024-01-01', periods=3)
+    error = compare_curves(pd.Series([100.0, 110.0, 120.0], dates), pd.Series([100.0, 110.0, 120.012], dates))
+    assert error['max_abs_error'] == pytest.approx(0.012) and error['final_rel_error'] == pytest.approx(1e-4)
+
+
+def test_ticks_stream_in_budget_sized_chunks():
+    frame = pd.concat([_frame().assign(timestamp=_frame().timestamp + pd.Timedelta(days=7 * k)) for k in range(5)])
+    policy = PrecisionPolicy(memory_budget_mb=1e-3)
+    panel = PricePanel.from_frame(frame, policy=policy)
+    assert panel.chunk_rows == policy.chunk_rows(2) == 1
+    whole = PricePanel.from_frame(frame)
+    assert whole.chunk_rows > len(whole.calendar)
+    chunked, unchunked = list(panel.iter_ticks()), list(whole.iter_ticks())
+    assert [t for t, _ in chunked] == sorted(frame.timestamp.unique())
+    assert chunked == unchunked
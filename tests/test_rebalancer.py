@@ -0,0 +1,67 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from models import MarketDataPoint, Order, OrderAction, OrderError, OrderStatus
+from engine import ExecutionEngine
+from panel import PricePanel
+from rebalancer import Rebalancer
+from strategies import EqualWeight
+
+
+def test_schedule_mask_monthly():
+    dates = pd.bdate_range('2024-01-29', '2024-03-05')
+    mask = Rebalancer('monthly').schedule_mask(dates)
+    assert list(dates[mask].strftime('%Y-%m-%d')) == ['2024-01-29', '2024-02-01', '2024-03-01']
+
+
+def test_order_deltas_drift_band_and_untradable():
+    rebalancer = Rebalancer(drift_threshold=0.05)
+    prices = np.array([10.0, 20.0, np.nan])
+    positions = np.array([480.0, 0.0, 5.0])
+    deltas = rebalancer.order_deltas(np.array([0.5, 0.5, 0.0]), positions, prices, 10_000.0)
+    # 48% vs 50% is inside the band, the NaN-priced name is left alone
+    assert deltas.tolist() == [0.0, 250.0, 0.0]
+
+
+def test_engine_equal_weight_rebalance():
+    d1, d2 = datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 3)
+    market_data = {
+        d1: [MarketDataPoint(d1, 'AAA', 10.0, 10.0, 10.0, 10.0, 10.0, 1000),
+             MarketDataPoint(d1, 'BBB', 20.0, 20.0, 20.0, 20.0, 20.0, 1000)],
+        d2: [MarketDataPoint(d2, 'AAA', 20.0, 20.0, 20.0, 20.0, 20.0, 1000),
+             MarketDataPoint(d2, 'BBB', 20.0, 20.0, 20.0, 20.0, 20.0, 1000)],
+    }
+    engine = ExecutionEngine(PricePanel.from_market_data(market_data), {'EW': EqualWeight()})
+    engine.initalize_portfolio(1000.0)
+    engine.run()
+    positions = engine.portfolio['EW']['positions']
+    # day 1: 50 AAA + 25 BBB, day 2 equity 1500 -> 37 AAA + 37 BBB, the AAA sell funds the BBB buy
+    assert positions['AAA']['quantity'] == 37 and positions['BBB']['quantity'] == 37
+    assert [o.action for o in engine.ticker_book[d2].orders] == [OrderAction.SELL.value, OrderAction.BUY.value]
+
+
+def test_next_open_rebalance_skips_names_without_a_next_bar():
+    d1, d2, d3 = (datetime.datetime(2024, 1, d) for d in (2, 3, 4))
+    market_data = {
+        d1: [MarketDataPoint(d1, 'AAA', 10.0, 10.0, 10.0, 10.0, 10.0, 1000),
+             MarketDataPoint(d1, 'BBB', 20.0, 20.0, 20.0, 20.0, 20.0, 1000)],
+        d2: [MarketDataPoint(d2, 'AAA', 20.0, 20.0, 20.0, 10.0, 10.0, 1000),
+             MarketDataPoint(d2, 'BBB', 20.0, 20.0, 20.0, 20.0, 20.0, 1000)],
+        # BBB has no bar on the fill day of the second rebalance
+        d3: [MarketDataPoint(d3, 'AAA', 20.0, 20.0, 20.0, 20.0, 20.0, 1000)],
+    }
+    engine = ExecutionEngine(PricePanel.from_market_data(market_data), {'EW': EqualWeight()}, fill_at='next_open')
+    engine.initalize_portfolio(1000.0)
+    engine.run()
+    portfolio = engine.portfolio['EW']
+    # day 2 equity 1500: AAA 50 -> 37 fills at the day 3 open, the BBB buy is skipped instead of filling at NaN
+    assert np.isfinite(portfolio['capital']) and portfolio['capital'] == 13 * 20.0
+    assert portfolio['positions']['AAA']['quantity'] == 37 and portfolio['positions']['BBB']['quantity'] == 25
+    assert [(o.symbol, o.action) for o in engine.ticker_book[d3].orders] == [('AAA', OrderAction.SELL.value)]
+
+
+def test_order_rejects_non_finite_prices():
+    for price in (np.nan, np.inf):
+        with pytest.raises(OrderError):
+            Order(datetime.datetime(2024, 1, 2), 'AAA', 1, price, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 'EW')
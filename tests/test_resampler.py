@@ -0,0 +1,51 @@
+import datetime
+import pandas as pd
+from resampler import TickResampler, bars_to_market_data
+
+TICKS = pd.DataFrame({
+    'timestamp': pd.to_datetime(['2024-01-02T09:30:05', '2024-01-02T09:30:40', '2024-01-02T09:31:10',
+                                 '2024-01-02T09:30:20', '2024-01-02T09:32:00']),
+    'symbol': ['AAPL', 'AAPL', 'AAPL', 'MSFT', 'AAPL'],
+    'price': [100.0, 102.0, 101.0, 50.0, 99.0],
+    'size': [10, 5, 20, 7, 3],
+})
+
+
+def _online(resampler, df):
+    bars = []
+    for row in df.sort_values('timestamp').itertuples(index=False):
+        bars.extend(resampler.on_tick(row.timestamp, row.symbol, row.price, row.size))
+    return bars + resampler.flush()
+
+
+def test_time_bars_close_on_next_interval():
+    r = TickResampler("TIME", freq="1min")
+    assert r.on_tick(datetime.datetime(2024, 1, 2, 9, 30, 5), 'AAPL', 100.0, 10) == []
+    assert r.on_tick(datetime.datetime(2024, 1, 2, 9, 30, 40), 'AAPL', 102.0, 5) == []
+    bars = r.on_tick(datetime.datetime(2024, 1, 2, 9, 31, 10), 'AAPL', 101.0, 20)
+    assert len(bars) == 1
+    bar = bars[0]
+    assert bar.timestamp == pd.Timestamp('2024-01-02T09:30:00')
+    assert (bar.open, bar.high, bar.low, bar.close, bar.volume) == (100.0, 102.0, 100.0, 102.0, 15)
+
+    # flush(now) only closes intervals that have ended
+    assert r.flush(now=datetime.datetime(2024, 1, 2, 9, 31, 30)) == []
+    assert len(r.flush(now=datetime.datetime(2024, 1, 2, 9, 32, 0))) == 1
+
+
+def test_batch_matches_online():
+    for kwargs in [dict(bar_type="TIME", freq="1min"), dict(bar_type="VOLUME", threshold=12), dict(bar_type="DOLLAR", threshold=1000)]:
+        batch = TickResampler(**kwargs).resample_frame(TICKS, size_col='size')
+        online = _online(TickResampler(**kwargs), TICKS)
+        online = sorted(online, key=lambda b: (b.timestamp, b.symbol))
+        assert len(batch) == len(online)
+        for row, bar in zip(batch.itertuples(index=False), online):
+            assert (row.timestamp, row.symbol, row.open, row.high, row.low, row.close, row.volume) == \
+                   (bar.timestamp, bar.symbol, bar.open, bar.high, bar.low, bar.close, bar.volume)
+
+
+def test_bars_to_market_data_groups_by_timestamp():
+    batch = TickResampler("TIME", freq="1min").resample_frame(TICKS, size_col='size')
+    market_data = bars_to_market_data(batch)
+    assert list(market_data.keys()) == sorted(market_data.keys())
+    assert {b.symbol for b in market_data[pd.Timestamp('2024-01-02T09:30:00')]} == {'AAPL', 'MSFT'}
@@ -0,0 +1,78 @@
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from costs import StandardCostModel
+from models import MarketDataPoint, OrderAction
+from engine import ExecutionEngine
+from reporting import equity_curve
+from results import ResultStore
+from strategies import Strategy
+
+
+class BuyThenSell(Strategy):
+    def generate_signals(self, tick):
+        action = OrderAction.BUY.value if tick.timestamp.year == 2023 else OrderAction.SELL.value
+        return [(tick.timestamp, action, tick.symbol, 10, tick.close)]
+
+
+def test_write_and_query(tmp_path):
+    d1, d2 = datetime.datetime(2023, 12, 29), datetime.datetime(2024, 1, 2)
+    market_data = {d: [MarketDataPoint(d, s, 10.0, 10.0, 10.0, 10.0, 10.0, 1000) for s in ('AAA', 'BBB')] for d in (d1, d2)}
+    store = ResultStore(str(tmp_path))
+    for name in ('a', 'b'):
+        engine = ExecutionEngine(market_data, {'BS': BuyThenSell()})
+        engine.run()
+        store.write_run(engine, {'BS': equity_curve(engine, 'BS')}, name)
+
+    runs = store.runs(name='b')
+    assert len(runs) == 1 and len(store.catalog()) == 2
+    sells = store.orders(runs=runs, symbols=['AAA'], actions=['SELL'], start_date='2024-01-01')
+    assert sells[['symbol', 'action', 'quantity']].values.tolist() == [['AAA', 'SELL', 10.0]]
+    assert set(sells['run_id']) == set(runs)
+    positions = store.positions(runs=runs, symbols=['BBB'])
+    assert positions['quantity'].tolist() == [10.0, 0.0]
+    assert len(store.equity(strategies=['BS'])) == 4
+
+
+def test_concurrent_writers_keep_every_catalog_entry(tmp_path):
+    d = datetime.datetime(2023, 12, 29)
+    store = ResultStore(str(tmp_path))
+    engines = []
+    for _ in range(12):
+        engine = ExecutionEngine({d: [MarketDataPoint(d, 'AAA', 10.0, 10.0, 10.0, 10.0, 10.0, 1000)]}, {'BS': BuyThenSell()})
+        engine.run()
+        engines.append(engine)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        run_ids = list(pool.map(lambda k: ResultStore(str(tmp_path)).write_run(engines[k], {}, f"run{k}"), range(12)))
+    assert sorted(store.catalog()['run_id']) == sorted(run_ids)
+    with store.catalog_lock(timeout=0.0):
+        pass  # released by every writer
+
+
+def test_catalog_lock_is_never_stolen_from_a_live_holder(tmp_path):
+    store = ResultStore(str(tmp_path))
+    with store.catalog_lock():
+        # however old the lock file looks, a holder that is still running keeps it
+        os.utime(tmp_path / 'catalog.parquet.lock', (0, 0))
+        with pytest.raises(TimeoutError):
+            with ResultStore(str(tmp_path)).catalog_lock(timeout=0.1):
+                pass
+    # a lock file left behind (e.g. by a writer that died) does not block
+    with store.catalog_lock(timeout=0.0):
+        pass
+
+
+def test_orders_keep_commission_and_need_an_order_log(tmp_path):
+    d1, d2 = datetime.datetime(2023, 12, 29), datetime.datetime(2024, 1, 2)
+    market_data = {d: [MarketDataPoint(d, 'AAA', 10.0, 10.0, 10.0, 10.0, 10.0, 1000)] for d in (d1, d2)}
+    store = ResultStore(str(tmp_path))
+    engine = ExecutionEngine(market_data, {'BS': BuyThenSell()}, cost_model=StandardCostModel(0.5, 0.0, 0.0, 0.0))
+    engine.run()
+    run_id = store.write_run(engine, {}, 'costs')
+    assert store.orders(runs=[run_id])['commission'].tolist() == [5.0, 5.0]
+    engine = ExecutionEngine(market_data, {'BS': BuyThenSell()}, log_orders=False)
+    engine.run()
+    with pytest.raises(ValueError, match='no order log'):
+        store.write_run(engine, {}, 'unlogged')
+    assert store.runs() == [run_id]
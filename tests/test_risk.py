@@ -0,0 +1,61 @@
+import datetime
+import numpy as np
+import pytest
+from models import MarketDataPoint, Order, OrderAction, OrderStatus, RiskLimitError
+from panel import PricePanel
+from risk import CovarianceModel, RiskManager, RiskLimits
+from engine import ExecutionEngine
+from strategies import Strategy
+
+
+def test_rolling_covariance_matches_full_recompute():
+    returns = np.random.default_rng(0).normal(0, 0.01, (50, 4))
+    model = CovarianceModel(4, window=20)
+    for r in returns:
+        model.update(r)
+    assert np.allclose(model.covariance(), np.cov(returns[-20:].T))
+
+
+def test_position_weight_limit_blocks_increase_only():
+    d = datetime.datetime(2024, 1, 2)
+    panel = PricePanel.from_market_data({d: [MarketDataPoint(d, 'AAA', 10.0, 10.0, 10.0, 10.0, 10.0, 1000),
+                                             MarketDataPoint(d, 'BBB', 10.0, 10.0, 10.0, 10.0, 10.0, 1000)]})
+    manager = RiskManager(panel, RiskLimits(max_position_weight=0.5))
+    portfolio = {'capital': 200.0, 'positions': {'AAA': {'quantity': 80, 'avg_price': 10.0}}}
+    with pytest.raises(RiskLimitError):
+        manager.check(Order(d, 'AAA', 1, 10.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 's'), portfolio)
+    # already above the limit, but selling reduces the weight
+    manager.check(Order(d, 'AAA', 10, 10.0, OrderStatus.UNFILLED.value, OrderAction.SELL.value, 's'), portfolio)
+    manager.check(Order(d, 'BBB', 5, 10.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 's'), portfolio)
+
+
+def test_buy_weight_uses_post_trade_cash():
+    d = datetime.datetime(2024, 1, 2)
+    panel = PricePanel.from_market_data({d: [MarketDataPoint(d, 'AAA', 10.0, 10.0, 10.0, 10.0, 10.0, 1000)]})
+    manager = RiskManager(panel, RiskLimits(max_position_weight=0.5))
+    portfolio = {'capital': 1000.0, 'positions': {}}
+    # all the cash goes into AAA: weight 1.0, not 1000 / (1000 + 1000)
+    with pytest.raises(RiskLimitError):
+        manager.check(Order(d, 'AAA', 100, 10.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 's'), portfolio)
+    manager.check(Order(d, 'AAA', 50, 10.0, OrderStatus.UNFILLED.value, OrderAction.BUY.value, 's'), portfolio)
+
+
+class BuyEveryBar(Strategy):
+    def generate_signals(self, tick):
+        return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 10, tick.close)]
+
+
+def test_each_strategy_is_checked_without_look_ahead():
+    # calm first half, volatile second half: a model that has seen the whole history blocks the early buys
+    days = [datetime.datetime(2024, 1, 1) + datetime.timedelta(days=k) for k in range(40)]
+    moves = [0.001 if k % 2 else -0.001 for k in range(20)] + [0.1 if k % 2 else -0.1 for k in range(20)]
+    prices = 100.0 * np.cumprod(1.0 + np.array([0.0] + moves[1:]))
+    panel = PricePanel.from_market_data({d: [MarketDataPoint(d, 'AAA', p, p, p, p, p, 1000)] for d, p in zip(days, prices)})
+    engine = ExecutionEngine(panel, {'first': BuyEveryBar(), 'second': BuyEveryBar()})
+    engine.risk_manager = RiskManager(panel, RiskLimits(max_var=0.05), window=10)
+    engine.initalize_portfolio(10_000.0)
+    engine.run()
+    filled = {name: [o.timestamp for t in sorted(engine.ticker_book) for o in engine.ticker_book[t].orders if o.strategy == name]
+              for name in engine.strategies}
+    assert filled['first'] == filled['second']
+    assert days[2] in filled['second']
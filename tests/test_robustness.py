@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import datetime
+from models import Order
+from robustness import RobustnessEngine, max_drawdown, trade_returns_from_orders
+
+
+def _returns(n=500, seed=0):
+    return np.random.default_rng(seed).normal(0.0005, 0.01, n)
+
+
+def test_block_bootstrap_ci_shape_and_ordering():
+    returns = _returns()
+    summary = RobustnessEngine(n_sims=400, batch_size=100, seed=7, max_workers=1, confidence=0.9).block_bootstrap(returns)
+    assert list(summary.index) == ['Sharpe Ratio', 'Max Drawdown', 'Total Return']
+    assert list(summary.columns) == ['Point Estimate', 'Mean', 'Std', 'CI Low (90%)', 'CI High (90%)']
+    assert (summary['CI Low (90%)'] <= summary['CI High (90%)']).all()
+    assert summary.loc['Max Drawdown', 'CI High (90%)'] <= 0.0
+
+
+def test_results_do_not_depend_on_worker_count():
+    returns = _returns()
+    serial = RobustnessEngine(n_sims=300, batch_size=100, seed=3, max_workers=1).block_bootstrap(returns)
+    parallel = RobustnessEngine(n_sims=300, batch_size=100, seed=3, max_workers=2).block_bootstrap(returns)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_trade_reshuffle_reports_drawdown_only():
+    trades = np.array([0.05, -0.03, 0.02, -0.04, 0.01, 0.03])
+    summary = RobustnessEngine(n_sims=200, batch_size=100, seed=1, max_workers=1).trade_reshuffle(trades)
+    assert list(summary.index) == ['Max Drawdown']
+    assert summary.loc['Max Drawdown', 'Point Estimate'] == pytest.approx(float(max_drawdown(trades)))
+
+
+def test_trade_returns_clamp_sells_to_the_open_position():
+    t = datetime.datetime(2024, 1, 2)
+    log = [('BUY', 10, 100.0, 'FILLED'), ('BUY', 10, 110.0, 'FILLED'), ('SELL', 5, 126.0, 'FILLED'),
+           ('SELL', 30, 84.0, 'FILLED'),    # more than the 15 held: closes the position, no short
+           ('SELL', 5, 90.0, 'FILLED'),     # nothing held
+           ('BUY', 10, 50.0, 'CANCELLED'), ('BUY', 10, 50.0, 'FILLED'), ('SELL', 10, 55.0, 'FILLED')]
+    orders = [Order(t, 'AAA', q, p, status, action, 'S') for action, q, p, status in log]
+    assert trade_returns_from_orders(orders).tolist() == pytest.approx([0.2, -0.2, 0.1])
+
+
+def test_random_entry_p_value():
+    rng = np.random.default_rng(5)
+    asset = rng.normal(0.0, 0.01, 400)
+    # perfect timing: in the market exactly on the up days
+    in_market = asset > 0
+    engine = RobustnessEngine(n_sims=500, batch_size=250, seed=11, max_workers=1)
+    summary = engine.random_entry(asset * in_market, asset, in_market)
+    assert summary.loc['Sharpe Ratio', 'p-value'] == 0.0
+    # holding every day is what every random run with the same exposure does
+    summary = engine.random_entry(asset, asset, np.ones(400, dtype=bool))
+    assert summary.loc['Sharpe Ratio', 'p-value'] == 1.0
+    with pytest.raises(ValueError):
+        engine.random_entry(asset, asset, np.zeros(400, dtype=bool))
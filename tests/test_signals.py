@@ -0,0 +1,53 @@
+import datetime
+from models import MarketDataPoint, OrderAction
+from engine import ExecutionEngine
+from signals import SignalBuffer
+from strategies import Strategy, RSI
+from BenchmarkStrategy import LongOnlyOnce
+
+DAYS = [datetime.datetime(2024, 1, d) for d in range(2, 12)]
+
+
+def _market_data():
+    closes = [100.0, 101.0, 99.0, 97.0, 98.0, 95.0, 96.0, 94.0, 100.0, 103.0]
+    return {d: [MarketDataPoint(d, 'AAA', c, c, c, c, c, 1000)] for d, c in zip(DAYS, closes)}
+
+
+class TupleBuyer(Strategy):
+    # legacy tuple API, with HOLD signals the engine should never turn into orders
+    def generate_signals(self, tick):
+        if tick.timestamp == DAYS[0]:
+            return [(tick.timestamp, OrderAction.BUY.value, tick.symbol, 10, tick.close)]
+        return [(tick.timestamp, OrderAction.HOLD.value, tick.symbol, 10, tick.close)]
+
+
+def test_buffer_grows_and_is_reused():
+    buffer = SignalBuffer(2)
+    for k in range(5):
+        buffer.append(DAYS[k], OrderAction.BUY.value, 'AAA', k, 1.0)
+    assert len(buffer) == 5 and buffer.capacity == 8
+    assert [signal[3] for signal in buffer.to_list()] == [0, 1, 2, 3, 4]
+    buffer.clear()
+    buffer.append(DAYS[0], OrderAction.SELL.value, 'BBB', 1, 2.0, {'order_type': 'LIMIT'})
+    assert buffer.to_list() == [(DAYS[0], OrderAction.SELL.value, 'BBB', 1, 2.0, {'order_type': 'LIMIT'})]
+
+
+def test_tuple_strategies_are_adapted_and_hold_is_dropped():
+    buffer = SignalBuffer()
+    strategy = TupleBuyer()
+    for tick in (_market_data()[d][0] for d in DAYS[:3]):
+        strategy.write_signals(tick, buffer)
+    assert buffer.size == 1 and buffer.actions[0] == OrderAction.BUY.value
+
+    engine = ExecutionEngine(_market_data(), {'T': TupleBuyer()})
+    engine.run()
+    orders = [o for book in engine.ticker_book.values() for o in book.orders]
+    assert [(o.action, o.quantity) for o in orders] == [(OrderAction.BUY.value, 10)]
+
+
+def test_buffered_strategy_keeps_tuple_api():
+    tick = _market_data()[DAYS[0]][0]
+    assert LongOnlyOnce().generate_signals(tick) == [(DAYS[0], OrderAction.BUY.value, 'AAA', 1, 100.0)]
+    rsi = RSI(period=3)
+    signals = [s for d in DAYS for s in rsi.generate_signals(_market_data()[d][0])]
+    assert signals and all(s[1] != OrderAction.HOLD.value for s in signals)
@@ -0,0 +1,48 @@
+import pandas as pd
+from validation import validate_universe, load_manifest, usable_paths
+
+
+def _write(path, closes, adj=None):
+    n = len(closes)
+    pd.DataFrame({
+        'timestamp': pd.bdate_range('2024-01-01', periods=n),
+        'adj_close': adj if adj is not None else closes,
+        'close': closes,
+        'high': [c * 1.01 for c in closes],
+        'low': [c * 0.99 for c in closes],
+        'open': closes,
+        'volume': [1000] * n,
+        'symbol': path.stem.split('_')[1].upper(),
+    }).to_parquet(path, index=False)
+
+
+def test_validation_flags_issues_and_writes_manifest(tmp_path):
+    _write(tmp_path / "price_good.parquet", [10.0, 10.5, 10.2, 10.4])
+    _write(tmp_path / "price_bad.parquet", [10.0, 0.0, 10.2, 10.4])
+    # close halves (2:1 split) while adj_close is smooth
+    _write(tmp_path / "price_split.parquet", [100.0, 101.0, 50.5, 51.0], adj=[50.0, 50.5, 50.5, 51.0])
+
+    manifest = validate_universe(data_dir=str(tmp_path))
+    assert manifest['price_good.parquet']['status'] == 'clean'
+    assert manifest['price_good.parquet']['rows'] == 4
+    assert manifest['price_bad.parquet']['status'] == 'error'
+    assert manifest['price_bad.parquet']['issues']['nonpositive_price'] == 1
+    assert manifest['price_split.parquet']['issues']['split_sized_jump'] == 1
+    assert load_manifest(str(tmp_path)) == manifest
+
+    paths = [str(tmp_path / f"price_{s}.parquet") for s in ('good', 'bad', 'split')]
+    assert [p.split('_')[-1] for p in usable_paths(paths, manifest)] == ['good.parquet', 'split.parquet']
+
+
+def test_validation_only_rechecks_changed_files(tmp_path, capsys):
+    _write(tmp_path / "price_good.parquet", [10.0, 10.5, 10.2, 10.4])
+    validate_universe(data_dir=str(tmp_path))
+    capsys.readouterr()
+
+    validate_universe(data_dir=str(tmp_path))
+    assert "Validating" not in capsys.readouterr().out
+
+    _write(tmp_path / "price_good.parquet", [10.0, -1.0, 10.2, 10.4])
+    manifest = validate_universe(data_dir=str(tmp_path))
+    assert "Validating 1 changed file(s)" in capsys.readouterr().out
+    assert manifest['price_good.parquet']['status'] == 'error'
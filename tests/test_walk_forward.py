@@ -0,0 +1,73 @@
+import datetime
+import numpy as np
+import pytest
+import pandas as pd
+from engine import ExecutionEngine
+from models import MarketDataPoint
+from reporting import equity_curve
+from strategies import RSI
+from walk_forward import make_folds, WalkForwardRunner
+
+DAYS = [datetime.datetime(2024, 1, 1) + datetime.timedelta(days=d) for d in range(12)]
+
+
+def _market_data():
+    return {d: [MarketDataPoint(d, 'AAA', 100.0, 100.0, 100.0, 100.0, 100.0, 1000)] for d in DAYS}
+
+
+def test_rolling_folds_do_not_overlap_and_respect_boundaries():
+    folds = make_folds(12, train_size=4, test_size=3)
+    assert folds == [(0, 4, 4, 7), (3, 7, 7, 10)]
+    for train_start, train_end, test_start, test_end in folds:
+        assert train_end - train_start == 4 and test_end - test_start == 3
+        assert train_end <= test_start and test_end <= 12
+
+
+def test_expanding_folds_start_at_zero():
+    folds = make_folds(10, train_size=4, test_size=2, step=3, expanding=True)
+    assert folds == [(0, 4, 4, 6), (0, 7, 7, 9)]
+    with pytest.raises(ValueError):
+        make_folds(10, train_size=0, test_size=2)
+
+
+def test_oos_curve_stitches_best_train_params_per_fold():
+    runner = WalkForwardRunner(_market_data(), RSI, {'period': [7, 14]}, train_size=4, test_size=3)
+    # cached return matrix: set 0 wins the first train window, set 1 the second
+    runner.returns = np.array([
+        [0.01, 0.01, 0.01, 0.012, -0.02, 0.03, -0.01, -0.05, 0.00, 0.03, 0.0, 0.0],
+        [-0.01, 0.00, 0.01, 0.01, 0.01, 0.012, 0.01, 0.01, 0.02, 0.01, 0.0, 0.0],
+    ])
+    result = runner.run()
+    folds = result['folds']
+    assert [p['period'] for p in folds['params']] == [7, 14]
+    assert list(folds['test_start']) == [DAYS[4], DAYS[7]]
+
+    oos = result['oos_returns']
+    assert list(oos.index) == DAYS[4:10]
+    assert oos.to_numpy() == pytest.approx([-0.02, 0.03, -0.01, 0.01, 0.02, 0.01])
+    assert result['oos_equity'].iloc[-1] == pytest.approx(1000000.0 * np.prod(1.0 + oos.to_numpy()))
+
+
+def test_process_pool_matches_serial_backtests():
+    days = [datetime.datetime(2024, 1, 1) + datetime.timedelta(days=d) for d in range(40)]
+    market_data = {d: [MarketDataPoint(d, s, p, p, p, p, p, 1000) for s, p in
+                       (('AAA', 100.0 + 10.0 * np.sin(k / 3.0)), ('BBB', 50.0 + 5.0 * np.cos(k / 2.0)))]
+                   for k, d in enumerate(days)}
+    grid = {'period': [3, 5], 'qty': [10]}
+    runner = WalkForwardRunner(market_data, RSI, grid, train_size=10, test_size=5, max_workers=2)
+    parallel = runner.run()
+
+    # the same candidates backtested one after the other in this process
+    serial = WalkForwardRunner(market_data, RSI, grid, train_size=10, test_size=5)
+    curves = []
+    for params in serial.param_sets:
+        engine = ExecutionEngine(market_data, {'RSI': RSI(**params)})
+        engine.run()
+        curves.append(equity_curve(engine, 'RSI').pct_change().fillna(0.0).to_numpy())
+    serial.returns = np.vstack(curves)
+    expected = serial.run()
+
+    assert runner.returns.shape == (2, len(days)) and np.abs(runner.returns).sum() > 0
+    np.testing.assert_array_equal(runner.returns, serial.returns)
+    pd.testing.assert_frame_equal(parallel['folds'], expected['folds'])
+    pd.testing.assert_series_equal(parallel['oos_equity'], expected['oos_equity'])